@@ -1,56 +1,97 @@
-import hashlib
+import asyncio
 import json
 import logging
-import random
 import uuid
+from datetime import datetime
 from statistics import mean, median
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException, Query, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.gsti_router import GSTIRouter
-from app.db.session import get_db
+from app.core.budget import LatencyBudget
+from app.core.config import settings
+from app.core.feature_snapshot import SNAPSHOT_COLUMNS, FeatureSnapshot
+from app.core.gsti_router import router_for
+from app.core.metrics import render as render_metrics
+from app.core.profiler import load_profile, to_speedscope
+from app.core.resilience import UPSTREAMS
+from app.db.session import SessionLocal, get_db
 from app.models.tables import (
     Agent,
     Assessment,
     Experiment,
-    ExperimentAssignment,
+    Job,
     ExperimentRun,
     Label,
     OnetCache,
+    ReplayJob,
+    ReplayResult,
     ToolCatalog,
-    ToolEmbedding,
 )
 from app.schemas.admin import (
     CompareResponse,
     ExperimentAssignRequest,
     ExperimentAssignResponse,
+    ExperimentBulkAssignRequest,
+    ExperimentBulkAssignResponse,
     ExperimentCreateRequest,
     ExperimentMetricsResponse,
     ExperimentPatchRequest,
     ExperimentResponse,
+    JobResponse,
+    JobStatsItem,
     LabelCreateRequest,
     LabelResponse,
+    ReplayCreateRequest,
+    ReplayJobResponse,
+    UpstreamStateItem,
 )
 from app.schemas.agent import AgentGenerateRequest, ApifyWebhookPayload
-from app.schemas.rag import RagSearchRequest, RagSearchResponse
-from app.schemas.risk import RiskBreakdownItem, RiskEvaluateRequest, RiskEvaluateResponse
+from app.schemas.rag import RagBatchSearchRequest, RagBatchSearchResponse, RagSearchRequest, RagSearchResponse
+from app.schemas.risk import RISK_EVALUATE_ADAPTER, RiskEvaluateRequest, RiskEvaluateResponse
 from app.services.agent import build_agent_config
-from app.services.onet import OnetClient
-from app.services.rag import embed_query, search_tools
+from app.services.evaluation import evaluate, evaluation_events
+from app.services.experiments import (
+    assign_variant,
+    assignment_writer,
+    build_experiment_list_query,
+    build_run_projection,
+    encode_cursor,
+    experiment_cache,
+    format_experiment_row,
+    keyset_before,
+    parse_run_fields,
+    parse_stats_includes,
+    project_run_row,
+    row_sort_key,
+)
+from app.services.ingest import ingest_tools
+from app.services.lexical_index import lexical_index
+from app.services.jobs import job_stats
+from app.services.onet import onet_client
+from app.services.rag import search_tools, search_tools_batch
+from app.services.replay import create_replay_job, run_replay
+from app.services.vector_index import tool_index, tool_record
+from app.services.warmup import readiness
 from app.utils.auth import require_admin_api_key, require_ingest_api_key
+from app.utils.serialization import adapter_response, sse_pack
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
-onet_client = OnetClient()
 
 
 def err(code: str, message: str, details: dict | None = None):
     return {"error": {"code": code, "message": message, "details": details}}
 
 
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
 def _spearman(x: list[float], y: list[float]) -> float | None:
     if len(x) < 2 or len(y) < 2:
         return None
@@ -74,6 +115,10 @@ def _spearman(x: list[float], y: list[float]) -> float | None:
     return round(cov / (sx * sy), 4)
 
 
+def _snapshot_from_assessment(assessment: Assessment) -> FeatureSnapshot | None:
+    return FeatureSnapshot.from_dict({name: getattr(assessment, name) for name in SNAPSHOT_COLUMNS})
+
+
 async def _resolve_experiment(db: AsyncSession, experiment_id: int | None) -> Experiment | None:
     if not experiment_id:
         return None
@@ -88,6 +133,17 @@ async def health():
     return {"status": "ok"}
 
 
+@router.get("/ready")
+async def ready():
+    body = readiness.snapshot()
+    return body if readiness.ready else ORJSONResponse(body, status_code=503)
+
+
+@router.get("/metrics")
+async def metrics():
+    return Response(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @router.get("/onet/occupation/search")
 async def onet_search(q: str):
     try:
@@ -113,109 +169,70 @@ async def onet_tasks(code: str):
 
 
 @router.post("/risk/evaluate", response_model=RiskEvaluateResponse)
-async def risk_evaluate(body: RiskEvaluateRequest, db: AsyncSession = Depends(get_db)):
-    tasks: list[str] = []
-    onet_payload: dict = {}
-    if body.occupation_code:
-        try:
-            summary_payload = await onet_client.get(f"online/occupations/{body.occupation_code}/summary")
-            tasks = [t.get("task", "") for t in summary_payload.get("task_statements", []) if t.get("task")]
-            onet_payload["summary"] = summary_payload
-        except Exception:
-            tasks = body.user_inputs.tasks_preference
-
-        try:
-            detail_payload = await onet_client.get(f"online/occupations/{body.occupation_code}")
-            onet_payload["detail"] = detail_payload
-        except Exception:
-            pass
-
-    if not tasks:
-        tasks = body.user_inputs.tasks_preference
-
+async def risk_evaluate(
+    body: RiskEvaluateRequest,
+    db: AsyncSession = Depends(get_db),
+    x_latency_budget_ms: str | None = Header(default=None),
+    x_admin_key: str = Header(default=""),
+):
+    budget = LatencyBudget.from_header(x_latency_budget_ms, admin=x_admin_key == settings.admin_api_key)
     exp = await _resolve_experiment(db, body.experiment_id)
-    gsti_router = GSTIRouter.from_params(exp.params if exp else None)
-    eval_model_version = exp.model_version if exp else body.model_version
-    variant = body.variant or "A"
-
-    result = gsti_router.evaluate(
-        tasks=tasks,
-        onet_payload=onet_payload,
-        model_version=eval_model_version,
-        context={
-            "industry": body.user_inputs.industry,
-            "region": body.user_inputs.region,
-            "selected_tools": body.user_inputs.selected_tools,
-            "occupation_code": body.occupation_code,
-            "occupation_title": body.occupation_title,
-        },
-    )
+    output = await evaluate(db, body, exp, budget=budget)
+    # Engine dicts go straight to bytes: one validation, one encode. Parts that
+    # were not built are left out of the body rather than sent as null.
+    omitted = set(RiskEvaluateResponse.model_fields) - set(output)
+    return adapter_response(RISK_EVALUATE_ADAPTER, output, exclude=omitted)
+
+
+@router.post("/risk/evaluate/stream")
+async def risk_evaluate_stream(
+    body: RiskEvaluateRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    x_latency_budget_ms: str | None = Header(default=None),
+    x_admin_key: str = Header(default=""),
+):
+    budget = LatencyBudget.from_header(x_latency_budget_ms, admin=x_admin_key == settings.admin_api_key)
+    exp = await _resolve_experiment(db, body.experiment_id)
+    request_id = getattr(request.state, "request_id", "unknown")
 
-    score = result["score"]
-    summary = result["summary"]
-    breakdown = [RiskBreakdownItem(**item) for item in result["breakdown"]]
-    assessment = Assessment(
-        session_id=body.session_id,
-        occupation_code=body.occupation_code,
-        occupation_title=body.occupation_title,
-        input_payload=body.model_dump(),
-        output_summary=summary,
-        risk_score=score,
-    )
-    db.add(assessment)
-    await db.commit()
-    await db.refresh(assessment)
-
-    experiment_meta = None
-    if exp:
-        experiment_meta = {"id": exp.id, "name": exp.name, "variant": variant}
-        db.add(
-            ExperimentRun(
-                experiment_id=exp.id,
-                assessment_id=assessment.id,
-                variant=variant,
-                output={**result, "assessment_id": assessment.id, "experiment": experiment_meta},
-            )
-        )
-        await db.commit()
+    async def stream():
+        # The request-scoped session is closed once the response starts, so the
+        # stream owns its own.
+        async with SessionLocal() as stream_db:
+            try:
+                async for event, data in evaluation_events(stream_db, body, exp, budget=budget):
+                    yield sse_pack(event, data)
+            except Exception:
+                logger.exception("Streaming evaluation failed", extra={"request_id": request_id})
+                yield sse_pack("error", err("INTERNAL_ERROR", "Evaluation failed")["error"])
 
-    return RiskEvaluateResponse(
-        score=score,
-        confidence=result.get("confidence"),
-        model_version=result.get("model_version"),
-        breakdown=breakdown,
-        summary=summary,
-        suggested_focus=result["suggested_focus"],
-        assessment_id=assessment.id,
-        experiment=experiment_meta,
-    )
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
 
 @router.post("/experiments/assign", response_model=ExperimentAssignResponse)
 async def assign_experiment(body: ExperimentAssignRequest, db: AsyncSession = Depends(get_db)):
-    exp = (await db.execute(select(Experiment).where(Experiment.name == body.experiment_name, Experiment.is_active.is_(True)))).scalar_one_or_none()
+    exp = await experiment_cache.get(db, body.experiment_name)
     if not exp:
         raise HTTPException(404, detail="Active experiment not found")
-
-    existing = (
-        await db.execute(
-            select(ExperimentAssignment).where(
-                ExperimentAssignment.user_key == body.user_key,
-                ExperimentAssignment.experiment_id == exp.id,
-            )
-        )
-    ).scalar_one_or_none()
-    if existing:
-        return ExperimentAssignResponse(experiment_id=exp.id, variant=existing.variant)
-
-    seed_hex = hashlib.sha256(f"{body.user_key}:{exp.id}".encode()).hexdigest()[:8]
-    seeded = random.Random(int(seed_hex, 16))
-    variant = "A" if seeded.random() < 0.5 else "B"
-    db.add(ExperimentAssignment(user_key=body.user_key, experiment_id=exp.id, variant=variant))
-    await db.commit()
+    variant = assign_variant(body.user_key, exp.id)
+    assignment_writer.enqueue(body.user_key, exp.id, variant)
     return ExperimentAssignResponse(experiment_id=exp.id, variant=variant)
 
 
+@router.post("/experiments/assign/bulk", response_model=ExperimentBulkAssignResponse)
+async def bulk_assign_experiment(body: ExperimentBulkAssignRequest, db: AsyncSession = Depends(get_db)):
+    exp = await experiment_cache.get(db, body.experiment_name)
+    if not exp:
+        raise HTTPException(404, detail="Active experiment not found")
+    assignments = {}
+    for user_key in body.user_keys:
+        variant = assign_variant(user_key, exp.id)
+        assignment_writer.enqueue(user_key, exp.id, variant)
+        assignments[user_key] = variant
+    return ExperimentBulkAssignResponse(experiment_id=exp.id, assignments=assignments)
+
+
 @router.post("/admin/labels", response_model=LabelResponse, dependencies=[Depends(require_admin_api_key)])
 async def create_label(body: LabelCreateRequest, db: AsyncSession = Depends(get_db)):
     label = Label(**body.model_dump())
@@ -243,26 +260,19 @@ async def create_experiment(body: ExperimentCreateRequest, db: AsyncSession = De
     db.add(exp)
     await db.commit()
     await db.refresh(exp)
+    experiment_cache.invalidate()
     return exp
 
 
 @router.get("/admin/experiments", dependencies=[Depends(require_admin_api_key)])
-async def list_experiments(db: AsyncSession = Depends(get_db)):
-    rows = (await db.execute(select(Experiment).order_by(Experiment.created_at.desc()))).scalars().all()
-    data = []
-    for row in rows:
-        sample_count = (await db.execute(select(func.count(ExperimentRun.id)).where(ExperimentRun.experiment_id == row.id))).scalar_one()
-        data.append({
-            "id": row.id,
-            "name": row.name,
-            "description": row.description,
-            "model_version": row.model_version,
-            "params": row.params,
-            "is_active": row.is_active,
-            "created_at": row.created_at,
-            "sample_count": sample_count,
-        })
-    return data
+async def list_experiments(include: str | None = None, counts: str = "live", db: AsyncSession = Depends(get_db)):
+    try:
+        includes = parse_stats_includes(include)
+        stmt = build_experiment_list_query(includes, cached=counts == "cached")
+    except ValueError as e:
+        raise HTTPException(400, detail=err("INVALID_QUERY", str(e)))
+    rows = (await db.execute(stmt)).mappings().all()
+    return [format_experiment_row(row, includes) for row in rows]
 
 
 @router.patch("/admin/experiments/{experiment_id}", response_model=ExperimentResponse, dependencies=[Depends(require_admin_api_key)])
@@ -273,25 +283,46 @@ async def patch_experiment(experiment_id: int, body: ExperimentPatchRequest, db:
         setattr(exp, key, value)
     await db.commit()
     await db.refresh(exp)
+    experiment_cache.invalidate()
     return exp
 
 
 @router.get("/admin/experiments/{experiment_id}/runs", dependencies=[Depends(require_admin_api_key)])
-async def list_experiment_runs(experiment_id: int, limit: int = 20, db: AsyncSession = Depends(get_db)):
+async def list_experiment_runs(
+    experiment_id: int,
+    response: Response,
+    limit: int = Query(default=20, ge=1, le=500),
+    cursor: str | None = None,
+    fields: str | None = None,
+    format: str = "json",
+    db: AsyncSession = Depends(get_db),
+):
     _ = await _resolve_experiment(db, experiment_id)
-    runs = (await db.execute(select(ExperimentRun).where(ExperimentRun.experiment_id == experiment_id).order_by(ExperimentRun.created_at.desc()).limit(limit))).scalars().all()
-    return [
-        {
-            "id": r.id,
-            "assessment_id": r.assessment_id,
-            "variant": r.variant,
-            "score": r.output.get("score"),
-            "confidence": r.output.get("confidence"),
-            "created_at": r.created_at,
-            "output": r.output,
-        }
-        for r in runs
-    ]
+    try:
+        run_fields = parse_run_fields(fields)
+        stmt = (
+            select(*build_run_projection(run_fields))
+            .where(ExperimentRun.experiment_id == experiment_id)
+            .order_by(ExperimentRun.created_at.desc(), ExperimentRun.id.desc())
+        )
+        if cursor:
+            stmt = stmt.where(keyset_before(cursor))
+    except ValueError as e:
+        raise HTTPException(400, detail=err("INVALID_QUERY", str(e)))
+
+    if format == "ndjson":
+        async def stream():
+            async with SessionLocal() as stream_db:
+                result = await stream_db.stream(stmt.execution_options(yield_per=1000))
+                async for row in result.mappings():
+                    yield json.dumps(project_run_row(row, run_fields), default=_json_default, ensure_ascii=False) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    rows = (await db.execute(stmt.limit(limit))).mappings().all()
+    if len(rows) == limit:
+        response.headers["x-next-cursor"] = encode_cursor(*row_sort_key(rows[-1]))
+    return [project_run_row(r, run_fields) for r in rows]
 
 
 @router.get("/admin/experiments/{experiment_id}/metrics", response_model=ExperimentMetricsResponse, dependencies=[Depends(require_admin_api_key)])
@@ -350,14 +381,15 @@ async def compare_assessment(assessment_id: int, models: str = "v0,v1", experime
 
     body = assessment.input_payload
     tasks = body.get("user_inputs", {}).get("tasks_preference", [])
+    features = _snapshot_from_assessment(assessment)
     onet_payload = {}
-    if assessment.occupation_code:
+    if assessment.occupation_code and features is None:
         cached = (await db.execute(select(OnetCache).where(OnetCache.occupation_code == assessment.occupation_code))).scalar_one_or_none()
         if cached:
             onet_payload = cached.payload
 
     exp = await _resolve_experiment(db, experiment_id) if experiment_id else None
-    gsti_router = GSTIRouter.from_params(exp.params if exp else None)
+    gsti_router = router_for(exp.params if exp else None)
     outputs = {}
     for model in [m.strip() for m in models.split(",") if m.strip()]:
         outputs[model] = gsti_router.evaluate(
@@ -371,75 +403,157 @@ async def compare_assessment(assessment_id: int, models: str = "v0,v1", experime
                 "occupation_code": assessment.occupation_code,
                 "occupation_title": assessment.occupation_title,
             },
+            features=features,
         )
 
     return CompareResponse(assessment_id=assessment_id, outputs=outputs)
 
 
+@router.post("/admin/replays", response_model=ReplayJobResponse, dependencies=[Depends(require_admin_api_key)])
+async def create_replay(body: ReplayCreateRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    try:
+        job = await create_replay_job(db, body)
+    except ValueError as e:
+        raise HTTPException(404, detail=str(e))
+    background_tasks.add_task(run_replay, job.id)
+    return job
+
+
+@router.get("/admin/replays/{job_id}", response_model=ReplayJobResponse, dependencies=[Depends(require_admin_api_key)])
+async def get_replay(job_id: int, db: AsyncSession = Depends(get_db)):
+    job = await db.get(ReplayJob, job_id)
+    if not job:
+        raise HTTPException(404, detail="Replay job not found")
+    return job
+
+
+@router.get("/admin/jobs", response_model=list[JobStatsItem], dependencies=[Depends(require_admin_api_key)])
+async def list_job_stats(db: AsyncSession = Depends(get_db)):
+    return await job_stats(db)
+
+
+@router.get("/admin/jobs/{job_id}", response_model=JobResponse, dependencies=[Depends(require_admin_api_key)])
+async def get_job(job_id: int, db: AsyncSession = Depends(get_db)):
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(404, detail="Job not found")
+    return job
+
+
+@router.get("/admin/profiles/{request_id}", dependencies=[Depends(require_admin_api_key)])
+async def get_profile(request_id: str, format: str = Query(default="collapsed", pattern="^(collapsed|speedscope)$")):
+    collapsed = load_profile(request_id)
+    if collapsed is None:
+        raise HTTPException(404, detail="Profile not found")
+    if format == "speedscope":
+        return to_speedscope(collapsed, request_id)
+    return Response(collapsed, media_type="text/plain")
+
+
+@router.get("/admin/upstreams", response_model=list[UpstreamStateItem], dependencies=[Depends(require_admin_api_key)])
+async def list_upstreams():
+    return [upstream.snapshot() for upstream in UPSTREAMS.values()]
+
+
+@router.post("/admin/upstreams/{name}/reset", response_model=UpstreamStateItem, dependencies=[Depends(require_admin_api_key)])
+async def reset_upstream(name: str):
+    upstream = UPSTREAMS.get(name)
+    if not upstream:
+        raise HTTPException(404, detail="Upstream not found")
+    upstream.breaker.reset()
+    return upstream.snapshot()
+
+
+@router.get("/admin/replays/{job_id}/results", dependencies=[Depends(require_admin_api_key)])
+async def list_replay_results(job_id: int, limit: int = Query(default=50, ge=1, le=1000), db: AsyncSession = Depends(get_db)):
+    rows = (
+        await db.execute(
+            select(ReplayResult).where(ReplayResult.job_id == job_id).order_by(func.abs(ReplayResult.delta).desc()).limit(limit)
+        )
+    ).scalars().all()
+    return [
+        {
+            "assessment_id": r.assessment_id,
+            "baseline_score": r.baseline_score,
+            "replay_score": r.replay_score,
+            "delta": r.delta,
+            "baseline_bucket": r.baseline_bucket,
+            "replay_bucket": r.replay_bucket,
+            "model_version": r.model_version,
+        }
+        for r in rows
+    ]
+
+
 @router.post("/rag/tools/search", response_model=RagSearchResponse)
 async def rag_tools_search(body: RagSearchRequest, db: AsyncSession = Depends(get_db)):
     try:
-        items = await search_tools(db, body.query, body.top_k, body.filters.model_dump() if body.filters else None)
+        items = await search_tools(
+            db,
+            body.query,
+            body.top_k,
+            body.filters.model_dump() if body.filters else None,
+            mode=body.mode,
+            ef_search=body.ef_search,
+        )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=err("EMBEDDING_CONFIG_ERROR", str(e)))
     return RagSearchResponse(results=items)
 
 
+@router.post("/rag/tools/search/batch", response_model=RagBatchSearchResponse)
+async def rag_tools_search_batch(body: RagBatchSearchRequest, db: AsyncSession = Depends(get_db)):
+    searches = []
+    for q in body.queries:
+        filters = q.filters or body.filters
+        searches.append({"query": q.query, "top_k": q.top_k, "filters": filters.model_dump() if filters else None})
+    try:
+        found = await search_tools_batch(db, searches, dedupe=body.dedupe, ef_search=body.ef_search)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=err("EMBEDDING_CONFIG_ERROR", str(e)))
+    return RagBatchSearchResponse(results=[{"query": q.query, "results": items} for q, items in zip(body.queries, found)])
+
+
 @router.post("/agent/generate")
 async def agent_generate(body: AgentGenerateRequest, db: AsyncSession = Depends(get_db)):
     request_id = str(uuid.uuid4())
 
     async def stream():
-        def pack(event: str, data: dict) -> str:
-            return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
-
-        yield pack("step", {"name": "fetch_context", "status": "start"})
+        yield sse_pack("step", {"name": "fetch_context", "status": "start"})
         tools = []
         if body.selected_tools:
             rows = (await db.execute(select(ToolCatalog).where(ToolCatalog.id.in_(body.selected_tools)))).scalars().all()
             tools = [{"name": r.name, "url": r.url} for r in rows]
-        yield pack("step", {"name": "fetch_context", "status": "end", "meta": {"tools": len(tools)}})
-        yield pack("step", {"name": "compose_agent", "status": "start"})
-        yield pack("delta", {"type": "text", "content": "正在生成配置说明…"})
+        yield sse_pack("step", {"name": "fetch_context", "status": "end", "meta": {"tools": len(tools)}})
+        yield sse_pack("step", {"name": "compose_agent", "status": "start"})
+        yield sse_pack("delta", {"type": "text", "content": "正在生成配置说明…"})
 
         config = build_agent_config(body.user_goal, tools, body.risk_score)
         explanation = "已基于风险分与工具偏好生成可执行 Agent 配置。"
-        agent = Agent(assessment_id=body.assessment_id, config=config.model_dump(), explanation=explanation)
+        config_data = config.model_dump()
+        agent = Agent(assessment_id=body.assessment_id, config=config_data, explanation=explanation)
         db.add(agent)
         await db.commit()
         await db.refresh(agent)
 
-        yield pack("step", {"name": "compose_agent", "status": "end"})
-        yield pack("result", {"agent_config": config.model_dump(), "explanation": explanation, "next_actions": ["导出JSON", "执行首周工作流"], "agent_id": agent.id, "request_id": request_id})
+        yield sse_pack("step", {"name": "compose_agent", "status": "end"})
+        yield sse_pack("result", {"agent_config": config_data, "explanation": explanation, "next_actions": ["导出JSON", "执行首周工作流"], "agent_id": agent.id, "request_id": request_id})
 
     return StreamingResponse(stream(), media_type="text/event-stream")
 
 
 @router.post("/ingest/apify/webhook", dependencies=[Depends(require_ingest_api_key)])
 async def ingest_apify(body: ApifyWebhookPayload, db: AsyncSession = Depends(get_db)):
-    for item in body.items:
-        existing = (await db.execute(select(ToolCatalog).where(ToolCatalog.url == item.url))).scalar_one_or_none()
-        if existing:
-            existing.name = item.name
-            existing.description = item.description
-            existing.tags = item.tags
-            existing.raw_payload = item.raw_payload
-            tool = existing
-        else:
-            tool = ToolCatalog(**item.model_dump())
-            db.add(tool)
-            await db.flush()
-
-        try:
-            emb = await embed_query(f"{item.name}\n{item.description}\n{' '.join(item.tags)}")
-            emb_row = (await db.execute(select(ToolEmbedding).where(ToolEmbedding.tool_id == tool.id))).scalar_one_or_none()
-            if emb_row:
-                emb_row.embedding = emb
-                emb_row.model = "text-embedding-3-small"
-            else:
-                db.add(ToolEmbedding(tool_id=tool.id, embedding=emb, model="text-embedding-3-small"))
-        except ValueError:
-            logger.warning("Embedding skipped due to missing key", extra={"request_id": "system"})
-
-    await db.commit()
-    return {"status": "ok", "count": len(body.items), "todo": "move embedding generation to async queue for scale"}
+    result = await ingest_tools(db, body.items)
+    records = [tool_record(tool_id, item.name, item.description, item.url, item.tags, item.source) for tool_id, item in result["items"]]
+    if lexical_index.loaded:
+        for record in records:
+            lexical_index.upsert(record)
+    embeddings = result["embeddings"]
+    if settings.rag_backend == "memory" and embeddings:
+        ids = [record["tool_id"] for record in records]
+        await asyncio.to_thread(tool_index.add, ids, embeddings, records)
+    response = {"status": "ok", "count": len(body.items), "embedded": len(embeddings or []), **result["counts"]}
+    if result["job_ids"]:
+        response.update(status="queued", job_ids=result["job_ids"])
+    return response
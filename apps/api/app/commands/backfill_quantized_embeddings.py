@@ -0,0 +1,43 @@
+"""Fill the halfvec/binary copies of existing tool embeddings.
+
+    python -m app.commands.backfill_quantized_embeddings [--batch-size 5000]
+
+Runs in id-range batches with a commit per batch, so it can be stopped and
+re-run; rows that already have both copies are skipped.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.db.session import SessionLocal
+
+BACKFILL_SQL = text(
+    """
+    UPDATE tool_embeddings
+    SET embedding_half = embedding::halfvec(1536),
+        embedding_bits = binary_quantize(embedding)::bit(1536)
+    WHERE id > :after AND id <= :until
+      AND (embedding_half IS NULL OR embedding_bits IS NULL)
+    """
+)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--batch-size", type=int, default=5000)
+    batch_size = parser.parse_args().batch_size
+
+    async with SessionLocal() as db:
+        max_id = (await db.execute(text("SELECT coalesce(max(id), 0) FROM tool_embeddings"))).scalar_one()
+        updated = 0
+        for after in range(0, max_id, batch_size):
+            result = await db.execute(BACKFILL_SQL, {"after": after, "until": after + batch_size})
+            await db.commit()
+            updated += result.rowcount
+            print(f"id <= {min(after + batch_size, max_id)}: {updated} rows quantized")
+    print(f"done, {updated} rows quantized")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,18 @@
+"""Rebuild the in-process tool vector index from ``tool_embeddings``.
+
+    python -m app.commands.build_vector_index
+"""
+import asyncio
+
+from app.db.session import SessionLocal
+from app.services.vector_index import tool_index
+
+
+async def main() -> None:
+    async with SessionLocal() as db:
+        count = await tool_index.build_from_db(db)
+    print(f"indexed {count} tools into {tool_index.root}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
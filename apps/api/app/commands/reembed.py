@@ -0,0 +1,34 @@
+"""Re-embed the tool catalog with a new model and swap it in when complete.
+
+    python -m app.commands.reembed --model <model> [--batch-size 2000] [--rpm 300]
+
+The model must produce 1536-dimensional vectors (the column type). Progress
+is checkpointed per batch; re-running the same command resumes. Set
+EMBEDDING_MODEL to the same model afterwards so new deployments agree.
+"""
+import argparse
+import asyncio
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.reembed import reembed_catalog
+from app.services.vector_index import tool_index
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--model", default=settings.embedding_model)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--rpm", type=int, default=None, help="max embedding requests per minute")
+    args = parser.parse_args()
+
+    async with SessionLocal() as db:
+        run = await reembed_catalog(db, args.model, batch_size=args.batch_size, requests_per_minute=args.rpm)
+        print(f"re-embed run {run.id}: {run.processed} tools now served with {run.model}")
+        if settings.rag_backend == "memory":
+            count = await tool_index.build_from_db(db)
+            print(f"rebuilt vector index with {count} tools")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,47 @@
+"""Run a historical replay from the command line.
+
+    python -m app.commands.replay --experiment-id 3 --from 2025-01-01 --workers 8
+"""
+import argparse
+import asyncio
+import json
+from pathlib import Path
+
+from app.db.session import SessionLocal
+from app.schemas.admin import ReplayCreateRequest, ReplayFilters
+from app.services.replay import create_replay_job, run_replay
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--experiment-id", type=int, default=None)
+    parser.add_argument("--params-file", type=Path, default=None, help="JSON file with ad-hoc GSTI params")
+    parser.add_argument("--model-version", default=None)
+    parser.add_argument("--from", dest="created_from", default=None)
+    parser.add_argument("--to", dest="created_to", default=None)
+    parser.add_argument("--occupation-code", action="append", dest="occupation_codes", default=None)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=None)
+    args = parser.parse_args()
+
+    body = ReplayCreateRequest(
+        experiment_id=args.experiment_id,
+        params=json.loads(args.params_file.read_text(encoding="utf-8")) if args.params_file else None,
+        model_version=args.model_version,
+        filters=ReplayFilters(
+            created_from=args.created_from,
+            created_to=args.created_to,
+            occupation_codes=args.occupation_codes,
+            limit=args.limit,
+        ),
+    )
+    async with SessionLocal() as db:
+        job = await create_replay_job(db, body)
+    print(f"replay job {job.id} started")
+    summary = await run_replay(job.id, workers=args.workers, chunk_size=args.chunk_size)
+    print(json.dumps(summary, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""Create the HNSW indexes for the configured ``RAG_VECTOR_STORAGE`` mode only.
+
+    python -m app.commands.setup_vector_indexes [--storage halfvec] [--drop-unused]
+
+Each mode gets one index on its column plus a partial index per source in
+``RAG_PARTIAL_INDEX_SOURCES``. Indexes are built ``CONCURRENTLY``, so search
+and ingest keep running. ``--drop-unused`` drops the other modes' indexes,
+including the full-precision one, to free the memory they hold; quantized
+modes require ``backfill_quantized_embeddings`` to have finished first.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.db.session import engine
+
+# storage mode -> (index name prefix, indexed expression)
+VECTOR_INDEXES = {
+    "full": ("idx_tool_embeddings_hnsw", "embedding vector_cosine_ops"),
+    "halfvec": ("idx_tool_embeddings_half_hnsw", "embedding_half halfvec_cosine_ops"),
+    "binary": ("idx_tool_embeddings_bits_hnsw", "embedding_bits bit_hamming_ops"),
+}
+QUANTIZED_COLUMNS = {"halfvec": "embedding_half", "binary": "embedding_bits"}
+
+
+def _index_names(storage: str, sources: list[str]) -> list[tuple[str, str | None]]:
+    name = VECTOR_INDEXES[storage][0]
+    return [(name, None), *((f"{name}_{source}", source) for source in sources if source.isidentifier())]
+
+
+def index_statements(storage: str, sources: list[str], drop_unused: bool = False) -> list[str]:
+    _, expression = VECTOR_INDEXES[storage]
+    statements = []
+    for name, source in _index_names(storage, sources):
+        where = f" WHERE source = '{source}'" if source else ""
+        statements.append(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON tool_embeddings USING hnsw ({expression}){where}")
+    if drop_unused:
+        for other in VECTOR_INDEXES:
+            if other != storage:
+                statements.extend(f"DROP INDEX CONCURRENTLY IF EXISTS {name}" for name, _ in _index_names(other, sources))
+    return statements
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--storage", choices=sorted(VECTOR_INDEXES), default=settings.rag_vector_storage)
+    parser.add_argument("--drop-unused", action="store_true", help="drop the indexes of the other storage modes")
+    args = parser.parse_args()
+
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction block.
+    async with engine.connect() as conn:
+        conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+        column = QUANTIZED_COLUMNS.get(args.storage)
+        if column:
+            missing = (await conn.execute(text(f"SELECT count(*) FROM tool_embeddings WHERE {column} IS NULL"))).scalar_one()
+            if missing:
+                parser.error(f"{missing} rows have no {column}; run python -m app.commands.backfill_quantized_embeddings first")
+        for statement in index_statements(args.storage, settings.rag_partial_index_sources, args.drop_unused):
+            print(statement)
+            await conn.execute(text(statement))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
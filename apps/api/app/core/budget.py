@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import math
+import time
+
+from app.core.config import settings
+
+
+class LatencyBudget:
+    """Deadline for one evaluation.
+
+    Optional stages call ``allows`` before starting and are cut off at
+    ``timeout_s``; both hold back the ``persist`` reserve so the final write
+    still fits. A budget of ``0``/``None`` never skips anything.
+    """
+
+    def __init__(self, total_ms: float | None, reserves: dict[str, int] | None = None) -> None:
+        self.total_ms = total_ms or None
+        self.reserves = settings.risk_stage_reserve_ms if reserves is None else reserves
+        self._deadline = time.monotonic() + self.total_ms / 1000 if self.total_ms else None
+        self.skipped: list[str] = []
+        # Stages skipped because the budget ran short, as opposed to an unavailable upstream.
+        self.cut: set[str] = set()
+
+    @classmethod
+    def from_header(cls, value: str | None, admin: bool = False) -> "LatencyBudget":
+        """Budget from ``X-Latency-Budget-Ms``, clamped to the configured min/max,
+        falling back to config. Only admin callers may send ``0`` (unbounded)."""
+        total = settings.risk_latency_budget_ms
+        if value:
+            try:
+                requested = int(value)
+            except ValueError:
+                return cls(total)
+            if requested <= 0 and admin:
+                return cls(None)
+            total = min(max(requested, settings.risk_latency_budget_min_ms), settings.risk_latency_budget_max_ms)
+        return cls(total)
+
+    @property
+    def bounded(self) -> bool:
+        return self._deadline is not None
+
+    def remaining_ms(self) -> float:
+        if self._deadline is None:
+            return math.inf
+        return (self._deadline - time.monotonic()) * 1000
+
+    def _spendable_ms(self) -> float:
+        return self.remaining_ms() - self.reserves.get("persist", 0)
+
+    def allows(self, stage: str) -> bool:
+        return self._spendable_ms() >= self.reserves.get(stage, 0)
+
+    def timeout_s(self) -> float | None:
+        """Seconds a stage may run before it would eat into the persist reserve."""
+        if self._deadline is None:
+            return None
+        return max(self._spendable_ms(), 0.0) / 1000
+
+    def skip(self, stage: str, for_budget: bool = True) -> None:
+        if stage not in self.skipped:
+            self.skipped.append(stage)
+        if for_budget:
+            self.cut.add(stage)
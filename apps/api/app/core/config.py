@@ -14,11 +14,81 @@ class Settings(BaseSettings):
     onet_password: str | None = None
 
     openai_api_key: str | None = None
+    # OpenAI-compatible endpoint for embeddings (e.g. the load-test stand-in); unset uses the SDK default.
+    openai_base_url: str | None = None
     embedding_model: str = "text-embedding-3-small"
+    embedding_cache_size: int = 10000
+    embedding_cache_ttl_s: float = 86400.0
+    embedding_cache_shared: bool = False
+    embedding_batch_size: int = 256
+    embedding_batch_concurrency: int = 4
+    embedding_model_refresh_s: float = 10.0
+    reembed_batch_size: int = 2000
+    reembed_requests_per_minute: int = 300
+
+    rag_backend: str = "pgvector"
+    rag_vector_storage: str = "full"
+    rag_rerank_factor: int = 4
+    rag_ef_search: int = 40
+    rag_ef_search_max: int = 1000
+    # Requires pgvector >= 0.8; disable on older servers.
+    rag_iterative_scan: bool = True
+    # Sources with a partial HNSW index (see migration 009); must be plain identifiers.
+    rag_partial_index_sources: list[str] = ["apify"]
+    vector_index_dir: str = "data/vector_index"
+    vector_index_ivf_min_rows: int = 50000
+    vector_index_nprobe: int = 8
+    vector_index_refresh_s: float = 5.0
+    vector_index_max_segments: int = 32
+    # Replaced segments stay on disk this long so readers on an older manifest can still load them.
+    vector_index_retire_grace_s: float = 300.0
+    lexical_index_refresh_s: float = 30.0
+    hybrid_candidate_factor: int = 3
 
     ingest_api_key: str = "change-me"
+    ingest_upsert_batch_size: int = 1000
     admin_api_key: str = "admin-change-me"
     request_timeout_s: float = 20.0
+    # Circuit breaker / bulkhead / hedging per upstream ("onet", "embeddings").
+    upstream_failure_threshold: int = 5
+    upstream_reset_timeout_s: float = 30.0
+    upstream_half_open_max_calls: int = 1
+    upstream_max_concurrency: dict[str, int] = {"onet": 16, "embeddings": 8}
+    upstream_queue_timeout_s: float = 0.5
+    # Send a duplicate idempotent request after this many ms without a reply; 0 disables hedging.
+    upstream_hedge_delay_ms: dict[str, int] = {"onet": 0, "embeddings": 0}
+    # Sampling profiler for requests sent with "x-profile: 1" plus a valid X-Admin-Key.
+    profile_dir: str = "/tmp/jobshield-profiles"
+    profile_interval_ms: float = 1.0
+    profile_max_files: int = 100
+    # Per-evaluation latency budget (overridable with X-Latency-Budget-Ms); 0 disables it (header: admin only).
+    risk_latency_budget_ms: int = 800
+    risk_latency_budget_min_ms: int = 100
+    risk_latency_budget_max_ms: int = 30000
+    # Minimum remaining budget (ms) to start each optional stage; "persist" is held back for the DB write.
+    risk_stage_reserve_ms: dict[str, int] = {"onet_summary": 150, "onet_detail": 150, "semantic": 250, "v1": 20, "persist": 100}
+
+    # Start-up warm-up; /ready answers 503 until it finishes.
+    warmup_db_connections: int = 4
+    warmup_retry_interval_s: float = 2.0
+    # Cap on each best-effort step; a step that runs longer is recorded as failed.
+    warmup_step_timeout_s: float = 10.0
+
+    experiment_cache_ttl_s: float = 30.0
+    assignment_batch_size: int = 500
+    assignment_flush_interval_s: float = 1.0
+
+    replay_workers: int = 4
+    replay_chunk_size: int = 2000
+
+    job_poll_interval_s: float = 1.0
+    job_lock_timeout_s: float = 600.0
+    job_retry_base_s: float = 5.0
+    job_retry_max_s: float = 600.0
+    job_default_concurrency: int = 2
+    # Cluster-wide running limit per job type, e.g. JOB_CONCURRENCY='{"embed_tools": 2}'.
+    job_concurrency: dict[str, int] = {"embed_tools": 2, "onet_prefetch": 4}
+    ingest_async_embeddings: bool = False
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
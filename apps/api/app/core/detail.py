@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+# Optional parts of an evaluation result. Engines skip building any part that
+# is not requested; score/confidence/model_version are always computed.
+BREAKDOWN = "breakdown"
+SUBFACTORS = "subfactors"
+EXPLANATIONS = "explanations"
+SUMMARY = "summary"
+SUGGESTED_FOCUS = "suggested_focus"
+
+ALL_PARTS = frozenset({BREAKDOWN, SUBFACTORS, EXPLANATIONS, SUMMARY, SUGGESTED_FOCUS})
+
+DETAIL_PARTS = {
+    "minimal": frozenset(),
+    "standard": frozenset({BREAKDOWN, SUMMARY, SUGGESTED_FOCUS}),
+    "full": ALL_PARTS,
+}
+
+# Top-level response fields that map to optional parts.
+FIELD_PARTS = {BREAKDOWN, SUMMARY, SUGGESTED_FOCUS}
+
+
+def resolve_parts(detail: str = "full", fields: list[str] | None = None) -> frozenset[str]:
+    """Parts to build for a request.
+
+    ``detail`` sets the defaults; ``fields`` (top-level response keys) narrows
+    or widens which of breakdown/summary/suggested_focus are returned, while
+    breakdown depth (subfactors, explanations) still follows ``detail``.
+    Subfactors and explanations only exist inside the breakdown.
+    """
+    parts = DETAIL_PARTS[detail]
+    if fields is None:
+        return parts
+    selected = frozenset(FIELD_PARTS & set(fields))
+    if BREAKDOWN not in selected:
+        return selected
+    return selected | (parts & {SUBFACTORS, EXPLANATIONS})
+
+
+def project_fields(payload: dict, fields: list[str] | None) -> dict:
+    """Keep only the requested top-level keys (``score`` is always kept)."""
+    if fields is None:
+        return payload
+    keep = set(fields) | {"score"}
+    return {k: v for k, v in payload.items() if k in keep}
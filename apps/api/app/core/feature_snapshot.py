@@ -0,0 +1,99 @@
+from __future__ import annotations
+
+import hashlib
+from dataclasses import dataclass, field
+
+from app.core.onet_features import FEATURE_MAP
+
+FEATURE_DIMS = list(FEATURE_MAP)
+SNAPSHOT_COLUMNS = (
+    "task_hash",
+    "task_count",
+    "onet_feature_values",
+    "semantic_automation_density",
+    "semantic_human_density",
+    "semantic_model",
+    "trend_triggers",
+)
+
+
+def hash_tasks(tasks: list[str]) -> str:
+    return hashlib.sha256("\n".join(tasks).encode("utf-8")).hexdigest()
+
+
+@dataclass
+class FeatureSnapshot:
+    """The inputs an evaluation actually scored on.
+
+    Stored alongside each assessment so replays and tuning can re-score
+    without O*NET or embedding calls. O*NET values follow ``FEATURE_DIMS``
+    order; keyword (v0) scoring still needs the task text itself. Field
+    names match the snapshot columns on ``assessments``.
+    """
+
+    task_hash: str
+    task_count: int
+    onet_feature_values: list[float | None]
+    semantic_automation_density: float | None = None
+    semantic_human_density: float | None = None
+    semantic_model: str | None = None
+    trend_triggers: list[dict] = field(default_factory=list)
+    onet_sources: dict[str, dict] = field(default_factory=dict, compare=False, repr=False)
+
+    @classmethod
+    def capture(
+        cls,
+        tasks: list[str],
+        onet_features: dict,
+        semantic: dict | None = None,
+        trend_triggers: list[dict] | None = None,
+    ) -> "FeatureSnapshot":
+        return cls(
+            task_hash=hash_tasks(tasks),
+            task_count=len(tasks),
+            onet_feature_values=[onet_features.get(dim, {}).get("value") for dim in FEATURE_DIMS],
+            semantic_automation_density=semantic.get("automation_density") if semantic else None,
+            semantic_human_density=semantic.get("human_density") if semantic else None,
+            semantic_model=semantic.get("model") if semantic else None,
+            trend_triggers=list(trend_triggers or []),
+            onet_sources=onet_features,
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> "FeatureSnapshot | None":
+        if not data or data.get("task_hash") is None:
+            return None
+        return cls(
+            task_hash=data["task_hash"],
+            task_count=int(data.get("task_count") or 0),
+            onet_feature_values=list(data.get("onet_feature_values") or [None] * len(FEATURE_DIMS)),
+            semantic_automation_density=data.get("semantic_automation_density"),
+            semantic_human_density=data.get("semantic_human_density"),
+            semantic_model=data.get("semantic_model"),
+            trend_triggers=list(data.get("trend_triggers") or []),
+        )
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in SNAPSHOT_COLUMNS}
+
+    @property
+    def numeric_count(self) -> int:
+        return sum(1 for v in self.onet_feature_values if v is not None)
+
+    def onet_features(self) -> dict[str, dict[str, float | str | None]]:
+        if self.onet_sources:
+            return self.onet_sources
+        return {
+            dim: {"value": value, "source": "snapshot" if value is not None else None, "raw_value": None}
+            for dim, value in zip(FEATURE_DIMS, self.onet_feature_values)
+        }
+
+    def semantic_features(self) -> dict | None:
+        if self.semantic_automation_density is None or self.semantic_human_density is None:
+            return None
+        return {
+            "automation_density": self.semantic_automation_density,
+            "human_density": self.semantic_human_density,
+            "task_count": self.task_count,
+            "model": self.semantic_model,
+        }
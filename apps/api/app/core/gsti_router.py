@@ -1,11 +1,21 @@
 from __future__ import annotations
 
+from functools import lru_cache
+
+import orjson
+
+from app.core.budget import LatencyBudget
 from app.core.config_models import GSTIConfig
+from app.core.detail import ALL_PARTS, SUMMARY
+from app.core.feature_snapshot import FeatureSnapshot
 from app.core.gsti_v0 import DEFAULT_CONFIG as V0_DEFAULT_CONFIG
 from app.core.gsti_v0 import GSTIv0Engine
 from app.core.gsti_v1 import DEFAULT_CONFIG as V1_DEFAULT_CONFIG
 from app.core.gsti_v1 import GSTIv1Engine
+from app.core.metrics import timed
 from app.core.onet_features import extract_onet_numeric_features
+from app.core.semantic_features import extract_semantic_features
+from app.core.trend_adjustment import compute_trend_modifier
 
 DEFAULT_CONFIG = GSTIConfig(v0=V0_DEFAULT_CONFIG, v1=V1_DEFAULT_CONFIG)
 
@@ -28,29 +38,103 @@ class GSTIRouter:
                 merged[key] = value
         return cls(config=GSTIConfig.model_validate(merged))
 
+    @staticmethod
+    def _too_sparse(numeric_count: int, task_count: int) -> bool:
+        return numeric_count < 3 and task_count < 5
+
+    def extract_features(
+        self,
+        tasks: list[str],
+        onet_payload: dict | None,
+        model_version: str = "auto",
+        context: dict | None = None,
+        budget: LatencyBudget | None = None,
+    ) -> FeatureSnapshot:
+        """Compute the scoring inputs once so they can be persisted and replayed.
+
+        The semantic layer is only called when the v1 engine will actually run,
+        and is skipped when the ``budget`` cannot cover it.
+        """
+        context = context or {}
+        with timed("onet_features"):
+            onet_features = extract_onet_numeric_features(onet_payload or {})
+        numeric_count = sum(1 for item in onet_features.values() if item.get("value") is not None)
+        runs_v1 = model_version == "v1" or (model_version == "auto" and not self._too_sparse(numeric_count, len(tasks)))
+        semantic = None
+        if runs_v1 and budget is not None and not budget.allows("semantic"):
+            budget.skip("semantic")
+        elif runs_v1:
+            timeout = budget.timeout_s() if budget is not None else None
+            with timed("semantic"):
+                semantic = extract_semantic_features(tasks, timeout=timeout)
+            if semantic is None and budget is not None and budget.bounded and budget.timeout_s() == 0:
+                budget.skip("semantic")
+        with timed("trend"):
+            trend = compute_trend_modifier(
+                industry=context.get("industry"),
+                region=context.get("region"),
+                selected_tools=context.get("selected_tools"),
+                occupation_code=context.get("occupation_code"),
+                occupation_title=context.get("occupation_title"),
+                config=self.config.v1.trend,
+            )
+        return FeatureSnapshot.capture(tasks, onet_features, semantic, trend["triggers"])
+
     def evaluate(
         self,
         tasks: list[str],
         onet_payload: dict | None,
         model_version: str = "auto",
         context: dict | None = None,
+        features: FeatureSnapshot | None = None,
+        parts: frozenset[str] = ALL_PARTS,
+        budget: LatencyBudget | None = None,
     ) -> dict:
         context = context or {}
-        v1_numeric = extract_onet_numeric_features(onet_payload or {})
-        numeric_count = sum(1 for item in v1_numeric.values() if item.get("value") is not None)
-        too_sparse = numeric_count < 3 and len(tasks) < 5
+        if features is not None:
+            numeric_count = features.numeric_count
+            task_count = features.task_count
+        else:
+            v1_numeric = extract_onet_numeric_features(onet_payload or {})
+            numeric_count = sum(1 for item in v1_numeric.values() if item.get("value") is not None)
+            task_count = len(tasks)
+        too_sparse = self._too_sparse(numeric_count, task_count)
+        if model_version == "auto" and not too_sparse and budget is not None and not budget.allows("v1"):
+            budget.skip("v1")
+            too_sparse = True
 
         if model_version == "v0":
-            result = self.v0.calculate_risk(tasks)
+            with timed("gsti_v0"):
+                result = self.v0.calculate_risk(tasks, parts=parts)
             result["model_version"] = "v0"
             return result
 
         if model_version == "auto" and too_sparse:
-            result = self.v0.calculate_risk(tasks)
+            with timed("gsti_v0"):
+                result = self.v0.calculate_risk(tasks, parts=parts)
             result["model_version"] = "v0"
-            result["summary"] += "（因 O*NET 数值特征和任务文本不足，自动回退到 v0）"
+            if SUMMARY in parts and budget is not None and "v1" in budget.skipped:
+                result["summary"] += "（因延迟预算不足，自动回退到 v0）"
+            elif SUMMARY in parts:
+                result["summary"] += "（因 O*NET 数值特征和任务文本不足，自动回退到 v0）"
             return result
 
-        v1_result = self.v1.evaluate(tasks, onet_payload, context=context, allow_degraded=model_version == "v1")
+        with timed("gsti_v1"):
+            v1_result = self.v1.evaluate(
+                tasks, onet_payload, context=context, allow_degraded=model_version == "v1", features=features, parts=parts
+            )
         v1_result["model_version"] = "v1"
         return v1_result
+
+
+@lru_cache(maxsize=64)
+def _router_for_json(params_json: bytes) -> GSTIRouter:
+    return GSTIRouter.from_params(orjson.loads(params_json))
+
+
+def router_for(params: dict | None = None) -> GSTIRouter:
+    """Shared router for ``params``; routers are read-only, so each distinct
+    config is validated and built once per process."""
+    if not params:
+        return _router_for_json(b"{}")
+    return _router_for_json(orjson.dumps(params, option=orjson.OPT_SORT_KEYS, default=str))
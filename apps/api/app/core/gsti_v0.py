@@ -3,6 +3,7 @@ from __future__ import annotations
 from dataclasses import dataclass
 
 from app.core.config_models import GSTIv0Config
+from app.core.detail import ALL_PARTS, BREAKDOWN, EXPLANATIONS, SUGGESTED_FOCUS, SUMMARY
 
 
 DEFAULT_FACTOR_CONFIG = {
@@ -138,7 +139,8 @@ class GSTIv0Engine:
 
         return observations
 
-    def calculate_risk(self, tasks: list[str]) -> dict:
+    def calculate_risk(self, tasks: list[str], parts: frozenset[str] = ALL_PARTS) -> dict:
+        explain = EXPLANATIONS in parts
         observations = self.extract_factor_scores(tasks)
         breakdown = []
         risk_sum = 0.0
@@ -156,30 +158,31 @@ class GSTIv0Engine:
                 direction_text = "反向影响风险（值越高，风险越低）"
 
             risk_sum += contribution
-            breakdown.append(
-                {
-                    "factor": factor,
-                    "weight": weight,
-                    "raw_value": round(obs.raw_value, 4),
-                    "risk_contribution": round(contribution, 4),
-                    "direction": direction,
-                    "explanation": (
-                        f"匹配关键词 {obs.matched_keywords} 次 / 任务总数 {obs.total_tasks}。"
-                        f"该因子为{direction_text}。"
-                    ),
-                }
-            )
+            item = {
+                "factor": factor,
+                "weight": weight,
+                "raw_value": round(obs.raw_value, 4),
+                "risk_contribution": round(contribution, 4),
+                "direction": direction,
+            }
+            if explain:
+                item["explanation"] = (
+                    f"匹配关键词 {obs.matched_keywords} 次 / 任务总数 {obs.total_tasks}。"
+                    f"该因子为{direction_text}。"
+                )
+            breakdown.append(item)
 
         score = max(0.0, min(100.0, round(risk_sum, 2)))
         confidence = min(0.9, round(0.6 + min(len(tasks) / 50, 0.3), 2))
 
-        return {
-            "score": score,
-            "confidence": confidence,
-            "breakdown": breakdown,
-            "summary": self.generate_summary(score, breakdown),
-            "suggested_focus": self.suggest_focus(score, breakdown),
-        }
+        result = {"score": score, "confidence": confidence}
+        if BREAKDOWN in parts:
+            result["breakdown"] = breakdown
+        if SUMMARY in parts:
+            result["summary"] = self.generate_summary(score, breakdown)
+        if SUGGESTED_FOCUS in parts:
+            result["suggested_focus"] = self.suggest_focus(score, breakdown)
+        return result
 
     def generate_summary(self, score: float, breakdown: list[dict]) -> str:
         strongest = max(breakdown, key=lambda item: item["risk_contribution"], default=None)
@@ -2,6 +2,9 @@ from __future__ import annotations
 
 from app.core.calibration import calibrate
 from app.core.config_models import GSTIv1Config
+from app.core.detail import ALL_PARTS, BREAKDOWN, EXPLANATIONS, SUBFACTORS, SUGGESTED_FOCUS, SUMMARY
+from app.core.feature_snapshot import FeatureSnapshot
+from app.core.metrics import timed
 from app.core.onet_features import extract_onet_numeric_features
 from app.core.semantic_features import extract_semantic_features
 from app.core.trend_adjustment import compute_trend_modifier
@@ -19,59 +22,83 @@ class GSTIv1Engine:
         onet_payload: dict | None,
         context: dict | None = None,
         allow_degraded: bool = True,
+        features: FeatureSnapshot | None = None,
+        parts: frozenset[str] = ALL_PARTS,
     ) -> dict:
+        """Score one occupation; only the optional ``parts`` requested are built."""
         context = context or {}
-        onet_features = extract_onet_numeric_features(onet_payload or {})
-        semantic = extract_semantic_features(tasks)
-        trend = compute_trend_modifier(
-            industry=context.get("industry"),
-            region=context.get("region"),
-            selected_tools=context.get("selected_tools"),
-            occupation_code=context.get("occupation_code"),
-            occupation_title=context.get("occupation_title"),
-            config=self.config.trend,
-        )
+        if features is not None:
+            onet_features = features.onet_features()
+            semantic = features.semantic_features()
+            task_count = features.task_count
+        else:
+            onet_features = extract_onet_numeric_features(onet_payload or {})
+            semantic = extract_semantic_features(tasks)
+            task_count = len(tasks)
+        with timed("trend"):
+            trend = compute_trend_modifier(
+                industry=context.get("industry"),
+                region=context.get("region"),
+                selected_tools=context.get("selected_tools"),
+                occupation_code=context.get("occupation_code"),
+                occupation_title=context.get("occupation_title"),
+                config=self.config.trend,
+            )
 
         values = {k: v["value"] for k, v in onet_features.items()}
 
         def n(v, default=0.5):
             return default if v is None else v
 
+        if semantic:
+            semantic_meta = {"source": f"embedding:{semantic.get('model')}"}
+        elif "semantic" in context.get("skipped_stages", ()):
+            semantic_meta = {"source": "embedding:skipped"}
+        else:
+            semantic_meta = {"source": "embedding:unavailable"}
         auto_sub = {
             "routine_structured": (n(values.get("routine_structured")), self.config.automation_subweights["routine_structured"], onet_features.get("routine_structured", {})),
             "information_processing": (n(values.get("information_processing")), self.config.automation_subweights["information_processing"], onet_features.get("information_processing", {})),
-            "automation_density": (semantic.get("automation_density") if semantic else None, self.config.automation_subweights["automation_density"], {"source": f"embedding:{semantic.get('model')}" if semantic else "embedding:unavailable"}),
+            "automation_density": (semantic.get("automation_density") if semantic else None, self.config.automation_subweights["automation_density"], semantic_meta),
         }
         human_sub = {
             "empathy_social": (n(values.get("empathy_social")), self.config.human_subweights["empathy_social"], onet_features.get("empathy_social", {})),
             "creativity_innovation": (n(values.get("creativity_innovation")), self.config.human_subweights["creativity_innovation"], onet_features.get("creativity_innovation", {})),
             "leadership_decision": (n(values.get("leadership_decision")), self.config.human_subweights["leadership_decision"], onet_features.get("leadership_decision", {})),
-            "human_density": (semantic.get("human_density") if semantic else None, self.config.human_subweights["human_density"], {"source": f"embedding:{semantic.get('model')}" if semantic else "embedding:unavailable"}),
+            "human_density": (semantic.get("human_density") if semantic else None, self.config.human_subweights["human_density"], semantic_meta),
         }
         resp_sub = {
             "safety_compliance": (n(values.get("safety_compliance")), self.config.responsibility_subweights["safety_compliance"], onet_features.get("safety_compliance", {})),
             "physical_field_work": (n(values.get("physical_field_work")), self.config.responsibility_subweights["physical_field_work"], onet_features.get("physical_field_work", {})),
         }
 
-        auto_val, auto_breakdown = self._compose_subfactors(auto_sub)
-        human_val, human_breakdown = self._compose_subfactors(human_sub)
-        resp_val, resp_breakdown = self._compose_subfactors(resp_sub)
+        explain = BREAKDOWN in parts and EXPLANATIONS in parts
+        # Factor explanations quote the subfactor count, so they need the list too.
+        detailed = BREAKDOWN in parts and (SUBFACTORS in parts or explain)
+        auto_val, auto_breakdown = self._compose_subfactors(auto_sub, detailed, explain)
+        human_val, human_breakdown = self._compose_subfactors(human_sub, detailed, explain)
+        resp_val, resp_breakdown = self._compose_subfactors(resp_sub, detailed, explain)
 
         top = self.config.top_level_weights
-        factors = [
-            self._factor_item("automation_susceptibility", "positive", top["automation_susceptibility"], auto_val, auto_breakdown),
-            self._factor_item("human_advantage", "negative", top["human_advantage"], human_val, human_breakdown),
-            self._factor_item("responsibility_constraints", "negative", top["responsibility_constraints"], resp_val, resp_breakdown),
-            {
+        factors: list[dict] = []
+        if BREAKDOWN in parts or SUMMARY in parts:
+            trend_item = {
                 "factor": "trend_modifier",
                 "weight": top["trend_modifier"],
                 "direction": "bidirectional",
                 "value": round(trend["value"], 4),
                 "risk_contribution": round(trend["value"] * 100, 4),
-                "subfactors": trend["triggers"],
-                "explanation": trend["explanation"],
-            },
-        ]
+            }
+            if SUBFACTORS in parts:
+                trend_item["subfactors"] = trend["triggers"]
+            if explain:
+                trend_item["explanation"] = trend["explanation"]
+            factors = [
+                self._factor_item("automation_susceptibility", "positive", top["automation_susceptibility"], auto_val, auto_breakdown, parts),
+                self._factor_item("human_advantage", "negative", top["human_advantage"], human_val, human_breakdown, parts),
+                self._factor_item("responsibility_constraints", "negative", top["responsibility_constraints"], resp_val, resp_breakdown, parts),
+                trend_item,
+            ]
 
         raw_risk = (
             top["automation_susceptibility"] * auto_val
@@ -80,30 +107,38 @@ class GSTIv1Engine:
             + trend["value"]
         )
         raw_risk = max(0.0, min(1.0, raw_risk))
-        calibrated = calibrate(raw_risk, config=self.config.calibration)
+        with timed("calibration"):
+            calibrated = calibrate(raw_risk, config=self.config.calibration)
 
         score = round(calibrated * 100, 2)
-        confidence = self._confidence(tasks, onet_features)
+        confidence = self._confidence(task_count, onet_features)
         numeric_count = sum(1 for item in onet_features.values() if item.get("value") is not None)
         degraded = allow_degraded and numeric_count < 3
 
-        summary = self._summary(score, factors, degraded, raw_risk, calibrated)
-        focus = self._suggested_focus(human_val, values)
-
-        return {
+        result = {
             "score": score,
             "confidence": confidence,
-            "breakdown": factors,
-            "summary": summary,
-            "suggested_focus": focus,
             "raw_risk": round(raw_risk, 4),
             "calibrated_risk": round(calibrated, 4),
             "numeric_feature_count": numeric_count,
-            "task_count": len(tasks),
+            "task_count": task_count,
             "semantic_features": semantic,
         }
-
-    def _compose_subfactors(self, subfactors: dict[str, tuple[float | None, float, dict]]) -> tuple[float, list[dict]]:
+        if BREAKDOWN in parts:
+            result["breakdown"] = factors
+        if SUMMARY in parts:
+            result["summary"] = self._summary(score, factors, degraded, raw_risk, calibrated)
+        if SUGGESTED_FOCUS in parts:
+            result["suggested_focus"] = self._suggested_focus(human_val, values)
+        return result
+
+    def _compose_subfactors(
+        self,
+        subfactors: dict[str, tuple[float | None, float, dict]],
+        detailed: bool = True,
+        explain: bool = True,
+    ) -> tuple[float, list[dict]]:
+        """Weighted value of the available subfactors; the breakdown is empty unless ``detailed``."""
         available = {k: (v, w, src) for k, (v, w, src) in subfactors.items() if v is not None}
         total_weight = sum(w for _, w, _ in available.values()) or 1.0
         breakdown = []
@@ -111,33 +146,38 @@ class GSTIv1Engine:
         for name, (sub_value, sub_weight, source_meta) in available.items():
             norm_weight = sub_weight / total_weight
             value += sub_value * norm_weight
-            breakdown.append(
-                {
-                    "name": name,
-                    "value": round(sub_value, 4),
-                    "weight": round(norm_weight, 4),
-                    "source": source_meta.get("source"),
-                    "raw_value": source_meta.get("raw_value"),
-                    "explanation": f"{name} contributes {norm_weight:.2f} with value {sub_value:.2f}.",
-                }
-            )
+            if not detailed:
+                continue
+            item = {
+                "name": name,
+                "value": round(sub_value, 4),
+                "weight": round(norm_weight, 4),
+                "source": source_meta.get("source"),
+                "raw_value": source_meta.get("raw_value"),
+            }
+            if explain:
+                item["explanation"] = f"{name} contributes {norm_weight:.2f} with value {sub_value:.2f}."
+            breakdown.append(item)
         return value, breakdown
 
-    def _factor_item(self, name: str, direction: str, weight: float, value: float, subfactors: list[dict]) -> dict:
+    def _factor_item(self, name: str, direction: str, weight: float, value: float, subfactors: list[dict], parts: frozenset[str] = ALL_PARTS) -> dict:
         contribution = value * weight * 100 if direction == "positive" else (1 - value) * weight * 100
-        return {
+        item = {
             "factor": name,
             "weight": weight,
             "direction": direction,
             "value": round(value, 4),
             "risk_contribution": round(contribution, 4),
-            "subfactors": subfactors,
-            "explanation": f"{name} computed from {len(subfactors)} subfactors.",
         }
+        if SUBFACTORS in parts:
+            item["subfactors"] = subfactors
+        if EXPLANATIONS in parts:
+            item["explanation"] = f"{name} computed from {len(subfactors)} subfactors."
+        return item
 
-    def _confidence(self, tasks: list[str], onet_features: dict) -> float:
+    def _confidence(self, task_count: int, onet_features: dict) -> float:
         confidence = 0.65
-        confidence += min(len(tasks) / 60.0, 0.15)
+        confidence += min(task_count / 60.0, 0.15)
 
         numeric_count = sum(1 for item in onet_features.values() if item.get("value") is not None)
         if numeric_count >= 6:
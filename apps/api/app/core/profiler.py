@@ -0,0 +1,119 @@
+"""Opt-in sampling profiler for single requests.
+
+A background thread samples the event-loop thread's stack with
+``sys._current_frames()`` and counts collapsed stacks (``a;b;c count``, the
+input format of flamegraph.pl / speedscope). Nothing runs unless a request
+asks for it. Samples cover everything on the loop thread while the request
+is in flight, so concurrent requests show up too; profile on a quiet worker
+for clean results. Work pushed to ``asyncio.to_thread`` is not sampled.
+"""
+from __future__ import annotations
+
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+
+from app.core.config import settings
+
+PROFILE_ID = re.compile(r"^[A-Za-z0-9_-]{1,128}$")
+
+
+def _frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_name}"
+
+
+def collapse(frame) -> str:
+    names = []
+    while frame is not None:
+        names.append(_frame_name(frame))
+        frame = frame.f_back
+    return ";".join(reversed(names))
+
+
+class SamplingProfiler:
+    def __init__(self, thread_id: int, interval_s: float) -> None:
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[collapse(frame)] += 1
+            time.sleep(self.interval_s)
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+def _profile_path(profile_id: str) -> Path | None:
+    if not PROFILE_ID.match(profile_id):
+        return None
+    return Path(settings.profile_dir) / f"{profile_id}.collapsed"
+
+
+def save_profile(profile_id: str, stacks: Counter[str]) -> bool:
+    """Write collapsed stacks, keeping at most ``profile_max_files`` profiles."""
+    path = _profile_path(profile_id)
+    if path is None:
+        return False
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text("".join(f"{stack} {count}\n" for stack, count in stacks.most_common()), encoding="utf-8")
+    profiles = sorted(path.parent.glob("*.collapsed"), key=lambda p: p.stat().st_mtime)
+    for old in profiles[: max(len(profiles) - settings.profile_max_files, 0)]:
+        old.unlink(missing_ok=True)
+    return True
+
+
+def load_profile(profile_id: str) -> str | None:
+    path = _profile_path(profile_id)
+    if path is None or not path.exists():
+        return None
+    return path.read_text(encoding="utf-8")
+
+
+def to_speedscope(collapsed: str, name: str) -> dict:
+    """Convert collapsed stacks to a speedscope "sampled" profile."""
+    frames: list[dict] = []
+    index: dict[str, int] = {}
+    samples: list[list[int]] = []
+    weights: list[int] = []
+    for line in collapsed.splitlines():
+        stack, _, count = line.rpartition(" ")
+        sample = []
+        for frame in stack.split(";"):
+            if frame not in index:
+                index[frame] = len(frames)
+                frames.append({"name": frame})
+            sample.append(index[frame])
+        samples.append(sample)
+        weights.append(int(count))
+    return {
+        "$schema": "https://www.speedscope.app/file-format-schema.json",
+        "shared": {"frames": frames},
+        "profiles": [
+            {
+                "type": "sampled",
+                "name": name,
+                "unit": "none",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }
+        ],
+        "name": name,
+        "exporter": "jobshield",
+    }
@@ -0,0 +1,229 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Awaitable, Callable
+from typing import TypeVar
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class UpstreamUnavailable(Exception):
+    """Raised without calling the upstream: its circuit is open or its bulkhead is full."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    pass
+
+
+class BulkheadFullError(UpstreamUnavailable):
+    pass
+
+
+class CircuitBreaker:
+    """Closed → open after ``failure_threshold`` consecutive failures.
+
+    While open every call fails fast; after ``reset_timeout_s`` up to
+    ``half_open_max_calls`` trial calls are let through (half-open). A trial
+    success closes the circuit, a trial failure re-opens it. Thread-safe so
+    the blocking semantic-feature path can share it.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout_s: float, half_open_max_calls: int = 1) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.half_open_max_calls = half_open_max_calls
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trials = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout_s:
+                self.state = "half_open"
+                self._trials = 0
+            if self.state == "closed":
+                return True
+            if self.state == "half_open" and self._trials < self.half_open_max_calls:
+                self._trials += 1
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def cancel_trial(self) -> None:
+        """Give back a half-open trial slot whose call never reached the upstream."""
+        with self._lock:
+            if self.state == "half_open" and self._trials > 0:
+                self._trials -= 1
+
+    def reset(self) -> None:
+        self.record_success()
+
+
+def is_upstream_failure(exc: BaseException) -> bool:
+    """Errors that say the upstream is unhealthy: transport errors, 5xx and 429.
+
+    Other 4xx responses (e.g. an unknown occupation code) are the caller's
+    problem and must not trip the breaker.
+    """
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status is None or status >= 500 or status == 429
+
+
+class Bulkhead:
+    """Caps concurrent calls; callers queue at most ``queue_timeout_s`` for a slot."""
+
+    def __init__(self, max_concurrent: int, queue_timeout_s: float) -> None:
+        self.max_concurrent = max_concurrent
+        self.queue_timeout_s = queue_timeout_s
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.rejected = 0
+
+    async def __aenter__(self) -> "Bulkhead":
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self.queue_timeout_s)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise BulkheadFullError(f"no free slot within {self.queue_timeout_s}s") from None
+        self.in_flight += 1
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+
+class Upstream:
+    """Circuit breaker + bulkhead (+ optional hedging) around one external service."""
+
+    def __init__(self, name: str, breaker: CircuitBreaker, bulkhead: Bulkhead, hedge_delay_s: float = 0.0) -> None:
+        self.name = name
+        self.breaker = breaker
+        self.bulkhead = bulkhead
+        self.hedge_delay_s = hedge_delay_s
+        self.hedged = 0
+
+    async def call(self, fn: Callable[[], Awaitable[T]], hedge: bool = True) -> T:
+        """Run ``fn`` unless the circuit is open; outcomes feed the breaker.
+
+        With ``hedge`` and a ``hedge_delay_s``, a second identical call starts
+        if the first has not finished in time and the first result wins. Only
+        use it for idempotent requests.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            async with self.bulkhead:
+                if hedge and self.hedge_delay_s > 0:
+                    result = await self._hedged(fn)
+                else:
+                    result = await fn()
+        except (BulkheadFullError, asyncio.CancelledError):
+            self.breaker.cancel_trial()
+            raise
+        except Exception as e:
+            if not is_upstream_failure(e):
+                self.breaker.record_success()
+                raise
+            self.record_failure()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def call_blocking(self, fn: Callable[[], T], neutral: Callable[[BaseException], bool] | None = None) -> T:
+        """Synchronous :meth:`call` for worker threads: breaker only, no bulkhead or hedging.
+
+        Errors for which ``neutral`` is true (e.g. a timeout the caller imposed)
+        count neither way; a half-open trial slot is given back.
+        """
+        if not self.breaker.allow():
+            raise CircuitOpenError(f"{self.name} circuit is open")
+        try:
+            result = fn()
+        except Exception as e:
+            if neutral is not None and neutral(e):
+                self.breaker.cancel_trial()
+            elif is_upstream_failure(e):
+                self.record_failure()
+            else:
+                self.breaker.record_success()
+            raise
+        except BaseException:
+            self.breaker.cancel_trial()
+            raise
+        self.breaker.record_success()
+        return result
+
+    def record_failure(self) -> None:
+        was_open = self.breaker.state == "open"
+        self.breaker.record_failure()
+        if self.breaker.state == "open" and not was_open:
+            logger.warning("Circuit for %s opened", self.name, extra={"request_id": "system"})
+
+    async def _hedged(self, fn: Callable[[], Awaitable[T]]) -> T:
+        first = asyncio.ensure_future(fn())
+        done, _ = await asyncio.wait({first}, timeout=self.hedge_delay_s)
+        if done:
+            return first.result()
+        self.hedged += 1
+        pending = {first, asyncio.ensure_future(fn())}
+        error: BaseException | None = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def snapshot(self) -> dict:
+        retry_in = None
+        if self.breaker.state == "open":
+            retry_in = max(self.breaker.reset_timeout_s - (time.monotonic() - self.breaker.opened_at), 0.0)
+        return {
+            "name": self.name,
+            "state": self.breaker.state,
+            "consecutive_failures": self.breaker.failures,
+            "retry_in_s": retry_in,
+            "in_flight": self.bulkhead.in_flight,
+            "max_concurrent": self.bulkhead.max_concurrent,
+            "rejected": self.bulkhead.rejected,
+            "hedged": self.hedged,
+        }
+
+
+def _upstream(name: str) -> Upstream:
+    return Upstream(
+        name,
+        CircuitBreaker(settings.upstream_failure_threshold, settings.upstream_reset_timeout_s, settings.upstream_half_open_max_calls),
+        Bulkhead(settings.upstream_max_concurrency.get(name, 8), settings.upstream_queue_timeout_s),
+        hedge_delay_s=settings.upstream_hedge_delay_ms.get(name, 0) / 1000,
+    )
+
+
+UPSTREAMS: dict[str, Upstream] = {name: _upstream(name) for name in ("onet", "embeddings")}
+onet_upstream = UPSTREAMS["onet"]
+embeddings_upstream = UPSTREAMS["embeddings"]
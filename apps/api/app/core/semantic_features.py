@@ -1,11 +1,16 @@
 from __future__ import annotations
 
 import math
+import threading
+import time
 from statistics import mean
-
-from openai import OpenAI
+from typing import TYPE_CHECKING
 
 from app.core.config import settings
+from app.core.resilience import embeddings_upstream
+
+if TYPE_CHECKING:
+    from openai import OpenAI
 
 
 AUTOMATION_ANCHOR = (
@@ -18,6 +23,60 @@ HUMAN_ANCHOR = (
 )
 
 
+_client: "OpenAI | None" = None
+_client_lock = threading.Lock()
+# model -> (automation anchor, human anchor); the anchors are constants, so
+# they are embedded once per process instead of on every evaluation.
+_anchors: dict[str, tuple[list[float], list[float]]] = {}
+
+
+def _sync_client() -> "OpenAI":
+    # The SDK is imported on first use so CLIs and tests that never embed skip it.
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from openai import OpenAI
+
+                _client = OpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url or None)
+    return _client
+
+
+def _anchor_vectors(client: "OpenAI", model: str) -> tuple[list[float], list[float]]:
+    anchors = _anchors.get(model)
+    if anchors is None:
+        resp = client.embeddings.create(model=model, input=[AUTOMATION_ANCHOR, HUMAN_ANCHOR])
+        anchors = _anchors[model] = (resp.data[0].embedding, resp.data[1].embedding)
+    return anchors
+
+
+class BudgetExhausted(Exception):
+    """The caller's deadline passed before the next provider call could start."""
+
+
+def _is_timeout(exc: BaseException) -> bool:
+    from openai import APITimeoutError
+
+    return isinstance(exc, (BudgetExhausted, APITimeoutError))
+
+
+def warm_anchor_vectors(model: str | None = None, timeout: float | None = None) -> bool:
+    """Embed the anchors ahead of the first evaluation; False when the provider is unavailable.
+
+    With ``timeout`` the provider gets a single attempt bounded by it.
+    """
+    if not settings.openai_api_key:
+        return False
+    client = _sync_client()
+    if timeout is not None:
+        client = client.with_options(timeout=timeout, max_retries=0)
+    try:
+        embeddings_upstream.call_blocking(lambda: _anchor_vectors(client, model or settings.embedding_model))
+    except Exception:
+        return False
+    return True
+
+
 def _cosine(a: list[float], b: list[float]) -> float:
     dot = sum(x * y for x, y in zip(a, b))
     norm_a = math.sqrt(sum(x * x for x in a))
@@ -31,23 +90,37 @@ def _to_01(sim: float) -> float:
     return max(0.0, min(1.0, (sim + 1.0) / 2.0))
 
 
-def extract_semantic_features(tasks: list[str], model: str | None = None) -> dict | None:
+def extract_semantic_features(tasks: list[str], model: str | None = None, timeout: float | None = None) -> dict | None:
     if not tasks or len(tasks) < 2:
         return None
     if not settings.openai_api_key:
         return None
 
     embed_model = model or settings.embedding_model
-    client = OpenAI(api_key=settings.openai_api_key)
-
+    # Under a latency budget the calls share one deadline (a cold anchor cache
+    # means two of them); each is a single attempt bounded by the time left.
+    client = _sync_client()
+    deadline = time.monotonic() + timeout if timeout is not None else None
+
+    def bounded():
+        if deadline is None:
+            return client
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise BudgetExhausted()
+        return client.with_options(timeout=remaining, max_retries=0)
+
+    def fetch():
+        anchors = _anchor_vectors(bounded(), embed_model)
+        return anchors, bounded().embeddings.create(model=embed_model, input=tasks)
+
+    # Runs in a worker thread, so it shares only the breaker, not the async bulkhead.
+    # A timeout imposed by the caller's budget says nothing about provider health.
     try:
-        anchor_resp = client.embeddings.create(model=embed_model, input=[AUTOMATION_ANCHOR, HUMAN_ANCHOR])
-        task_resp = client.embeddings.create(model=embed_model, input=tasks)
+        (auto_emb, human_emb), task_resp = embeddings_upstream.call_blocking(fetch, neutral=_is_timeout if timeout is not None else None)
     except Exception:
         return None
 
-    auto_emb = anchor_resp.data[0].embedding
-    human_emb = anchor_resp.data[1].embedding
     task_embs = [row.embedding for row in task_resp.data]
 
     auto_sims = [_cosine(emb, auto_emb) for emb in task_embs]
@@ -1,18 +1,56 @@
+import asyncio
 import logging
+import threading
+import time
 import uuid
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 
 from app.api.routes import router
 from app.core.config import settings
 from app.core.logging import setup_logging
+from app.core.metrics import http_seconds, server_timing, start_request_timings
+from app.core.profiler import PROFILE_ID, SamplingProfiler, save_profile
+from app.db.session import SessionLocal
+from app.services.embeddings import close_embedding_client, watch_serving_model
+from app.services.experiments import assignment_writer
+from app.services.onet import onet_client
+from app.services.vector_index import tool_index
+from app.services.warmup import warm_up
 
 setup_logging()
 logger = logging.getLogger(__name__)
 
-app = FastAPI(title="JobShield API", version="0.1.0")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.rag_backend == "memory" and not tool_index.load():
+        async with SessionLocal() as db:
+            await tool_index.build_from_db(db)
+    await assignment_writer.start()
+    # Serve /health at once; /ready flips when the caches and pools are warm.
+    warmup_task = asyncio.create_task(warm_up())
+    model_watch = asyncio.create_task(watch_serving_model())
+    yield
+    model_watch.cancel()
+    await asyncio.gather(model_watch, return_exceptions=True)
+    warmup_task.cancel()
+    try:
+        await warmup_task
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        logger.exception("Warm-up failed", extra={"request_id": "system"})
+    await assignment_writer.stop()
+    await close_embedding_client()
+    await onet_client.aclose()
+
+
+app = FastAPI(title="JobShield API", version="0.1.0", lifespan=lifespan, default_response_class=ORJSONResponse)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=[settings.web_origin, "http://localhost:3000", "http://127.0.0.1:3000"],
@@ -22,12 +60,34 @@ app.add_middleware(
 )
 
 
+def _profile_requested(request: Request, request_id: str) -> bool:
+    return (
+        request.headers.get("x-profile") == "1"
+        and request.headers.get("x-admin-key") == settings.admin_api_key
+        and PROFILE_ID.match(request_id) is not None
+    )
+
+
 @app.middleware("http")
 async def request_id_middleware(request: Request, call_next):
     request_id = request.headers.get("x-request-id", str(uuid.uuid4()))
     request.state.request_id = request_id
-    response = await call_next(request)
+    timings = start_request_timings()
+    started = time.perf_counter()
+    if _profile_requested(request, request_id):
+        profiler = SamplingProfiler(threading.get_ident(), settings.profile_interval_ms / 1000).start()
+        try:
+            response = await call_next(request)
+        finally:
+            save_profile(request_id, profiler.stop())
+        response.headers["x-profile-id"] = request_id
+    else:
+        response = await call_next(request)
+    elapsed = time.perf_counter() - started
+    route = request.scope.get("route")
+    http_seconds.observe(elapsed, request.method, getattr(route, "path", "unmatched"), str(response.status_code))
     response.headers["x-request-id"] = request_id
+    response.headers["server-timing"] = server_timing({**timings, "total": elapsed})
     return response
 
 
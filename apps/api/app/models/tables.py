@@ -1,7 +1,8 @@
 from datetime import datetime
-from sqlalchemy import DateTime, Float, ForeignKey, Integer, JSON, String, Text, func
+from sqlalchemy import ARRAY, BigInteger, DateTime, Float, ForeignKey, Integer, JSON, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import BIT, HALFVEC, Vector
 
 
 class Base(DeclarativeBase):
@@ -15,8 +16,15 @@ class Assessment(Base):
     occupation_code: Mapped[str | None] = mapped_column(String(32), nullable=True)
     occupation_title: Mapped[str | None] = mapped_column(String(256), nullable=True)
     input_payload: Mapped[dict] = mapped_column(JSON)
-    output_summary: Mapped[str] = mapped_column(Text)
+    output_summary: Mapped[str | None] = mapped_column(Text, nullable=True)
     risk_score: Mapped[float] = mapped_column(Float)
+    task_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
+    task_count: Mapped[int | None] = mapped_column(Integer, nullable=True)
+    onet_feature_values: Mapped[list[float | None] | None] = mapped_column(ARRAY(Float), nullable=True)
+    semantic_automation_density: Mapped[float | None] = mapped_column(Float, nullable=True)
+    semantic_human_density: Mapped[float | None] = mapped_column(Float, nullable=True)
+    semantic_model: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    trend_triggers: Mapped[list | None] = mapped_column(JSON, nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
 
 
@@ -36,7 +44,7 @@ class ToolCatalog(Base):
     name: Mapped[str] = mapped_column(String(256), index=True)
     description: Mapped[str] = mapped_column(Text)
     url: Mapped[str] = mapped_column(String(512))
-    tags: Mapped[list] = mapped_column(JSON, default=list)
+    tags: Mapped[list] = mapped_column(JSONB, default=list)
     source: Mapped[str] = mapped_column(String(64), default="apify")
     raw_payload: Mapped[dict] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
@@ -48,10 +56,38 @@ class ToolEmbedding(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     tool_id: Mapped[int] = mapped_column(ForeignKey("tools_catalog.id", ondelete="CASCADE"), unique=True)
     embedding: Mapped[list[float]] = mapped_column(Vector(1536))
+    # Filled by the trg_quantize_tool_embedding trigger.
+    embedding_half: Mapped[list[float] | None] = mapped_column(HALFVEC(1536), nullable=True)
+    embedding_bits: Mapped[str | None] = mapped_column(BIT(1536), nullable=True)
+    # Copied from tools_catalog by trigger so per-source partial indexes apply.
+    source: Mapped[str | None] = mapped_column(String(64), nullable=True)
     model: Mapped[str] = mapped_column(String(128))
+    content_hash: Mapped[str | None] = mapped_column(String(64), nullable=True)
     updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
 
 
+class ToolEmbeddingShadow(Base):
+    __tablename__ = "tool_embeddings_shadow"
+    tool_id: Mapped[int] = mapped_column(ForeignKey("tools_catalog.id", ondelete="CASCADE"), primary_key=True)
+    embedding: Mapped[list[float]] = mapped_column(Vector(1536))
+    model: Mapped[str] = mapped_column(String(128))
+    content_hash: Mapped[str] = mapped_column(String(64))
+    catalog_updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+
+
+class ReembedRun(Base):
+    __tablename__ = "reembed_runs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    model: Mapped[str] = mapped_column(String(128))
+    status: Mapped[str] = mapped_column(Text, default="running")
+    last_tool_id: Mapped[int] = mapped_column(Integer, default=0)
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
 class OnetCache(Base):
     __tablename__ = "onet_cache"
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -101,3 +137,58 @@ class ExperimentRun(Base):
     variant: Mapped[str] = mapped_column(Text)
     output: Mapped[dict] = mapped_column(JSON)
     created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+
+class ExperimentRunCounter(Base):
+    __tablename__ = "experiment_run_counters"
+    experiment_id: Mapped[int] = mapped_column(ForeignKey("experiments.id", ondelete="CASCADE"), primary_key=True)
+    variant: Mapped[str] = mapped_column(Text, primary_key=True)
+    run_count: Mapped[int] = mapped_column(Integer, default=0)
+    last_run_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class ReplayJob(Base):
+    __tablename__ = "replay_jobs"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    experiment_id: Mapped[int | None] = mapped_column(ForeignKey("experiments.id", ondelete="SET NULL"), nullable=True)
+    model_version: Mapped[str] = mapped_column(Text)
+    params: Mapped[dict] = mapped_column(JSON)
+    filters: Mapped[dict] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(Text, default="pending")
+    processed: Mapped[int] = mapped_column(Integer, default=0)
+    summary: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    started_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    job_type: Mapped[str] = mapped_column(Text)
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(Text, default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, default=5)
+    run_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    locked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+    locked_by: Mapped[str | None] = mapped_column(Text, nullable=True)
+    dedupe_key: Mapped[str | None] = mapped_column(Text, nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+    result: Mapped[dict | None] = mapped_column(JSON, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), server_default=func.now())
+    finished_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True), nullable=True)
+
+
+class ReplayResult(Base):
+    __tablename__ = "replay_results"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey("replay_jobs.id", ondelete="CASCADE"))
+    assessment_id: Mapped[int] = mapped_column(ForeignKey("assessments.id", ondelete="CASCADE"))
+    baseline_score: Mapped[float] = mapped_column(Float)
+    replay_score: Mapped[float] = mapped_column(Float)
+    delta: Mapped[float] = mapped_column(Float)
+    baseline_bucket: Mapped[str] = mapped_column(Text)
+    replay_bucket: Mapped[str] = mapped_column(Text)
+    model_version: Mapped[str | None] = mapped_column(Text, nullable=True)
@@ -62,6 +62,16 @@ class ExperimentAssignResponse(BaseModel):
     variant: str
 
 
+class ExperimentBulkAssignRequest(BaseModel):
+    experiment_name: str
+    user_keys: list[str] = Field(min_length=1, max_length=10000)
+
+
+class ExperimentBulkAssignResponse(BaseModel):
+    experiment_id: int
+    assignments: dict[str, str]
+
+
 class ExperimentMetricsResponse(BaseModel):
     experiment_id: int
     sample_count: int
@@ -73,3 +83,65 @@ class ExperimentMetricsResponse(BaseModel):
 class CompareResponse(BaseModel):
     assessment_id: int
     outputs: dict
+
+
+class ReplayFilters(BaseModel):
+    created_from: datetime | None = None
+    created_to: datetime | None = None
+    occupation_codes: list[str] | None = None
+    limit: int | None = Field(default=None, ge=1)
+
+
+class ReplayCreateRequest(BaseModel):
+    experiment_id: int | None = None
+    params: dict | None = None
+    model_version: str | None = None
+    filters: ReplayFilters = Field(default_factory=ReplayFilters)
+
+
+class ReplayJobResponse(BaseModel):
+    id: int
+    experiment_id: int | None
+    model_version: str
+    params: dict
+    filters: dict
+    status: str
+    processed: int
+    summary: dict | None
+    error: str | None
+    created_at: datetime
+    started_at: datetime | None
+    finished_at: datetime | None
+
+
+class JobResponse(BaseModel):
+    id: int
+    job_type: str
+    payload: dict
+    status: str
+    attempts: int
+    max_attempts: int
+    run_at: datetime
+    locked_by: str | None
+    last_error: str | None
+    result: dict | None
+    created_at: datetime
+    finished_at: datetime | None
+
+
+class UpstreamStateItem(BaseModel):
+    name: str
+    state: str
+    consecutive_failures: int
+    retry_in_s: float | None
+    in_flight: int
+    max_concurrent: int
+    rejected: int
+    hedged: int
+
+
+class JobStatsItem(BaseModel):
+    job_type: str
+    status: str
+    count: int
+    oldest_run_at: datetime | None
@@ -1,3 +1,5 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
 
@@ -10,6 +12,8 @@ class RagSearchRequest(BaseModel):
     query: str
     top_k: int = Field(default=8, ge=1, le=20)
     filters: RagFilters | None = None
+    mode: Literal["vector", "lexical", "hybrid"] = "vector"
+    ef_search: int | None = Field(default=None, ge=10, le=1000)
 
 
 class RagResult(BaseModel):
@@ -23,3 +27,25 @@ class RagResult(BaseModel):
 
 class RagSearchResponse(BaseModel):
     results: list[RagResult]
+
+
+class RagBatchQuery(BaseModel):
+    query: str
+    top_k: int = Field(default=8, ge=1, le=20)
+    filters: RagFilters | None = None
+
+
+class RagBatchSearchRequest(BaseModel):
+    queries: list[RagBatchQuery] = Field(min_length=1, max_length=50)
+    filters: RagFilters | None = None
+    dedupe: bool = False
+    ef_search: int | None = Field(default=None, ge=10, le=1000)
+
+
+class RagBatchResult(BaseModel):
+    query: str
+    results: list[RagResult]
+
+
+class RagBatchSearchResponse(BaseModel):
+    results: list[RagBatchResult]
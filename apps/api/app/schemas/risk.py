@@ -1,4 +1,6 @@
-from pydantic import BaseModel, Field
+from typing import Literal
+
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
 
 
 class UserInputs(BaseModel):
@@ -18,6 +20,18 @@ class RiskEvaluateRequest(BaseModel):
     experiment_id: int | None = None
     variant: str | None = None
     user_key: str | None = None
+    detail: Literal["minimal", "standard", "full"] = "full"
+    fields: list[str] | None = None
+
+    @field_validator("fields")
+    @classmethod
+    def _known_fields(cls, value: list[str] | None) -> list[str] | None:
+        if value is None:
+            return value
+        unknown = set(value) - set(RiskEvaluateResponse.model_fields)
+        if unknown:
+            raise ValueError(f"unknown fields: {', '.join(sorted(unknown))}")
+        return value
 
 
 class RiskSubfactorItem(BaseModel):
@@ -36,7 +50,7 @@ class RiskBreakdownItem(BaseModel):
     factor: str
     weight: float
     value: float
-    explanation: str
+    explanation: str | None = None
     direction: str | None = None
     risk_contribution: float | None = None
     subfactors: list[RiskSubfactorItem] | None = None
@@ -46,8 +60,12 @@ class RiskEvaluateResponse(BaseModel):
     score: float
     confidence: float | None = None
     model_version: str | None = None
-    breakdown: list[RiskBreakdownItem]
-    summary: str
-    suggested_focus: list[str]
+    breakdown: list[RiskBreakdownItem] | None = None
+    summary: str | None = None
+    suggested_focus: list[str] | None = None
     assessment_id: int | None = None
     experiment: dict | None = None
+    skipped_stages: list[str] = Field(default_factory=list)
+
+
+RISK_EVALUATE_ADAPTER = TypeAdapter(RiskEvaluateResponse)
@@ -0,0 +1,191 @@
+import asyncio
+import hashlib
+import logging
+import re
+from typing import TYPE_CHECKING
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import record_cache
+from app.core.resilience import embeddings_upstream
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
+logger = logging.getLogger(__name__)
+
+# The re-embedding swap NOTIFYs this channel with the new model in its transaction.
+SERVING_MODEL_CHANNEL = "embedding_serving_model"
+
+_client: "AsyncOpenAI | None" = None
+query_cache = TTLCache(maxsize=settings.embedding_cache_size, ttl_s=settings.embedding_cache_ttl_s)
+_serving_model = TTLCache(maxsize=1, ttl_s=settings.embedding_model_refresh_s)
+
+
+def init_embedding_client() -> "AsyncOpenAI | None":
+    global _client
+    if _client is None and settings.openai_api_key:
+        # Imported here so processes that never embed do not load the SDK.
+        from openai import AsyncOpenAI
+
+        _client = AsyncOpenAI(api_key=settings.openai_api_key, base_url=settings.openai_base_url or None, timeout=settings.request_timeout_s)
+    return _client
+
+
+async def close_embedding_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
+
+
+def get_embedding_client() -> "AsyncOpenAI":
+    if not settings.openai_api_key:
+        raise ValueError("OPENAI_API_KEY is required for embeddings")
+    return init_embedding_client()
+
+
+def normalize_query(query: str) -> str:
+    return re.sub(r"\s+", " ", query).strip().lower()
+
+
+def _cache_key(model: str, normalized: str) -> str:
+    return hashlib.sha256(f"{model}:{normalized}".encode("utf-8")).hexdigest()
+
+
+async def embed_texts(texts: list[str], model: str | None = None) -> list[list[float]]:
+    client = get_embedding_client()
+    result = await embeddings_upstream.call(
+        lambda: client.embeddings.create(model=model or settings.embedding_model, input=texts), hedge=len(texts) <= 16
+    )
+    return [row.embedding for row in sorted(result.data, key=lambda r: r.index)]
+
+
+async def _shared_get(db: AsyncSession, keys: list[str]) -> dict[str, list[float]]:
+    rows = (
+        await db.execute(
+            text(
+                """
+                SELECT cache_key, embedding::text AS embedding FROM query_embedding_cache
+                WHERE cache_key = ANY(:keys) AND created_at > now() - make_interval(secs => :ttl)
+                """
+            ),
+            {"keys": keys, "ttl": settings.embedding_cache_ttl_s},
+        )
+    ).all()
+    return {key: [float(v) for v in value.strip("[]").split(",")] for key, value in rows}
+
+
+async def _shared_set(db: AsyncSession, model: str, embeddings: dict[str, list[float]]) -> None:
+    await db.execute(
+        text(
+            """
+            INSERT INTO query_embedding_cache (cache_key, model, embedding)
+            VALUES (:key, :model, CAST(:embedding AS vector))
+            ON CONFLICT (cache_key) DO UPDATE SET embedding = EXCLUDED.embedding, created_at = now()
+            """
+        ),
+        [{"key": key, "model": model, "embedding": str(embedding)} for key, embedding in embeddings.items()],
+    )
+    await db.commit()
+
+
+async def serving_model(db: AsyncSession | None = None) -> str:
+    """Model of the vectors search currently serves (``embedding_state``).
+
+    Differs from ``settings.embedding_model`` while a re-embedding run is
+    staging the new model; queries and incremental ingest must keep using the
+    serving model until the swap.
+    """
+    model = _serving_model.get("model")
+    if model is not None:
+        return model
+    if db is None:
+        return settings.embedding_model
+    model = (await db.execute(text("SELECT serving_model FROM embedding_state"))).scalar_one_or_none() or settings.embedding_model
+    _serving_model.set("model", model)
+    return model
+
+
+def invalidate_serving_model() -> None:
+    _serving_model.invalidate()
+
+
+def _on_serving_model_notify(connection, pid: int, channel: str, payload: str) -> None:
+    _serving_model.set("model", payload)
+    logger.info("Serving embedding model is now %s", payload, extra={"request_id": "system"})
+
+
+async def watch_serving_model() -> None:
+    """Apply serving-model swaps in this process as soon as they commit.
+
+    LISTENs on :data:`SERVING_MODEL_CHANNEL` over a dedicated connection and
+    reconnects when it drops; the ``embedding_model_refresh_s`` TTL remains
+    the fallback for notifications missed while disconnected.
+    """
+    import asyncpg
+
+    dsn = make_url(settings.database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+    while True:
+        try:
+            connection = await asyncpg.connect(dsn)
+            try:
+                lost = asyncio.Event()
+                connection.add_termination_listener(lambda _: lost.set())
+                await connection.add_listener(SERVING_MODEL_CHANNEL, _on_serving_model_notify)
+                # A swap may have committed while no listener was connected.
+                invalidate_serving_model()
+                await lost.wait()
+            finally:
+                await connection.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Serving model listener failed: %s", e, extra={"request_id": "system"})
+        await asyncio.sleep(settings.embedding_model_refresh_s)
+
+
+async def embed_queries(queries: list[str], db: AsyncSession | None = None, model: str | None = None) -> list[list[float]]:
+    """Embed search queries, served from the normalized-query cache when possible.
+
+    Lookups go to the in-process LRU first, then (when ``embedding_cache_shared``
+    is on and a session is given) to the Postgres cache shared by all workers.
+    Remaining queries are embedded together in a single provider call.
+    """
+    model = model or await serving_model(db)
+    normalized = [normalize_query(q) for q in queries]
+    keys = [_cache_key(model, n) for n in normalized]
+    found: dict[str, list[float]] = {}
+    for key in keys:
+        cached = query_cache.get(key)
+        record_cache("embedding_query", cached is not None)
+        if cached is not None:
+            found[key] = cached
+
+    shared = settings.embedding_cache_shared and db is not None
+    missing = [k for k in dict.fromkeys(keys) if k not in found]
+    if shared and missing:
+        for key, embedding in (await _shared_get(db, missing)).items():
+            query_cache.set(key, embedding)
+            found[key] = embedding
+        for key in missing:
+            record_cache("embedding_query_shared", key in found)
+        missing = [k for k in missing if k not in found]
+
+    if missing:
+        text_by_key = dict(zip(keys, normalized))
+        embedded = dict(zip(missing, await embed_texts([text_by_key[k] for k in missing], model=model)))
+        for key, embedding in embedded.items():
+            query_cache.set(key, embedding)
+        found.update(embedded)
+        if shared:
+            await _shared_set(db, model, embedded)
+    return [found[key] for key in keys]
+
+
+async def embed_query(query: str, db: AsyncSession | None = None, model: str | None = None) -> list[float]:
+    return (await embed_queries([query], db=db, model=model))[0]
@@ -0,0 +1,177 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.budget import LatencyBudget
+from app.core.detail import project_fields, resolve_parts
+from app.core.gsti_router import GSTIRouter, router_for
+from app.core.metrics import timed
+from app.core.resilience import UpstreamUnavailable
+from app.models.tables import Assessment, Experiment, ExperimentRun
+from app.schemas.risk import RiskEvaluateRequest
+from app.services.jobs import enqueue_unique
+from app.services.onet import cache_detail_stmt, cached_detail, onet_client
+
+
+def _context(body: RiskEvaluateRequest, budget: LatencyBudget) -> dict:
+    return {
+        "industry": body.user_inputs.industry,
+        "region": body.user_inputs.region,
+        "selected_tools": body.user_inputs.selected_tools,
+        "occupation_code": body.occupation_code,
+        "occupation_title": body.occupation_title,
+        "skipped_stages": budget.skipped,
+    }
+
+
+async def _budgeted_get(budget: LatencyBudget, stage: str, path: str) -> dict | None:
+    """O*NET GET that is skipped when the budget runs short or the circuit is open,
+    and abandoned when it outruns the budget."""
+    if not budget.allows(stage):
+        budget.skip(stage)
+        return None
+    try:
+        with timed(stage):
+            return await asyncio.wait_for(onet_client.get(path), budget.timeout_s())
+    except asyncio.TimeoutError:
+        budget.skip(stage)
+        return None
+    except UpstreamUnavailable:
+        budget.skip(stage, for_budget=False)
+        return None
+
+
+async def fetch_summary_tasks(code: str, budget: LatencyBudget) -> tuple[list[str], dict | None]:
+    """Task statements from the O*NET summary; ``([], None)`` when the fetch fails or is skipped."""
+    try:
+        payload = await _budgeted_get(budget, "onet_summary", f"online/occupations/{code}/summary")
+    except Exception:
+        return [], None
+    if payload is None:
+        return [], None
+    return [t.get("task", "") for t in payload.get("task_statements", []) if t.get("task")], payload
+
+
+async def fetch_detail(db: AsyncSession, code: str, budget: LatencyBudget) -> tuple[dict | None, bool]:
+    """``(detail, fresh)``: cached detail first, then O*NET; ``(None, False)`` on failure or skip."""
+    detail = await cached_detail(db, code)
+    if detail is not None:
+        return detail, False
+    try:
+        detail = await _budgeted_get(budget, "onet_detail", f"online/occupations/{code}")
+    except Exception:
+        return None, False
+    return detail, detail is not None
+
+
+def _estimate(gsti_router: GSTIRouter, tasks: list[str], source: str) -> dict:
+    result = gsti_router.v0.calculate_risk(tasks, parts=frozenset())
+    return {"model_version": "v0", "score": result["score"], "confidence": result["confidence"], "source": source}
+
+
+async def evaluation_events(
+    db: AsyncSession,
+    body: RiskEvaluateRequest,
+    exp: Experiment | None = None,
+    progress: bool = True,
+    budget: LatencyBudget | None = None,
+) -> AsyncIterator[tuple[str, dict]]:
+    """Run one risk evaluation, yielding ``(event, data)`` as each stage lands.
+
+    With ``progress`` the stream opens with a v0 keyword ``estimate`` (from the
+    user's task preferences, then again from O*NET task statements) and reports
+    ``onet`` and ``features`` stages; the last event is always ``result`` with
+    the persisted, projected output. Without it only ``result`` is yielded.
+
+    Optional stages (O*NET summary, fresh O*NET detail, semantic features, v1
+    under ``auto``) are dropped when the latency ``budget`` runs short; they
+    are reported in ``skipped_stages``.
+    """
+    budget = budget or LatencyBudget(None)
+    gsti_router = router_for(exp.params if exp else None)
+    model_version = exp.model_version if exp else body.model_version
+    variant = body.variant or "A"
+    preference_tasks = body.user_inputs.tasks_preference
+
+    if progress and preference_tasks:
+        yield "estimate", _estimate(gsti_router, preference_tasks, "user_inputs")
+
+    tasks: list[str] = []
+    onet_payload: dict = {}
+    fresh_detail = None
+    detail_failed = False
+    if body.occupation_code:
+        summary_task = asyncio.create_task(fetch_summary_tasks(body.occupation_code, budget))
+        try:
+            detail_payload, fresh = await fetch_detail(db, body.occupation_code, budget)
+        finally:
+            tasks, summary_payload = await summary_task
+        if summary_payload is not None:
+            onet_payload["summary"] = summary_payload
+        if detail_payload is not None:
+            onet_payload["detail"] = detail_payload
+            fresh_detail = detail_payload if fresh else None
+        else:
+            detail_failed = True
+        if progress:
+            yield "onet", {"task_count": len(tasks), "summary": summary_payload is not None, "detail": detail_payload is not None, "detail_cached": detail_payload is not None and not fresh}
+            if tasks:
+                yield "estimate", _estimate(gsti_router, tasks, "onet_tasks")
+
+    if not tasks:
+        tasks = preference_tasks
+
+    context = _context(body, budget)
+    # The semantic layer makes blocking provider calls; keep the event loop free.
+    with timed("features"):
+        features = await asyncio.to_thread(gsti_router.extract_features, tasks, onet_payload, model_version, context, budget)
+    if progress:
+        yield "features", {"task_count": features.task_count, "numeric_feature_count": features.numeric_count, "semantic": features.semantic_features() is not None}
+
+    result = gsti_router.evaluate(
+        tasks=tasks,
+        onet_payload=onet_payload,
+        model_version=model_version,
+        context=context,
+        features=features,
+        parts=resolve_parts(body.detail, body.fields),
+        budget=budget,
+    )
+    result["skipped_stages"] = list(budget.skipped)
+
+    assessment = Assessment(
+        session_id=body.session_id,
+        occupation_code=body.occupation_code,
+        occupation_title=body.occupation_title,
+        input_payload=body.model_dump(),
+        output_summary=result.get("summary"),
+        risk_score=result["score"],
+        **features.to_dict(),
+    )
+    db.add(assessment)
+    await db.flush()
+
+    experiment_meta = {"id": exp.id, "name": exp.name, "variant": variant} if exp else None
+    output = project_fields({**result, "assessment_id": assessment.id, "experiment": experiment_meta}, body.fields)
+    if exp:
+        db.add(ExperimentRun(experiment_id=exp.id, assessment_id=assessment.id, variant=variant, output=output))
+    if fresh_detail is not None:
+        await db.execute(cache_detail_stmt(body.occupation_code, fresh_detail))
+    elif detail_failed and "onet_detail" not in budget.cut:
+        # Warm the cache in the background so the next evaluation has the detail;
+        # one pending job per code however many evaluations miss it.
+        await enqueue_unique(db, "onet_prefetch", {"occupation_code": body.occupation_code}, dedupe_key=body.occupation_code)
+    with timed("db_commit"):
+        await db.commit()
+
+    yield "result", output
+
+
+async def evaluate(db: AsyncSession, body: RiskEvaluateRequest, exp: Experiment | None = None, budget: LatencyBudget | None = None) -> dict:
+    """Run an evaluation to completion and return the persisted output."""
+    output: dict = {}
+    async for event, data in evaluation_events(db, body, exp, progress=False, budget=budget):
+        if event == "result":
+            output = data
+    return output
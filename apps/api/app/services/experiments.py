@@ -0,0 +1,314 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy import Integer, Select, cast, exists, func, select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.tables import Experiment, ExperimentAssignment, ExperimentRun, ExperimentRunCounter, Label
+
+logger = logging.getLogger(__name__)
+
+RUN_COLUMN_FIELDS = {
+    "id": ExperimentRun.id,
+    "assessment_id": ExperimentRun.assessment_id,
+    "variant": ExperimentRun.variant,
+    "created_at": ExperimentRun.created_at,
+}
+RUN_NUMERIC_OUTPUT_FIELDS = {"score", "confidence", "raw_risk", "calibrated_risk", "numeric_feature_count", "task_count"}
+EXPERIMENT_STATS_INCLUDES = {"variants", "latest_run", "coverage"}
+DEFAULT_RUN_FIELDS = ["id", "assessment_id", "variant", "score", "confidence", "created_at", "output"]
+
+
+def encode_cursor(created_at: datetime, run_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), run_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, run_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(run_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError("Invalid cursor") from e
+
+
+def parse_run_fields(fields: str | None) -> list[str]:
+    if not fields:
+        return list(DEFAULT_RUN_FIELDS)
+    names = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip()))
+    for name in names:
+        if not name.replace("_", "").isalnum():
+            raise ValueError(f"Invalid field: {name}")
+    return names
+
+
+def build_run_projection(fields: list[str]) -> list[ColumnElement]:
+    """Map requested run fields to SQL expressions.
+
+    Table columns are selected directly; anything else is read from the
+    ``output`` JSONB with ``->>`` so the full blob is only fetched when
+    ``output`` itself is requested.
+    """
+    columns: list[ColumnElement] = []
+    for name in fields:
+        if name in RUN_COLUMN_FIELDS:
+            columns.append(RUN_COLUMN_FIELDS[name].label(name))
+        elif name == "output":
+            columns.append(ExperimentRun.output.label(name))
+        elif name in RUN_NUMERIC_OUTPUT_FIELDS:
+            columns.append(ExperimentRun.output[name].as_float().label(name))
+        else:
+            columns.append(ExperimentRun.output[name].as_string().label(name))
+    # Keyset pagination always needs the sort key, even if the caller did not ask for it.
+    for name in ("created_at", "id"):
+        if name not in fields:
+            columns.append(RUN_COLUMN_FIELDS[name].label(f"_{name}"))
+    return columns
+
+
+def keyset_before(cursor: str) -> ColumnElement:
+    created_at, run_id = decode_cursor(cursor)
+    return tuple_(ExperimentRun.created_at, ExperimentRun.id) < tuple_(created_at, run_id)
+
+
+def project_run_row(row, fields: list[str]) -> dict:
+    return {name: row[name] for name in fields}
+
+
+def row_sort_key(row) -> tuple[datetime, int]:
+    created_at = row["created_at"] if "created_at" in row else row["_created_at"]
+    run_id = row["id"] if "id" in row else row["_id"]
+    return created_at, run_id
+
+
+def parse_stats_includes(include: str | None) -> set[str]:
+    names = {i.strip() for i in (include or "").split(",") if i.strip()}
+    unknown = names - EXPERIMENT_STATS_INCLUDES
+    if unknown:
+        raise ValueError(f"Unknown include: {', '.join(sorted(unknown))}")
+    return names
+
+
+def build_experiment_list_query(includes: set[str], cached: bool = False) -> Select:
+    """Experiments joined to their run stats in a single grouped query.
+
+    Stats are aggregated per (experiment, variant) first so per-variant counts
+    come out of the same statement. ``cached`` reads the trigger-maintained
+    ``experiment_run_counters`` table instead of scanning ``experiment_runs``.
+    """
+    if cached:
+        if "coverage" in includes:
+            raise ValueError("coverage is not available from cached counters")
+        per_variant = select(
+            ExperimentRunCounter.experiment_id.label("experiment_id"),
+            ExperimentRunCounter.variant.label("variant"),
+            ExperimentRunCounter.run_count.label("run_count"),
+            ExperimentRunCounter.last_run_at.label("last_run_at"),
+        ).subquery()
+    else:
+        columns = [
+            ExperimentRun.experiment_id.label("experiment_id"),
+            ExperimentRun.variant.label("variant"),
+            func.count(ExperimentRun.id).label("run_count"),
+            func.max(ExperimentRun.created_at).label("last_run_at"),
+        ]
+        if "coverage" in includes:
+            has_label = exists().where(Label.assessment_id == ExperimentRun.assessment_id)
+            columns.append(func.count(ExperimentRun.id).filter(has_label).label("labeled_count"))
+        per_variant = select(*columns).group_by(ExperimentRun.experiment_id, ExperimentRun.variant).subquery()
+
+    stats_columns = [
+        per_variant.c.experiment_id,
+        cast(func.sum(per_variant.c.run_count), Integer).label("sample_count"),
+    ]
+    if "latest_run" in includes:
+        stats_columns.append(func.max(per_variant.c.last_run_at).label("latest_run_at"))
+    if "variants" in includes:
+        stats_columns.append(func.json_object_agg(per_variant.c.variant, per_variant.c.run_count).label("variant_counts"))
+    if "coverage" in includes:
+        stats_columns.append(cast(func.sum(per_variant.c.labeled_count), Integer).label("labeled_count"))
+    stats = select(*stats_columns).group_by(per_variant.c.experiment_id).subquery()
+
+    selected = [
+        Experiment.id,
+        Experiment.name,
+        Experiment.description,
+        Experiment.model_version,
+        Experiment.params,
+        Experiment.is_active,
+        Experiment.created_at,
+        func.coalesce(stats.c.sample_count, 0).label("sample_count"),
+    ]
+    selected.extend(c for c in stats.c if c.name not in {"experiment_id", "sample_count"})
+    return (
+        select(*selected)
+        .outerjoin(stats, stats.c.experiment_id == Experiment.id)
+        .order_by(Experiment.created_at.desc())
+    )
+
+
+def format_experiment_row(row, includes: set[str]) -> dict:
+    item = {
+        "id": row["id"],
+        "name": row["name"],
+        "description": row["description"],
+        "model_version": row["model_version"],
+        "params": row["params"],
+        "is_active": row["is_active"],
+        "created_at": row["created_at"],
+        "sample_count": row["sample_count"],
+    }
+    if "latest_run" in includes:
+        item["latest_run_at"] = row["latest_run_at"]
+    if "variants" in includes:
+        item["variant_counts"] = row["variant_counts"] or {}
+    if "coverage" in includes:
+        labeled = row["labeled_count"] or 0
+        item["labeled_count"] = labeled
+        item["labeled_coverage"] = round(labeled / row["sample_count"], 4) if row["sample_count"] else None
+    return item
+
+
+def assign_variant(user_key: str, experiment_id: int) -> str:
+    seed_hex = hashlib.sha256(f"{user_key}:{experiment_id}".encode()).hexdigest()[:8]
+    seeded = random.Random(int(seed_hex, 16))
+    return "A" if seeded.random() < 0.5 else "B"
+
+
+@dataclass(frozen=True)
+class CachedExperiment:
+    id: int
+    name: str
+    model_version: str
+    params: dict
+
+
+class ActiveExperimentCache:
+    """Process-local snapshot of active experiments keyed by name.
+
+    The whole active set is reloaded in one query when the TTL lapses or after
+    ``invalidate()``; admin writes in this process invalidate immediately and
+    other workers converge within ``experiment_cache_ttl_s``.
+    """
+
+    def __init__(self, ttl_s: float | None = None) -> None:
+        self.ttl_s = settings.experiment_cache_ttl_s if ttl_s is None else ttl_s
+        self._by_name: dict[str, CachedExperiment] = {}
+        self._loaded_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        self._loaded_at = None
+
+    def active(self) -> list[CachedExperiment]:
+        return list(self._by_name.values())
+
+    def _fresh(self) -> bool:
+        return self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl_s
+
+    async def get(self, db: AsyncSession, name: str) -> CachedExperiment | None:
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    await self.reload(db)
+        return self._by_name.get(name)
+
+    async def reload(self, db: AsyncSession) -> None:
+        rows = (await db.execute(select(Experiment).where(Experiment.is_active.is_(True)))).scalars().all()
+        self._by_name = {
+            row.name: CachedExperiment(id=row.id, name=row.name, model_version=row.model_version, params=row.params or {})
+            for row in rows
+        }
+        self._loaded_at = time.monotonic()
+
+
+class AssignmentWriter:
+    """Buffers sticky assignments and persists them in batches.
+
+    Variants are deterministic, so the request path never waits on this
+    write; rows are inserted with ``ON CONFLICT DO NOTHING`` by a background
+    task. Recently persisted keys are remembered to avoid rewriting the same
+    user on every page load.
+    """
+
+    def __init__(self, batch_size: int | None = None, flush_interval_s: float | None = None, remember: int = 100_000) -> None:
+        self.batch_size = batch_size or settings.assignment_batch_size
+        self.flush_interval_s = flush_interval_s or settings.assignment_flush_interval_s
+        self._remember = remember
+        self._pending: dict[tuple[str, int], str] = {}
+        self._persisted: OrderedDict[tuple[str, int], None] = OrderedDict()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def enqueue(self, user_key: str, experiment_id: int, variant: str) -> None:
+        key = (user_key, experiment_id)
+        if key in self._persisted:
+            self._persisted.move_to_end(key)
+            return
+        self._pending[key] = variant
+        if len(self._pending) >= self.batch_size:
+            self._wake.set()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.flush_interval_s)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, self._pending = self._pending, {}
+        rows = [{"user_key": k, "experiment_id": e, "variant": v} for (k, e), v in batch.items()]
+        try:
+            async with SessionLocal() as db:
+                for start in range(0, len(rows), self.batch_size):
+                    chunk = rows[start:start + self.batch_size]
+                    stmt = insert(ExperimentAssignment).values(chunk).on_conflict_do_nothing(index_elements=["user_key", "experiment_id"])
+                    await db.execute(stmt)
+                await db.commit()
+        except Exception:
+            logger.exception("Assignment flush failed", extra={"request_id": "system"})
+            # Keep a bounded backlog for the next attempt; variants are recomputable anyway.
+            for key, variant in list(batch.items())[: self.batch_size * 20]:
+                self._pending.setdefault(key, variant)
+            return 0
+        for key in batch:
+            self._persisted[key] = None
+        while len(self._persisted) > self._remember:
+            self._persisted.popitem(last=False)
+        return len(rows)
+
+
+experiment_cache = ActiveExperimentCache()
+assignment_writer = AssignmentWriter()
@@ -0,0 +1,225 @@
+import asyncio
+import hashlib
+import logging
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.tables import ToolCatalog, ToolEmbedding
+from app.schemas.agent import ApifyWebhookItem
+from app.services.embeddings import embed_texts, invalidate_serving_model, serving_model
+from app.services.jobs import enqueue, job_handler
+from app.services.vector_index import tool_index, tool_record
+
+logger = logging.getLogger(__name__)
+
+
+class ServingModelChanged(Exception):
+    """A re-embedding swap changed the serving model while these vectors were being embedded."""
+
+
+def embedding_text(item: ApifyWebhookItem) -> str:
+    return f"{item.name}\n{item.description}\n{' '.join(item.tags)}"
+
+
+def content_hash(item: ApifyWebhookItem, model: str) -> str:
+    return hashlib.sha256(f"{model}\n{embedding_text(item)}".encode("utf-8")).hexdigest()
+
+
+def _chunks(items: list, size: int):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def load_existing(db: AsyncSession, urls: list[str]) -> dict[str, tuple[int, str | None]]:
+    """``{url: (tool_id, content_hash)}`` for catalog rows that already exist."""
+    existing: dict[str, tuple[int, str | None]] = {}
+    for chunk in _chunks(urls, settings.ingest_upsert_batch_size):
+        stmt = (
+            select(ToolCatalog.url, ToolCatalog.id, ToolEmbedding.content_hash)
+            .outerjoin(ToolEmbedding, ToolEmbedding.tool_id == ToolCatalog.id)
+            .where(ToolCatalog.url.in_(chunk))
+        )
+        for url, tool_id, digest in (await db.execute(stmt)).all():
+            existing[url] = (tool_id, digest)
+    return existing
+
+
+async def upsert_catalog(db: AsyncSession, items: list[ApifyWebhookItem]) -> dict[str, int]:
+    """Insert or update catalog rows by url; returns ``{url: tool_id}``.
+
+    Rows whose stored fields already match are left untouched (no new tuple
+    version), so they are absent from the returned mapping.
+    """
+    ids: dict[str, int] = {}
+    for chunk in _chunks(items, settings.ingest_upsert_batch_size):
+        stmt = insert(ToolCatalog).values([item.model_dump() for item in chunk])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["url"],
+            set_={
+                "name": stmt.excluded.name,
+                "description": stmt.excluded.description,
+                "tags": stmt.excluded.tags,
+                "raw_payload": stmt.excluded.raw_payload,
+                "updated_at": func.now(),
+            },
+            where=text(
+                "(tools_catalog.name, tools_catalog.description, tools_catalog.tags, tools_catalog.raw_payload)"
+                " IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.description, EXCLUDED.tags, EXCLUDED.raw_payload)"
+            ),
+        ).returning(ToolCatalog.id, ToolCatalog.url)
+        for tool_id, url in (await db.execute(stmt)).all():
+            ids[url] = tool_id
+    return ids
+
+
+async def embed_batched(texts: list[str], model: str) -> list[list[float]]:
+    """Embed in provider calls of ``embedding_batch_size`` inputs, a few at a time."""
+    semaphore = asyncio.Semaphore(settings.embedding_batch_concurrency)
+
+    async def run(batch: list[str]) -> list[list[float]]:
+        async with semaphore:
+            return await embed_texts(batch, model=model)
+
+    batches = await asyncio.gather(*(run(batch) for batch in _chunks(texts, settings.embedding_batch_size)))
+    return [embedding for batch in batches for embedding in batch]
+
+
+async def upsert_embeddings(db: AsyncSession, rows: list[dict]) -> None:
+    """Write tool vectors; raises :class:`ServingModelChanged` if their model is not the serving one.
+
+    The check runs after the writes: they hold the ``tool_embeddings`` lock a
+    swap needs, so a swap either committed before them (and is seen here) or
+    waits for this transaction. The caller must roll back on the error.
+    """
+    if not rows:
+        return
+    for chunk in _chunks(rows, settings.ingest_upsert_batch_size):
+        stmt = insert(ToolEmbedding).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tool_id"],
+            set_={
+                "embedding": stmt.excluded.embedding,
+                "model": stmt.excluded.model,
+                "content_hash": stmt.excluded.content_hash,
+                "updated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+    current = (await db.execute(text("SELECT serving_model FROM embedding_state"))).scalar_one_or_none()
+    if current is not None and {row["model"] for row in rows} != {current}:
+        invalidate_serving_model()
+        raise ServingModelChanged(current)
+
+
+def classify(items: list[ApifyWebhookItem], existing: dict[str, tuple[int, str | None]], model: str) -> tuple[dict[str, int], list[ApifyWebhookItem]]:
+    """Count new/changed/unchanged items and return those that need embedding."""
+    counts = {"new": 0, "changed": 0, "unchanged": 0}
+    pending: list[ApifyWebhookItem] = []
+    for item in items:
+        if item.url not in existing:
+            counts["new"] += 1
+        elif existing[item.url][1] == content_hash(item, model):
+            counts["unchanged"] += 1
+            continue
+        else:
+            counts["changed"] += 1
+        pending.append(item)
+    return counts, pending
+
+
+async def embed_and_store(db: AsyncSession, pending: list[tuple[int, ApifyWebhookItem]], model: str) -> list[list[float]]:
+    embeddings = await embed_batched([embedding_text(item) for _, item in pending], model)
+    await upsert_embeddings(
+        db,
+        [
+            {"tool_id": tool_id, "embedding": emb, "model": model, "content_hash": content_hash(item, model)}
+            for (tool_id, item), emb in zip(pending, embeddings)
+        ],
+    )
+    return embeddings
+
+
+async def enqueue_embeddings(db: AsyncSession, pending: list[tuple[int, ApifyWebhookItem]]) -> list[int]:
+    jobs = [
+        enqueue(db, "embed_tools", {"tool_ids": [tool_id for tool_id, _ in chunk]})
+        for chunk in _chunks(pending, settings.embedding_batch_size * settings.embedding_batch_concurrency)
+    ]
+    await db.flush()
+    return [job.id for job in jobs]
+
+
+async def ingest_tools(db: AsyncSession, items: list[ApifyWebhookItem]) -> dict:
+    """Bulk-upsert crawled tools and embed only what changed, in one transaction.
+
+    Items are de-duplicated by url (last one wins) because a single
+    ``ON CONFLICT`` statement cannot touch the same row twice. An item whose
+    ``content_hash`` (embedded text + model) matches the stored one is
+    ``unchanged`` and is neither re-embedded nor rewritten. With
+    ``ingest_async_embeddings`` the embedding work is enqueued as
+    ``embed_tools`` jobs committed together with the catalog rows.
+    """
+    model = await serving_model(db)
+    by_url = {item.url: item for item in items}
+    existing = await load_existing(db, list(by_url))
+    counts, pending = classify(list(by_url.values()), existing, model)
+
+    # Unchanged items still go through the upsert so raw_payload edits land;
+    # its WHERE clause skips rows whose fields are identical.
+    ids = {url: tool_id for url, (tool_id, _) in existing.items()}
+    ids.update(await upsert_catalog(db, list(by_url.values())))
+    pending_ids = [(ids[item.url], item) for item in pending]
+
+    embeddings: list[list[float]] | None = None
+    job_ids: list[int] = []
+    if pending_ids and settings.ingest_async_embeddings:
+        job_ids = await enqueue_embeddings(db, pending_ids)
+    elif pending_ids:
+        try:
+            async with db.begin_nested():
+                embeddings = await embed_and_store(db, pending_ids, model)
+        except ValueError:
+            logger.warning("Embedding skipped due to missing key", extra={"request_id": "system"})
+        except ServingModelChanged:
+            # Embedded with the model a swap just replaced; let the jobs redo it with the new one.
+            embeddings = None
+            job_ids = await enqueue_embeddings(db, pending_ids)
+    await db.commit()
+    return {
+        "counts": counts,
+        "items": pending_ids,
+        "embeddings": embeddings,
+        "job_ids": job_ids,
+    }
+
+
+@job_handler("embed_tools")
+async def embed_tools_job(db: AsyncSession, payload: dict) -> dict:
+    """Embed catalog rows by id, skipping rows whose stored hash is current.
+
+    A swap committing mid-job raises :class:`ServingModelChanged`; the retry
+    embeds with the new model. With ``rag_backend=memory`` the vectors are
+    also appended as a segment of the shared on-disk index (the worker needs
+    the API's ``VECTOR_INDEX_DIR``), which API workers pick up on refresh.
+    """
+    model = await serving_model(db)
+    rows = (
+        await db.execute(
+            select(ToolCatalog, ToolEmbedding.content_hash)
+            .outerjoin(ToolEmbedding, ToolEmbedding.tool_id == ToolCatalog.id)
+            .where(ToolCatalog.id.in_(payload["tool_ids"]))
+        )
+    ).all()
+    pending = []
+    for tool, digest in rows:
+        item = ApifyWebhookItem(name=tool.name, description=tool.description, url=tool.url, tags=tool.tags or [], source=tool.source)
+        if digest != content_hash(item, model):
+            pending.append((tool.id, item))
+    if pending:
+        embeddings = await embed_and_store(db, pending, model)
+        if settings.rag_backend == "memory":
+            records = [tool_record(tool_id, item.name, item.description, item.url, item.tags, item.source) for tool_id, item in pending]
+            await asyncio.to_thread(tool_index.add, [tool_id for tool_id, _ in pending], embeddings, records)
+    return {"embedded": len(pending), "skipped": len(rows) - len(pending)}
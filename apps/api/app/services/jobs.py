@@ -0,0 +1,186 @@
+import json
+import logging
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.tables import Job
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[AsyncSession, dict], Awaitable[dict | None]]
+JOB_HANDLERS: dict[str, JobHandler] = {}
+
+CLAIM_SQL = text(
+    """
+    WITH running AS (
+      SELECT count(*) AS n FROM jobs
+      WHERE job_type = :job_type AND status = 'running'
+        AND locked_at > now() - make_interval(secs => :lock_timeout)
+    ),
+    picked AS (
+      SELECT id FROM jobs
+      WHERE job_type = :job_type
+        AND ((status = 'queued' AND run_at <= now())
+             OR (status = 'running' AND locked_at <= now() - make_interval(secs => :lock_timeout)))
+      ORDER BY run_at, id
+      LIMIT GREATEST(LEAST(:want, :max_running - (SELECT n FROM running)), 0)
+      FOR UPDATE SKIP LOCKED
+    )
+    UPDATE jobs
+    SET status = 'running', attempts = attempts + 1, locked_at = now(), locked_by = :worker_id
+    FROM picked
+    WHERE jobs.id = picked.id
+    RETURNING jobs.id, jobs.payload, jobs.attempts, jobs.max_attempts
+    """
+)
+
+
+@dataclass
+class ClaimedJob:
+    id: int
+    job_type: str
+    payload: dict
+    attempts: int
+    max_attempts: int
+    worker_id: str
+
+
+class JobLockLost(Exception):
+    """The job's lock expired and another worker reclaimed it; this run's outcome must be discarded."""
+
+
+def job_handler(job_type: str) -> Callable[[JobHandler], JobHandler]:
+    """Register ``handler(db, payload)`` for a job type.
+
+    Handlers must not commit: the worker commits their writes together with
+    the job's completion, so a crash before commit simply retries the job.
+    """
+
+    def register(handler: JobHandler) -> JobHandler:
+        JOB_HANDLERS[job_type] = handler
+        return handler
+
+    return register
+
+
+def concurrency_limit(job_type: str) -> int:
+    return settings.job_concurrency.get(job_type, settings.job_default_concurrency)
+
+
+def retry_delay_s(attempts: int) -> float:
+    """Exponential backoff with +/-20% jitter, capped at ``job_retry_max_s``."""
+    base = min(settings.job_retry_base_s * 2 ** max(attempts - 1, 0), settings.job_retry_max_s)
+    return base * random.uniform(0.8, 1.2)
+
+
+def enqueue(db: AsyncSession, job_type: str, payload: dict, delay_s: float = 0.0, max_attempts: int = 5) -> Job:
+    """Add a job to the caller's transaction; it becomes visible on commit."""
+    job = Job(job_type=job_type, payload=payload, max_attempts=max_attempts)
+    if delay_s:
+        job.run_at = datetime.now(timezone.utc) + timedelta(seconds=delay_s)
+    db.add(job)
+    return job
+
+
+async def enqueue_unique(db: AsyncSession, job_type: str, payload: dict, dedupe_key: str, max_attempts: int = 5) -> None:
+    """Like :func:`enqueue`, but a no-op while a queued or running job of the
+    same type has the same ``dedupe_key`` (``idx_jobs_dedupe``)."""
+    stmt = insert(Job).values(job_type=job_type, payload=payload, max_attempts=max_attempts, dedupe_key=dedupe_key)
+    await db.execute(
+        stmt.on_conflict_do_nothing(
+            index_elements=["job_type", "dedupe_key"],
+            index_where=text("status IN ('queued', 'running') AND dedupe_key IS NOT NULL"),
+        )
+    )
+
+
+async def claim(db: AsyncSession, job_type: str, want: int, worker_id: str) -> list[ClaimedJob]:
+    """Lock up to ``want`` due jobs of one type for this worker.
+
+    Claims of a type are serialized with a transaction-level advisory lock so
+    the running count is a cluster-wide limit; expired locks (a worker died
+    mid-job) are reclaimed.
+    """
+    await db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:key))"), {"key": f"jobs:{job_type}"})
+    rows = (
+        await db.execute(
+            CLAIM_SQL,
+            {
+                "job_type": job_type,
+                "want": want,
+                "max_running": concurrency_limit(job_type),
+                "lock_timeout": settings.job_lock_timeout_s,
+                "worker_id": worker_id,
+            },
+        )
+    ).all()
+    await db.commit()
+    return [ClaimedJob(id=r.id, job_type=job_type, payload=r.payload or {}, attempts=r.attempts, max_attempts=r.max_attempts, worker_id=worker_id) for r in rows]
+
+
+# Only the worker still holding the lock may finish a job.
+_OWNED = "id = :id AND status = 'running' AND locked_by = :worker_id"
+
+
+async def mark_succeeded(db: AsyncSession, job: ClaimedJob, result: dict | None) -> None:
+    """Raises :class:`JobLockLost` when the job was reclaimed; roll back the handler's writes then."""
+    updated = await db.execute(
+        text(f"UPDATE jobs SET status = 'succeeded', result = CAST(:result AS jsonb), locked_at = NULL, finished_at = now() WHERE {_OWNED}"),
+        {"id": job.id, "worker_id": job.worker_id, "result": _json(result)},
+    )
+    if updated.rowcount == 0:
+        raise JobLockLost(job.id)
+
+
+async def mark_failed(db: AsyncSession, job: ClaimedJob, error: str) -> str:
+    """Requeue with backoff, or fail permanently once attempts are used up.
+
+    Returns ``"lost"`` without changing anything if another worker reclaimed the job.
+    """
+    params = {"id": job.id, "worker_id": job.worker_id, "error": error}
+    if job.attempts >= job.max_attempts:
+        status = "failed"
+        updated = await db.execute(
+            text(f"UPDATE jobs SET status = 'failed', last_error = :error, locked_at = NULL, finished_at = now() WHERE {_OWNED}"),
+            params,
+        )
+    else:
+        status = "queued"
+        updated = await db.execute(
+            text(
+                f"""
+                UPDATE jobs SET status = 'queued', last_error = :error, locked_at = NULL, locked_by = NULL,
+                                run_at = now() + make_interval(secs => :delay)
+                WHERE {_OWNED}
+                """
+            ),
+            {**params, "delay": retry_delay_s(job.attempts)},
+        )
+    return status if updated.rowcount else "lost"
+
+
+def _json(value: dict | None) -> str | None:
+    return None if value is None else json.dumps(value, default=str)
+
+
+async def job_stats(db: AsyncSession) -> list[dict]:
+    rows = (
+        await db.execute(
+            text(
+                """
+                SELECT job_type, status, count(*) AS count, min(run_at) FILTER (WHERE status = 'queued') AS oldest_run_at
+                FROM jobs
+                GROUP BY job_type, status
+                ORDER BY job_type, status
+                """
+            )
+        )
+    ).mappings().all()
+    return [dict(r) for r in rows]
@@ -0,0 +1,169 @@
+import math
+import re
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.tables import ToolCatalog
+from app.services.vector_index import tool_record
+
+# Latin words as tokens, CJK ideographs one character at a time.
+TOKEN_RE = re.compile(r"[a-z0-9]+|[\u4e00-\u9fff]")
+FIELD_WEIGHTS = {"name": 3.0, "tags": 2.0, "description": 1.0}
+BM25_K1 = 1.2
+BM25_B = 0.75
+# now() is the transaction start time, so rows can commit with timestamps older
+# than the watermark; re-read a small window on every refresh.
+REFRESH_OVERLAP = timedelta(minutes=5)
+
+
+def tokenize(text: str) -> list[str]:
+    return TOKEN_RE.findall(text.lower())
+
+
+def _normalize(text: str) -> str:
+    return " ".join(tokenize(text))
+
+
+def reciprocal_rank_fusion(result_lists: list[list[dict]], top_k: int, k: int = 60) -> list[dict]:
+    """Merge ranked tool lists; each list contributes 1 / (k + rank) per tool."""
+    fused: dict[int, float] = {}
+    records: dict[int, dict] = {}
+    for results in result_lists:
+        for rank, item in enumerate(results, start=1):
+            fused[item["tool_id"]] = fused.get(item["tool_id"], 0.0) + 1.0 / (k + rank)
+            records.setdefault(item["tool_id"], item)
+    ranked = sorted(fused.items(), key=lambda kv: kv[1], reverse=True)[:top_k]
+    return [{**records[tool_id], "score": round(score, 6)} for tool_id, score in ranked]
+
+
+class ToolLexicalIndex:
+    """BM25 inverted index over tool name, tags and description.
+
+    Fields are weighted into a single term-frequency vector per tool (name
+    counts more than tags, tags more than description). Rows are upserted
+    incrementally on ingest, and every worker pulls rows changed since its
+    last refresh from ``tools_catalog`` so replicas converge.
+    """
+
+    def __init__(self) -> None:
+        self._postings: dict[str, dict[int, float]] = {}
+        self._doc_terms: dict[int, dict[str, float]] = {}
+        self._doc_len: dict[int, float] = {}
+        self._docs: dict[int, dict] = {}
+        self._names: dict[str, set[int]] = {}
+        self._tags: dict[str, set[int]] = {}
+        self._total_len = 0.0
+        self._watermark: datetime | None = None
+        self._checked_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._watermark is not None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def upsert(self, record: dict) -> None:
+        tool_id = record["tool_id"]
+        self.remove(tool_id)
+        terms: Counter[str] = Counter()
+        for field, weight in FIELD_WEIGHTS.items():
+            value = " ".join(record.get(field) or []) if field == "tags" else (record.get(field) or "")
+            for token in tokenize(value):
+                terms[token] += weight
+        self._doc_terms[tool_id] = dict(terms)
+        self._doc_len[tool_id] = sum(terms.values())
+        self._total_len += self._doc_len[tool_id]
+        self._docs[tool_id] = record
+        for term, tf in terms.items():
+            self._postings.setdefault(term, {})[tool_id] = tf
+        self._names.setdefault(_normalize(record.get("name") or ""), set()).add(tool_id)
+        for tag in record.get("tags") or []:
+            self._tags.setdefault(_normalize(tag), set()).add(tool_id)
+
+    def remove(self, tool_id: int) -> None:
+        record = self._docs.pop(tool_id, None)
+        if record is None:
+            return
+        for term in self._doc_terms.pop(tool_id, {}):
+            posting = self._postings.get(term)
+            if posting is not None:
+                posting.pop(tool_id, None)
+                if not posting:
+                    del self._postings[term]
+        self._total_len -= self._doc_len.pop(tool_id, 0.0)
+        self._names.get(_normalize(record.get("name") or ""), set()).discard(tool_id)
+        for tag in record.get("tags") or []:
+            self._tags.get(_normalize(tag), set()).discard(tool_id)
+
+    def _allowed(self, tool_id: int, filters: dict | None) -> bool:
+        if not filters:
+            return True
+        record = self._docs[tool_id]
+        if filters.get("source") and record.get("source") != filters["source"]:
+            return False
+        if filters.get("tags") and not set(filters["tags"]) & set(record.get("tags") or []):
+            return False
+        return True
+
+    def exact_matches(self, query: str, filters: dict | None = None) -> list[dict]:
+        """Tools whose name or one of whose tags equals the normalized query."""
+        key = _normalize(query)
+        if not key:
+            return []
+        ids = self._names.get(key, set()) | self._tags.get(key, set())
+        return [self._docs[i] for i in sorted(ids) if self._allowed(i, filters)]
+
+    def search(self, query: str, top_k: int, filters: dict | None = None) -> list[dict]:
+        n_docs = len(self._docs)
+        if not n_docs:
+            return []
+        avg_len = self._total_len / n_docs or 1.0
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if not posting:
+                continue
+            idf = math.log(1 + (n_docs - len(posting) + 0.5) / (len(posting) + 0.5))
+            for tool_id, tf in posting.items():
+                norm = tf + BM25_K1 * (1 - BM25_B + BM25_B * self._doc_len[tool_id] / avg_len)
+                scores[tool_id] = scores.get(tool_id, 0.0) + idf * tf * (BM25_K1 + 1) / norm
+
+        exact = {r["tool_id"] for r in self.exact_matches(query)}
+        ranked = sorted(
+            (tid for tid in scores if self._allowed(tid, filters)),
+            key=lambda tid: (tid in exact, scores[tid]),
+            reverse=True,
+        )[:top_k]
+        return [{**self._public(tid), "score": round(scores[tid], 4)} for tid in ranked]
+
+    def _public(self, tool_id: int) -> dict:
+        record = self._docs[tool_id]
+        return {k: record[k] for k in ("tool_id", "name", "description", "url", "tags")}
+
+    async def refresh(self, db: AsyncSession) -> int:
+        stmt = select(ToolCatalog.id, ToolCatalog.name, ToolCatalog.description, ToolCatalog.url, ToolCatalog.tags, ToolCatalog.source, ToolCatalog.updated_at)
+        if self._watermark is not None:
+            stmt = stmt.where(ToolCatalog.updated_at > self._watermark - REFRESH_OVERLAP)
+        count = 0
+        result = await db.stream(stmt.order_by(ToolCatalog.updated_at).execution_options(yield_per=5000))
+        async for row in result:
+            self.upsert(tool_record(row.id, row.name, row.description, row.url, row.tags, row.source))
+            self._watermark = max(self._watermark or row.updated_at, row.updated_at)
+            count += 1
+        if self._watermark is None:
+            self._watermark = datetime.min.replace(tzinfo=timezone.utc) + REFRESH_OVERLAP
+        self._checked_at = time.monotonic()
+        return count
+
+    async def maybe_refresh(self, db: AsyncSession) -> None:
+        if time.monotonic() - self._checked_at >= settings.lexical_index_refresh_s:
+            await self.refresh(db)
+
+
+lexical_index = ToolLexicalIndex()
@@ -1,6 +1,13 @@
 import httpx
-from tenacity import retry, stop_after_attempt, wait_exponential
+from sqlalchemy import func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from tenacity import retry, retry_if_not_exception_type, stop_after_attempt, wait_exponential
 from app.core.config import settings
+from app.core.metrics import record_cache, timed
+from app.models.tables import OnetCache
+from app.services.jobs import job_handler
+from app.core.resilience import UpstreamUnavailable, onet_upstream
 
 
 class OnetClient:
@@ -9,10 +16,57 @@ class OnetClient:
         self.auth = None
         if settings.onet_username and settings.onet_password:
             self.auth = (settings.onet_username, settings.onet_password)
+        self._client: httpx.AsyncClient | None = None
 
-    @retry(stop=stop_after_attempt(3), wait=wait_exponential(multiplier=0.5, min=0.5, max=4))
+    def client(self) -> httpx.AsyncClient:
+        """Shared client, so requests reuse pooled (and TLS-established) connections."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=settings.request_timeout_s)
+        return self._client
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    # Each attempt goes through the circuit breaker; an open circuit or full
+    # bulkhead fails the call at once instead of retrying into the outage.
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=0.5, min=0.5, max=4),
+        retry=retry_if_not_exception_type(UpstreamUnavailable),
+    )
     async def get(self, path: str, params: dict | None = None) -> dict:
-        async with httpx.AsyncClient(timeout=settings.request_timeout_s) as client:
-            response = await client.get(f"{self.base_url}/{path.lstrip('/')}", params=params, auth=self.auth)
-            response.raise_for_status()
-            return response.json()
+        return await onet_upstream.call(lambda: self._fetch(path, params))
+
+    async def _fetch(self, path: str, params: dict | None) -> dict:
+        with timed("onet_request"):
+            return await self._request(path, params)
+
+    async def _request(self, path: str, params: dict | None) -> dict:
+        response = await self.client().get(f"{self.base_url}/{path.lstrip('/')}", params=params, auth=self.auth)
+        response.raise_for_status()
+        return response.json()
+
+
+onet_client = OnetClient()
+
+
+async def cached_detail(db: AsyncSession, code: str) -> dict | None:
+    payload = (await db.execute(select(OnetCache.payload).where(OnetCache.occupation_code == code))).scalar_one_or_none()
+    record_cache("onet_detail", payload is not None)
+    return payload
+
+
+def cache_detail_stmt(code: str, payload: dict):
+    stmt = insert(OnetCache).values(occupation_code=code, payload=payload)
+    return stmt.on_conflict_do_update(index_elements=["occupation_code"], set_={"payload": stmt.excluded.payload, "updated_at": func.now()})
+
+
+@job_handler("onet_prefetch")
+async def onet_prefetch_job(db: AsyncSession, payload: dict) -> dict:
+    """Fetch an occupation's detail into ``onet_cache`` (retried by the job runner)."""
+    code = payload["occupation_code"]
+    detail = await onet_client.get(f"online/occupations/{code}")
+    await db.execute(cache_detail_stmt(code, detail))
+    return {"occupation_code": code}
@@ -1,45 +1,299 @@
-from openai import AsyncOpenAI
+import asyncio
+import json
+
 from sqlalchemy import text
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.config import settings
+from app.core.metrics import timed
+from app.services.embeddings import embed_queries, embed_query
+from app.services.lexical_index import lexical_index, reciprocal_rank_fusion
+from app.services.vector_index import tool_index
 
 
-def build_tools_filter_sql(filters: dict | None) -> tuple[str, dict]:
+def build_tools_filter_sql(
+    filters: dict | None,
+    source_column: str = "tc.source",
+    literal_sources: frozenset[str] = frozenset(),
+) -> tuple[str, dict]:
     clauses = []
     params: dict = {}
     if not filters:
         return "", params
-    if filters.get("source"):
-        clauses.append("tc.source = :source")
-        params["source"] = filters["source"]
+    source = filters.get("source")
+    if source in literal_sources and source.isidentifier():
+        # Partial index predicates only match literals, not bind parameters.
+        clauses.append(f"{source_column} = '{source}'")
+    elif source:
+        clauses.append(f"{source_column} = :source")
+        params["source"] = source
     if filters.get("tags"):
         clauses.append("tc.tags ?| :tags")
         params["tags"] = filters["tags"]
     return (" AND " + " AND ".join(clauses)) if clauses else "", params
 
 
-async def embed_query(query: str) -> list[float]:
-    if not settings.openai_api_key:
-        raise ValueError("OPENAI_API_KEY is required for embeddings")
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
-    result = await client.embeddings.create(model=settings.embedding_model, input=query)
-    return result.data[0].embedding
+# Candidate ordering per storage mode; ``{q}`` is the float32 query vector.
+CANDIDATE_DISTANCE = {
+    "full": "te.embedding <=> {q}",
+    "halfvec": "te.embedding_half <=> {q}::halfvec(1536)",
+    "binary": "te.embedding_bits <~> binary_quantize({q})::bit(1536)",
+}
+QUERY_VECTOR = "CAST(:embedding AS vector)"
+
 
+def build_vector_search_sql(storage: str, where_sql: str) -> str:
+    """pgvector search statement for the configured storage mode.
 
-async def search_tools(db: AsyncSession, query: str, top_k: int, filters: dict | None = None) -> list[dict]:
-    embedding = await embed_query(query)
-    where_sql, filter_params = build_tools_filter_sql(filters)
-    sql = text(
-        f"""
+    ``full`` orders by the float32 HNSW index directly. Quantized modes pick
+    ``:candidates`` rows through the halfvec/binary index, then re-rank only
+    those against the full-precision vectors. The candidate CTE is
+    materialized so iterative index scans (relaxed order) are re-sorted.
+    """
+    if storage not in CANDIDATE_DISTANCE:
+        raise ValueError(f"Unknown vector storage: {storage}")
+    limit = ":top_k" if storage == "full" else ":candidates"
+    return f"""
+        WITH candidates AS MATERIALIZED (
+          SELECT te.tool_id, te.embedding
+          FROM tool_embeddings te
+          JOIN tools_catalog tc ON tc.id = te.tool_id
+          WHERE 1=1 {where_sql}
+          ORDER BY {CANDIDATE_DISTANCE[storage].format(q=QUERY_VECTOR)}
+          LIMIT {limit}
+        )
         SELECT tc.id AS tool_id, tc.name, tc.description, tc.url, tc.tags,
-               1 - (te.embedding <=> CAST(:embedding AS vector)) AS score
-        FROM tool_embeddings te
-        JOIN tools_catalog tc ON tc.id = te.tool_id
-        WHERE 1=1 {where_sql}
-        ORDER BY te.embedding <=> CAST(:embedding AS vector)
+               1 - (c.embedding <=> {QUERY_VECTOR}) AS score
+        FROM candidates c
+        JOIN tools_catalog tc ON tc.id = c.tool_id
+        ORDER BY c.embedding <=> {QUERY_VECTOR}
         LIMIT :top_k
         """
+
+
+def build_batch_search_sql(storage: str, n_queries: int, literal_source: str | None = None) -> str:
+    """One statement for many queries: a LATERAL index scan per VALUES row.
+
+    Each row carries its own vector, limits and filters, so filters are
+    expressed against the row (``q.source``/``q.tags``) instead of bind
+    parameters shared by the whole statement. ``literal_source`` inlines a
+    partial-index source instead, for statements whose rows all filter on it.
+    """
+    if storage not in CANDIDATE_DISTANCE:
+        raise ValueError(f"Unknown vector storage: {storage}")
+    source_sql = f"te.source = '{literal_source}'" if literal_source else "(q.source IS NULL OR te.source = q.source)"
+    rows = ",\n          ".join(
+        f"(CAST(:i{i} AS int), CAST(:e{i} AS vector), CAST(:k{i} AS int), CAST(:c{i} AS int), CAST(:s{i} AS text), CAST(:t{i} AS text[]))"
+        for i in range(n_queries)
+    )
+    return f"""
+        WITH q(idx, embedding, top_k, candidates, source, tags) AS (
+          VALUES {rows}
+        )
+        SELECT q.idx, r.tool_id, r.name, r.description, r.url, r.tags, r.score
+        FROM q
+        CROSS JOIN LATERAL (
+          SELECT tc.id AS tool_id, tc.name, tc.description, tc.url, tc.tags,
+                 1 - (c.embedding <=> q.embedding) AS score
+          FROM (
+            SELECT te.tool_id, te.embedding
+            FROM tool_embeddings te
+            JOIN tools_catalog tc ON tc.id = te.tool_id
+            WHERE {source_sql}
+              AND (q.tags IS NULL OR tc.tags ?| q.tags)
+            ORDER BY {CANDIDATE_DISTANCE[storage].format(q="q.embedding")}
+            LIMIT q.candidates
+          ) c
+          JOIN tools_catalog tc ON tc.id = c.tool_id
+          ORDER BY c.embedding <=> q.embedding
+          LIMIT q.top_k
+        ) r
+        ORDER BY q.idx, r.score DESC
+        """
+
+
+async def _apply_search_settings(db: AsyncSession, ef_search: int, filtered: bool) -> None:
+    # Transaction-local, so pooled connections never keep a per-request value.
+    await db.execute(text("SELECT set_config('hnsw.ef_search', :ef, true)"), {"ef": str(ef_search)})
+    if settings.rag_iterative_scan:
+        # Set either way: an earlier statement in the transaction may have turned it on.
+        mode = "relaxed_order" if filtered else "off"
+        await db.execute(text("SELECT set_config('hnsw.iterative_scan', :mode, true)"), {"mode": mode})
+
+
+async def _pgvector_search(db: AsyncSession, embedding: list[float], top_k: int, filters: dict | None, ef_search: int | None = None) -> list[dict]:
+    """Search with HNSW, widening ``ef_search`` while filters starve the result.
+
+    A filter is applied to the candidates the index walk returns, so a
+    selective source/tag filter can leave fewer than ``top_k`` rows. Source
+    filters hit ``tool_embeddings.source`` so per-source partial indexes are
+    usable; with pgvector iterative scans the index keeps walking until enough
+    rows pass, and without them each retry quadruples ``ef_search`` up to
+    ``rag_ef_search_max``.
+    """
+    where_sql, filter_params = build_tools_filter_sql(
+        filters,
+        source_column="te.source",
+        literal_sources=frozenset(settings.rag_partial_index_sources),
     )
+    storage = settings.rag_vector_storage
+    sql = text(build_vector_search_sql(storage, where_sql))
     params = {"embedding": embedding, "top_k": top_k, **filter_params}
-    rows = (await db.execute(sql, params)).mappings().all()
-    return [dict(r) for r in rows]
+    limit = top_k
+    if storage != "full":
+        limit = params["candidates"] = top_k * settings.rag_rerank_factor
+
+    # ef_search below the LIMIT caps the rows an HNSW scan can return.
+    ef = max(ef_search or settings.rag_ef_search, limit)
+    filtered = bool(where_sql)
+    while True:
+        await _apply_search_settings(db, ef, filtered)
+        rows = (await db.execute(sql, params)).mappings().all()
+        # An iterative scan already walked on until enough rows matched, so a
+        # short result means the filter matches fewer rows; do not re-run it.
+        if len(rows) >= top_k or not filtered or settings.rag_iterative_scan or ef >= settings.rag_ef_search_max:
+            return [dict(r) for r in rows]
+        ef = min(ef * 4, settings.rag_ef_search_max)
+
+
+async def vector_search(db: AsyncSession, embedding: list[float], top_k: int, filters: dict | None = None, ef_search: int | None = None) -> list[dict]:
+    if settings.rag_backend == "memory" and tool_index.loaded:
+        return await asyncio.to_thread(tool_index.search, embedding, top_k, filters)
+    return await _pgvector_search(db, embedding, top_k, filters, ef_search)
+
+
+async def search_tools(
+    db: AsyncSession,
+    query: str,
+    top_k: int,
+    filters: dict | None = None,
+    mode: str = "vector",
+    ef_search: int | None = None,
+) -> list[dict]:
+    """Tool search in ``vector``, ``lexical`` or ``hybrid`` (RRF) mode.
+
+    Hybrid queries that exactly match a tool name or tag are answered from the
+    BM25 index alone, without an embedding call.
+    """
+    if mode in ("lexical", "hybrid"):
+        await lexical_index.maybe_refresh(db)
+        if mode == "lexical" or lexical_index.exact_matches(query, filters):
+            with timed("rag_lexical"):
+                return lexical_index.search(query, top_k, filters)
+
+    with timed("rag_embed"):
+        embedding = await embed_query(query, db=db)
+    if mode == "vector":
+        with timed("rag_vector"):
+            return await vector_search(db, embedding, top_k, filters, ef_search)
+
+    pool = top_k * settings.hybrid_candidate_factor
+    with timed("rag_vector"):
+        vector = await vector_search(db, embedding, pool, filters, ef_search)
+    with timed("rag_lexical"):
+        lexical = lexical_index.search(query, pool, filters)
+    return reciprocal_rank_fusion([vector, lexical], top_k)
+
+
+def _has_filter_values(filters: dict | None) -> bool:
+    # An empty RagFilters dumps to {"tags": None, "source": None}.
+    return bool(filters) and any(filters.values())
+
+
+async def _run_batch(
+    db: AsyncSession, embeddings: list[list[float]], searches: list[dict], indices: list[int], factor: int, literal_source: str | None
+) -> list[list[dict]]:
+    params: dict = {}
+    for j, qi in enumerate(indices):
+        filters = searches[qi]["filters"] or {}
+        params.update(
+            {
+                f"i{j}": j,
+                f"e{j}": str(embeddings[qi]),
+                f"k{j}": searches[qi]["top_k"],
+                f"c{j}": searches[qi]["top_k"] * factor,
+                # Empty values mean "no filter", as in build_tools_filter_sql.
+                f"s{j}": filters.get("source") or None,
+                f"t{j}": filters.get("tags") or None,
+            }
+        )
+    sql = text(build_batch_search_sql(settings.rag_vector_storage, len(indices), literal_source))
+    results: list[list[dict]] = [[] for _ in indices]
+    for row in (await db.execute(sql, params)).mappings().all():
+        item = dict(row)
+        results[item.pop("idx")].append(item)
+    return results
+
+
+async def _pgvector_search_batch(db: AsyncSession, embeddings: list[list[float]], searches: list[dict], ef_search: int | None) -> list[list[dict]]:
+    """Batch counterpart of :func:`_pgvector_search`.
+
+    Queries are grouped into one statement per partial-index source (inlined
+    as a literal so the partial index applies) plus one for the rest, with
+    unfiltered queries kept apart so only filtered ones turn on iterative
+    scans. Without iterative scans, filtered queries left short of ``top_k``
+    are re-run with ``ef_search`` quadrupled up to ``rag_ef_search_max``.
+    """
+    factor = 1 if settings.rag_vector_storage == "full" else settings.rag_rerank_factor
+    literal_sources = frozenset(settings.rag_partial_index_sources)
+    groups: dict[tuple[str | None, bool], list[int]] = {}
+    for qi, search in enumerate(searches):
+        filters = search["filters"] or {}
+        source = filters.get("source")
+        literal = source if source in literal_sources and source.isidentifier() else None
+        groups.setdefault((literal, _has_filter_values(filters)), []).append(qi)
+
+    results: list[list[dict]] = [[] for _ in searches]
+    for (literal, filtered), indices in groups.items():
+        ef = min(max(ef_search or settings.rag_ef_search, max(searches[qi]["top_k"] for qi in indices) * factor), settings.rag_ef_search_max)
+        while indices:
+            await _apply_search_settings(db, ef, filtered)
+            for qi, items in zip(indices, await _run_batch(db, embeddings, searches, indices, factor, literal)):
+                results[qi] = items
+            if not filtered or settings.rag_iterative_scan or ef >= settings.rag_ef_search_max:
+                break
+            indices = [qi for qi in indices if len(results[qi]) < searches[qi]["top_k"]]
+            ef = min(ef * 4, settings.rag_ef_search_max)
+    return results
+
+
+def dedupe_results(results: list[list[dict]], top_k: list[int]) -> list[list[dict]]:
+    """Keep each tool only under the query where it scored highest."""
+    best: dict[int, tuple[float, int]] = {}
+    for qi, items in enumerate(results):
+        for item in items:
+            current = best.get(item["tool_id"])
+            if current is None or item["score"] > current[0]:
+                best[item["tool_id"]] = (item["score"], qi)
+    return [
+        [item for item in items if best[item["tool_id"]][1] == qi][: top_k[qi]]
+        for qi, items in enumerate(results)
+    ]
+
+
+async def search_tools_batch(db: AsyncSession, searches: list[dict], dedupe: bool = False, ef_search: int | None = None) -> list[list[dict]]:
+    """Vector search for many queries with one embedding call and one lookup.
+
+    ``searches`` items carry ``query``, ``top_k`` and ``filters``. With
+    ``dedupe`` each query over-fetches so that it still has ``top_k`` results
+    after tools claimed by better-matching queries are removed.
+    """
+    embeddings = await embed_queries([s["query"] for s in searches], db=db)
+    fetch = [{**s, "top_k": s["top_k"] * (2 if dedupe else 1)} for s in searches]
+
+    if settings.rag_backend == "memory" and tool_index.loaded:
+        results: list[list[dict]] = [[] for _ in searches]
+        groups: dict[str, list[int]] = {}
+        for qi, search in enumerate(fetch):
+            groups.setdefault(json.dumps(search["filters"] or {}, sort_keys=True), []).append(qi)
+        for indices in groups.values():
+            k = max(fetch[qi]["top_k"] for qi in indices)
+            found = await asyncio.to_thread(tool_index.search_many, [embeddings[qi] for qi in indices], k, fetch[indices[0]]["filters"])
+            for qi, items in zip(indices, found):
+                results[qi] = items[: fetch[qi]["top_k"]]
+    else:
+        results = await _pgvector_search_batch(db, embeddings, fetch, ef_search)
+
+    top_k = [s["top_k"] for s in searches]
+    if dedupe:
+        return dedupe_results(results, top_k)
+    return results
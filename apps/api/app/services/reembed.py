@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import re
+import time
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.tables import ReembedRun, ToolCatalog, ToolEmbeddingShadow
+from app.schemas.agent import ApifyWebhookItem
+from app.services.embeddings import SERVING_MODEL_CHANNEL, embed_texts, invalidate_serving_model
+from app.services.ingest import content_hash, embedding_text
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Spaces provider calls evenly to stay under ``per_minute`` requests."""
+
+    def __init__(self, per_minute: int) -> None:
+        self.interval_s = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            now = time.monotonic()
+            if self._next_at > now:
+                await asyncio.sleep(self._next_at - now)
+            self._next_at = max(now, self._next_at) + self.interval_s
+
+
+async def _embed_rows(rows: list, model: str, limiter: RateLimiter) -> list[dict]:
+    items = [ApifyWebhookItem(name=r.name, description=r.description, url=r.url, tags=r.tags or []) for r in rows]
+    semaphore = asyncio.Semaphore(settings.embedding_batch_concurrency)
+    size = settings.embedding_batch_size
+
+    async def run(batch: list[ApifyWebhookItem]) -> list[list[float]]:
+        async with semaphore:
+            await limiter.acquire()
+            return await embed_texts([embedding_text(item) for item in batch], model=model)
+
+    batches = await asyncio.gather(*(run(items[i:i + size]) for i in range(0, len(items), size)))
+    vectors = [v for batch in batches for v in batch]
+    return [
+        {
+            "tool_id": row.id,
+            "embedding": vector,
+            "model": model,
+            "content_hash": content_hash(item, model),
+            "catalog_updated_at": row.updated_at,
+        }
+        for row, item, vector in zip(rows, items, vectors)
+    ]
+
+
+async def _write_shadow(db: AsyncSession, rows: list[dict]) -> None:
+    stmt = insert(ToolEmbeddingShadow).values(rows)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["tool_id"],
+        set_={c: stmt.excluded[c] for c in ("embedding", "model", "content_hash", "catalog_updated_at")},
+    )
+    await db.execute(stmt)
+
+
+def _catalog_columns():
+    return select(ToolCatalog.id, ToolCatalog.name, ToolCatalog.description, ToolCatalog.url, ToolCatalog.tags, ToolCatalog.updated_at)
+
+
+async def start_or_resume(db: AsyncSession, model: str) -> ReembedRun:
+    """Resume the running run for ``model``, or start a fresh one.
+
+    Starting a run for a different model discards shadow rows left by an
+    abandoned run so they can never be swapped in.
+    """
+    run = (
+        await db.execute(select(ReembedRun).where(ReembedRun.model == model, ReembedRun.status == "running").order_by(ReembedRun.id.desc()))
+    ).scalars().first()
+    if run is not None:
+        return run
+    await db.execute(update(ReembedRun).where(ReembedRun.status == "running").values(status="abandoned", finished_at=func.now()))
+    await db.execute(text("TRUNCATE tool_embeddings_shadow"))
+    run = ReembedRun(model=model)
+    db.add(run)
+    await db.commit()
+    await db.refresh(run)
+    return run
+
+
+async def backfill(db: AsyncSession, run: ReembedRun, limiter: RateLimiter, batch_size: int) -> None:
+    """Embed the catalog in id order; each batch commits with its checkpoint."""
+    while True:
+        rows = (
+            await db.execute(_catalog_columns().where(ToolCatalog.id > run.last_tool_id).order_by(ToolCatalog.id).limit(batch_size))
+        ).all()
+        if not rows:
+            return
+        await _write_shadow(db, await _embed_rows(rows, run.model, limiter))
+        run.last_tool_id = rows[-1].id
+        run.processed += len(rows)
+        await db.commit()
+        logger.info("Re-embedded through tool %s (%s rows)", run.last_tool_id, run.processed, extra={"request_id": "system"})
+
+
+def _stale_query(limit: int):
+    # Tools added, or edited after their shadow row was embedded, since the backfill passed them.
+    shadow = ToolEmbeddingShadow
+    return (
+        _catalog_columns()
+        .outerjoin(shadow, shadow.tool_id == ToolCatalog.id)
+        .where((shadow.tool_id.is_(None)) | (ToolCatalog.updated_at > shadow.catalog_updated_at))
+        .order_by(ToolCatalog.id)
+        .limit(limit)
+    )
+
+
+async def catch_up(db: AsyncSession, run: ReembedRun, limiter: RateLimiter, batch_size: int) -> int:
+    total = 0
+    while True:
+        rows = (await db.execute(_stale_query(batch_size))).all()
+        if not rows:
+            return total
+        await _write_shadow(db, await _embed_rows(rows, run.model, limiter))
+        await db.commit()
+        total += len(rows)
+
+
+NEXT_TABLE = "tool_embeddings_next"
+OLD_TABLE = "tool_embeddings_old"
+_ON_SERVING_TABLE = re.compile(r" ON (?:ONLY )?(?:\w+\.)?tool_embeddings ")
+
+_INDEXES_SQL = """
+    SELECT i.relname AS name, pg_get_indexdef(i.oid) AS definition, c.contype
+    FROM pg_index x
+    JOIN pg_class i ON i.oid = x.indexrelid
+    LEFT JOIN pg_constraint c ON c.conindid = x.indexrelid AND c.conrelid = x.indrelid
+    WHERE x.indrelid = CAST(:table AS regclass)
+    ORDER BY i.relname
+"""
+
+
+def next_index_sql(name: str, definition: str, contype: str | None) -> list[str]:
+    """Statements recreating one ``tool_embeddings`` index on the next table as ``<name>_next``."""
+    statement = _ON_SERVING_TABLE.sub(f" ON {NEXT_TABLE} ", definition.replace(f" INDEX {name} ", f" INDEX {name}_next ", 1), count=1)
+    statements = [statement]
+    if contype in ("p", "u"):
+        kind = "PRIMARY KEY" if contype == "p" else "UNIQUE"
+        statements.append(f"ALTER TABLE {NEXT_TABLE} ADD CONSTRAINT {name}_next {kind} USING INDEX {name}_next")
+    return statements
+
+
+def next_trigger_sql(definition: str) -> str:
+    return _ON_SERVING_TABLE.sub(f" ON {NEXT_TABLE} ", definition, count=1)
+
+
+async def build_next_table(db: AsyncSession) -> None:
+    """Build the table that replaces ``tool_embeddings`` at swap time.
+
+    Same columns, foreign keys, triggers and indexes as the serving table,
+    filled from the shadow rows; the indexes are built after the bulk load.
+    Runs without the swap lock, so ingest and search are not blocked.
+    """
+    await db.execute(text(f"DROP TABLE IF EXISTS {NEXT_TABLE}, {OLD_TABLE}"))
+    await db.execute(text(f"CREATE TABLE {NEXT_TABLE} (LIKE tool_embeddings INCLUDING DEFAULTS INCLUDING CONSTRAINTS INCLUDING STORAGE)"))
+    foreign_keys = await db.execute(
+        text("SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = CAST('tool_embeddings' AS regclass) AND contype = 'f'")
+    )
+    for name, definition in foreign_keys.all():
+        await db.execute(text(f"ALTER TABLE {NEXT_TABLE} ADD CONSTRAINT {name} {definition}"))
+    triggers = await db.execute(
+        text("SELECT pg_get_triggerdef(oid) FROM pg_trigger WHERE tgrelid = CAST('tool_embeddings' AS regclass) AND NOT tgisinternal")
+    )
+    for (definition,) in triggers.all():
+        await db.execute(text(next_trigger_sql(definition)))
+    await db.commit()
+
+    await db.execute(
+        text(
+            f"""
+            INSERT INTO {NEXT_TABLE} (tool_id, embedding, model, content_hash)
+            SELECT tool_id, embedding, model, content_hash FROM tool_embeddings_shadow
+            """
+        )
+    )
+    await db.commit()
+    for name, definition, contype in (await db.execute(text(_INDEXES_SQL), {"table": "tool_embeddings"})).all():
+        for sql in next_index_sql(name, definition, contype):
+            await db.execute(text(sql))
+        await db.commit()
+    await db.execute(text(f"ANALYZE {NEXT_TABLE}"))
+    await db.commit()
+
+
+async def sync_next_table(db: AsyncSession) -> None:
+    """Bring the next table up to date with shadow rows caught up since it was built."""
+    await db.execute(
+        text(
+            f"""
+            INSERT INTO {NEXT_TABLE} AS n (tool_id, embedding, model, content_hash)
+            SELECT tool_id, embedding, model, content_hash FROM tool_embeddings_shadow
+            ON CONFLICT (tool_id) DO UPDATE
+            SET embedding = EXCLUDED.embedding, model = EXCLUDED.model, content_hash = EXCLUDED.content_hash, updated_at = now()
+            WHERE n.content_hash IS DISTINCT FROM EXCLUDED.content_hash
+            """
+        )
+    )
+
+
+async def cut_over(db: AsyncSession, model: str) -> None:
+    """Rename the next table into place and flip the serving model.
+
+    Only renames and single-row updates, so the swap lock is held briefly.
+    The caller holds the lock and commits.
+    """
+    # The catalog sync trigger wrote source changes to the serving table since the build.
+    await db.execute(
+        text(
+            f"""
+            UPDATE {NEXT_TABLE} n SET source = tc.source
+            FROM tools_catalog tc
+            WHERE tc.id = n.tool_id AND n.source IS DISTINCT FROM tc.source
+            """
+        )
+    )
+    serving = [name for name, _, _ in (await db.execute(text(_INDEXES_SQL), {"table": "tool_embeddings"})).all()]
+    staged = [name for name, _, _ in (await db.execute(text(_INDEXES_SQL), {"table": NEXT_TABLE})).all()]
+    await db.execute(text(f"ALTER TABLE tool_embeddings RENAME TO {OLD_TABLE}"))
+    for name in serving:
+        await db.execute(text(f"ALTER INDEX {name} RENAME TO {name}_old"))
+    await db.execute(text(f"ALTER TABLE {NEXT_TABLE} RENAME TO tool_embeddings"))
+    for name in staged:
+        await db.execute(text(f"ALTER INDEX {name} RENAME TO {name.removesuffix('_next')}"))
+    # The id default still draws from this sequence; keep it when the old table is dropped.
+    await db.execute(text("ALTER SEQUENCE IF EXISTS tool_embeddings_id_seq OWNED BY tool_embeddings.id"))
+    await db.execute(text("UPDATE embedding_state SET serving_model = :model, updated_at = now()"), {"model": model})
+    # Delivered on commit; API and worker processes drop their cached model.
+    await db.execute(text(f"SELECT pg_notify('{SERVING_MODEL_CHANNEL}', :model)"), {"model": model})
+    await db.execute(text("TRUNCATE tool_embeddings_shadow"))
+
+
+async def swap(db: AsyncSession, run: ReembedRun, limiter: RateLimiter, batch_size: int, attempts: int = 5) -> None:
+    """Replace ``tool_embeddings`` with a table built from the shadow vectors and flip the serving model.
+
+    The replacement table and its indexes are built outside the lock, so
+    the locked transaction only renames tables and indexes: searches read
+    the old vectors (and embed queries with the old model) until it commits,
+    and ingest writes wait only for the rename. Stale rows are caught up
+    before taking the lock; if ingest changed rows in between, the lock is
+    released and the catch-up repeats, up to ``attempts`` times.
+    """
+    await catch_up(db, run, limiter, batch_size)
+    await build_next_table(db)
+    for _ in range(attempts):
+        await catch_up(db, run, limiter, batch_size)
+        await sync_next_table(db)
+        await db.commit()
+        await db.execute(text("LOCK TABLE tools_catalog, tool_embeddings IN SHARE ROW EXCLUSIVE MODE"))
+        if (await db.execute(_stale_query(1))).first() is None:
+            await cut_over(db, run.model)
+            run.status = "completed"
+            run.finished_at = func.now()
+            await db.commit()
+            invalidate_serving_model()
+            await db.execute(text(f"DROP TABLE IF EXISTS {OLD_TABLE}"))
+            await db.commit()
+            return
+        await db.rollback()
+        await db.refresh(run)
+    raise RuntimeError(f"catalog still changing after {attempts} catch-up rounds; swap not done, re-run to resume")
+
+
+async def reembed_catalog(db: AsyncSession, model: str, batch_size: int | None = None, requests_per_minute: int | None = None) -> ReembedRun:
+    """Re-embed every tool with ``model`` and swap it in once complete.
+
+    Safe to interrupt: re-running with the same model resumes after the last
+    committed batch.
+    """
+    batch_size = batch_size or settings.reembed_batch_size
+    limiter = RateLimiter(requests_per_minute or settings.reembed_requests_per_minute)
+    run = await start_or_resume(db, model)
+    run_id = run.id
+    try:
+        await backfill(db, run, limiter, batch_size)
+        await swap(db, run, limiter, batch_size)
+    except Exception as e:
+        await db.rollback()
+        await db.execute(update(ReembedRun).where(ReembedRun.id == run_id).values(error=f"{type(e).__name__}: {e}"))
+        await db.commit()
+        raise
+    return run
@@ -0,0 +1,287 @@
+import asyncio
+import json
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.feature_snapshot import SNAPSHOT_COLUMNS, FeatureSnapshot
+from app.core.gsti_router import GSTIRouter
+from app.db.session import SessionLocal
+from app.models.tables import Assessment, Experiment, OnetCache, ReplayJob, ReplayResult
+from app.schemas.admin import ReplayCreateRequest, ReplayFilters
+
+logger = logging.getLogger(__name__)
+
+_ROUTERS: dict[str, GSTIRouter] = {}
+
+
+def risk_bucket(score: float) -> str:
+    if score >= 70:
+        return "high"
+    if score >= 40:
+        return "medium"
+    return "low"
+
+
+def _init_worker() -> None:
+    # Replays score offline; rows without a feature snapshot skip the semantic layer
+    # rather than calling the embedding provider from pool workers.
+    settings.openai_api_key = None
+
+
+def score_chunk(params_json: str, model_version: str, onet_payloads: dict[str, dict], samples: list[dict]) -> list[dict]:
+    """Re-score one chunk of assessments. Runs inside a pool worker process."""
+    router = _ROUTERS.get(params_json)
+    if router is None:
+        router = _ROUTERS[params_json] = GSTIRouter.from_params(json.loads(params_json) or None)
+
+    rows = []
+    for sample in samples:
+        features = FeatureSnapshot.from_dict(sample["features"])
+        detail = onet_payloads.get(sample["occupation_code"] or "") if features is None else None
+        result = router.evaluate(
+            tasks=sample["tasks"],
+            onet_payload={"detail": detail} if detail else {},
+            model_version=model_version,
+            context=sample["context"],
+            features=features,
+        )
+        baseline = sample["baseline_score"]
+        score = result["score"]
+        rows.append(
+            {
+                "assessment_id": sample["assessment_id"],
+                "baseline_score": baseline,
+                "replay_score": score,
+                "delta": round(score - baseline, 4),
+                "baseline_bucket": risk_bucket(baseline),
+                "replay_bucket": risk_bucket(score),
+                "model_version": result.get("model_version"),
+            }
+        )
+    return rows
+
+
+def _assessment_sample(row) -> dict:
+    user_inputs = (row.input_payload or {}).get("user_inputs", {})
+    features = {name: getattr(row, name) for name in SNAPSHOT_COLUMNS}
+    return {
+        "assessment_id": row.id,
+        "occupation_code": row.occupation_code,
+        "features": features if features["task_hash"] else None,
+        "baseline_score": float(row.risk_score),
+        "tasks": user_inputs.get("tasks_preference") or [],
+        "context": {
+            "industry": user_inputs.get("industry"),
+            "region": user_inputs.get("region"),
+            "selected_tools": user_inputs.get("selected_tools") or [],
+            "occupation_code": row.occupation_code,
+            "occupation_title": row.occupation_title,
+        },
+    }
+
+
+async def _iter_chunks(db: AsyncSession, filters: ReplayFilters, chunk_size: int):
+    stmt = select(
+        Assessment.id,
+        Assessment.occupation_code,
+        Assessment.occupation_title,
+        Assessment.input_payload,
+        Assessment.risk_score,
+        *(getattr(Assessment, name) for name in SNAPSHOT_COLUMNS),
+    ).order_by(Assessment.id)
+    if filters.created_from:
+        stmt = stmt.where(Assessment.created_at >= filters.created_from)
+    if filters.created_to:
+        stmt = stmt.where(Assessment.created_at < filters.created_to)
+    if filters.occupation_codes:
+        stmt = stmt.where(Assessment.occupation_code.in_(filters.occupation_codes))
+
+    last_id = 0
+    remaining = filters.limit
+    while remaining is None or remaining > 0:
+        size = chunk_size if remaining is None else min(chunk_size, remaining)
+        rows = (await db.execute(stmt.where(Assessment.id > last_id).limit(size))).all()
+        if not rows:
+            return
+        last_id = rows[-1].id
+        if remaining is not None:
+            remaining -= len(rows)
+        yield [_assessment_sample(r) for r in rows]
+
+
+async def _load_onet_payloads(db: AsyncSession, cache: dict[str, dict], codes: set[str]) -> dict[str, dict]:
+    missing = [c for c in codes if c not in cache]
+    if missing:
+        rows = (await db.execute(select(OnetCache.occupation_code, OnetCache.payload).where(OnetCache.occupation_code.in_(missing)))).all()
+        for code, payload in rows:
+            cache[code] = payload
+        for code in missing:
+            cache.setdefault(code, {})
+    return {c: cache[c] for c in codes if cache[c]}
+
+
+async def _write_results(db: AsyncSession, job_id: int, done: set[asyncio.Future]) -> int:
+    written = 0
+    for fut in done:
+        rows = [{**row, "job_id": job_id} for row in fut.result()]
+        if not rows:
+            continue
+        stmt = insert(ReplayResult).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["job_id", "assessment_id"],
+            set_={c: stmt.excluded[c] for c in ("baseline_score", "replay_score", "delta", "baseline_bucket", "replay_bucket", "model_version")},
+        )
+        await db.execute(stmt)
+        written += len(rows)
+    await db.execute(update(ReplayJob).where(ReplayJob.id == job_id).values(processed=ReplayJob.processed + written))
+    await db.commit()
+    return written
+
+
+async def summarize_replay(db: AsyncSession, job_id: int) -> dict:
+    """Aggregate drift for a replay job, computed in SQL over replay_results."""
+    shift = (
+        await db.execute(
+            text(
+                """
+                SELECT count(*) AS sample_count,
+                       avg(delta) AS mean_shift,
+                       avg(abs(delta)) AS mean_abs_shift,
+                       percentile_cont(0.5) WITHIN GROUP (ORDER BY delta) AS median_shift,
+                       percentile_cont(0.95) WITHIN GROUP (ORDER BY abs(delta)) AS p95_abs_shift,
+                       max(abs(delta)) AS max_abs_shift
+                FROM replay_results
+                WHERE job_id = :job_id
+                """
+            ),
+            {"job_id": job_id},
+        )
+    ).mappings().one()
+    # Spearman = Pearson over ranks; ties get their average rank.
+    spearman = (
+        await db.execute(
+            text(
+                """
+                SELECT corr(br, rr) FROM (
+                  SELECT rank() OVER (ORDER BY baseline_score) + (count(*) OVER (PARTITION BY baseline_score) - 1) / 2.0 AS br,
+                         rank() OVER (ORDER BY replay_score) + (count(*) OVER (PARTITION BY replay_score) - 1) / 2.0 AS rr
+                  FROM replay_results
+                  WHERE job_id = :job_id
+                ) ranked
+                """
+            ),
+            {"job_id": job_id},
+        )
+    ).scalar_one()
+    migration_rows = (
+        await db.execute(
+            text(
+                """
+                SELECT baseline_bucket, replay_bucket, count(*) AS n
+                FROM replay_results
+                WHERE job_id = :job_id
+                GROUP BY baseline_bucket, replay_bucket
+                """
+            ),
+            {"job_id": job_id},
+        )
+    ).all()
+
+    migration: dict[str, dict[str, int]] = {}
+    migrated = 0
+    for baseline_bucket, replay_bucket, n in migration_rows:
+        migration.setdefault(baseline_bucket, {})[replay_bucket] = n
+        if baseline_bucket != replay_bucket:
+            migrated += n
+
+    def r(value):
+        return round(float(value), 4) if value is not None else None
+
+    count = shift["sample_count"]
+    return {
+        "sample_count": count,
+        "score_shift": {
+            "mean": r(shift["mean_shift"]),
+            "median": r(shift["median_shift"]),
+            "mean_abs": r(shift["mean_abs_shift"]),
+            "p95_abs": r(shift["p95_abs_shift"]),
+            "max_abs": r(shift["max_abs_shift"]),
+        },
+        "spearman": r(spearman),
+        "bucket_migration": migration,
+        "migrated_share": round(migrated / count, 4) if count else None,
+    }
+
+
+async def create_replay_job(db: AsyncSession, body: ReplayCreateRequest) -> ReplayJob:
+    exp = None
+    if body.experiment_id:
+        exp = await db.get(Experiment, body.experiment_id)
+        if exp is None:
+            raise ValueError("Experiment not found")
+    job = ReplayJob(
+        experiment_id=exp.id if exp else None,
+        model_version=body.model_version or (exp.model_version if exp else "auto"),
+        params=body.params if body.params is not None else (exp.params if exp else {}),
+        filters=body.filters.model_dump(mode="json", exclude_none=True),
+    )
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    return job
+
+
+async def run_replay(job_id: int, workers: int | None = None, chunk_size: int | None = None) -> dict | None:
+    """Re-score every assessment matched by the job's filters.
+
+    Chunks are read in id order and scored in a process pool while the next
+    chunk is loaded. Assessments with a feature snapshot are scored from it;
+    older rows fall back to ``onet_cache`` payloads, read once per occupation
+    and reused across chunks.
+    """
+    workers = workers or settings.replay_workers
+    chunk_size = chunk_size or settings.replay_chunk_size
+
+    async with SessionLocal() as db:
+        job = await db.get(ReplayJob, job_id)
+        if job is None:
+            raise ValueError(f"Replay job {job_id} not found")
+        params_json = json.dumps(job.params or {}, sort_keys=True)
+        model_version = job.model_version
+        filters = ReplayFilters.model_validate(job.filters or {})
+        await db.execute(update(ReplayJob).where(ReplayJob.id == job_id).values(status="running", processed=0, error=None, started_at=func.now()))
+        await db.commit()
+
+        loop = asyncio.get_running_loop()
+        onet_cache: dict[str, dict] = {}
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker) as pool:
+                in_flight: set[asyncio.Future] = set()
+                async for samples in _iter_chunks(db, filters, chunk_size):
+                    codes = {s["occupation_code"] for s in samples if s["occupation_code"] and s["features"] is None}
+                    payloads = await _load_onet_payloads(db, onet_cache, codes)
+                    in_flight.add(loop.run_in_executor(pool, score_chunk, params_json, model_version, payloads, samples))
+                    if len(in_flight) >= workers * 2:
+                        done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                        await _write_results(db, job_id, done)
+                if in_flight:
+                    done, _ = await asyncio.wait(in_flight)
+                    await _write_results(db, job_id, done)
+
+            summary = await summarize_replay(db, job_id)
+        except Exception as e:
+            logger.exception("Replay failed", extra={"request_id": "system"})
+            await db.rollback()
+            await db.execute(update(ReplayJob).where(ReplayJob.id == job_id).values(status="failed", error=str(e), finished_at=func.now()))
+            await db.commit()
+            return None
+
+        await db.execute(update(ReplayJob).where(ReplayJob.id == job_id).values(status="completed", summary=summary, finished_at=func.now()))
+        await db.commit()
+        return summary
@@ -0,0 +1,362 @@
+import fcntl
+import json
+import os
+import shutil
+import time
+import uuid
+from collections.abc import Collection
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.tables import ToolCatalog, ToolEmbedding
+
+MANIFEST = "manifest.json"
+
+
+@dataclass
+class _Segment:
+    name: str
+    ids: np.ndarray
+    vectors: np.ndarray
+    tools: list[dict]
+    bitmap_keys: dict[str, int]
+    bitmaps: np.ndarray
+    centroids: np.ndarray | None
+    offsets: np.ndarray | None
+    live: np.ndarray
+
+    def filter_mask(self, filters: dict | None) -> np.ndarray:
+        mask = self.live.copy()
+        if not filters:
+            return mask
+        n = len(self.ids)
+        if filters.get("source"):
+            mask &= self._bitmap(f"source:{filters['source']}", n)
+        if filters.get("tags"):
+            any_tag = np.zeros(n, dtype=bool)
+            for tag in filters["tags"]:
+                any_tag |= self._bitmap(f"tag:{tag}", n)
+            mask &= any_tag
+        return mask
+
+    def _bitmap(self, key: str, n: int) -> np.ndarray:
+        idx = self.bitmap_keys.get(key)
+        if idx is None:
+            return np.zeros(n, dtype=bool)
+        return np.unpackbits(self.bitmaps[idx], count=n).astype(bool)
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (vectors / norms).astype(np.float32)
+
+
+def _kmeans(vectors: np.ndarray, nlist: int, iterations: int = 8, sample: int = 50_000) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    train = vectors[rng.choice(len(vectors), size=min(sample, len(vectors)), replace=False)]
+    centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+    for _ in range(iterations):
+        assign = np.argmax(train @ centroids.T, axis=1)
+        for c in range(nlist):
+            members = train[assign == c]
+            if len(members):
+                centroids[c] = members.mean(axis=0)
+        centroids = _normalize_rows(centroids)
+    return centroids
+
+
+def _collect(seg: _Segment, start: int, end: int, mask: np.ndarray, queries: np.ndarray, top_k: int, out: list[list[tuple[float, dict]]]) -> None:
+    """Keep the top-k rows of ``start:end`` that pass ``mask``.
+
+    The slice of the memory map is a view, so the rows are scored where they
+    lie instead of being copied out first; masked rows score ``-inf``.
+    """
+    allowed = mask[start:end]
+    n = int(allowed.sum())
+    if not n:
+        return
+    scores = queries @ seg.vectors[start:end].T
+    if n < end - start:
+        scores[:, ~allowed] = -np.inf
+    k = min(top_k, n)
+    best = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    for qi, cols in enumerate(best):
+        out[qi].extend((float(scores[qi, c]), seg.tools[start + c]) for c in cols)
+
+
+def write_segment(root: Path, ids: np.ndarray, vectors: np.ndarray, tools: list[dict], ivf_min_rows: int | None = None) -> str:
+    """Write an immutable segment; rows are grouped by IVF list when large enough."""
+    ivf_min_rows = settings.vector_index_ivf_min_rows if ivf_min_rows is None else ivf_min_rows
+    name = f"seg-{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
+    path = root / name
+    path.mkdir(parents=True)
+
+    vectors = _normalize_rows(np.asarray(vectors, dtype=np.float32))
+    ids = np.asarray(ids, dtype=np.int64)
+    centroids = offsets = None
+    if len(ids) >= ivf_min_rows:
+        nlist = max(1, int(np.sqrt(len(ids))))
+        centroids = _kmeans(vectors, nlist)
+        assign = np.concatenate([np.argmax(vectors[i:i + 65536] @ centroids.T, axis=1) for i in range(0, len(vectors), 65536)])
+        order = np.argsort(assign, kind="stable")
+        ids, vectors, tools = ids[order], vectors[order], [tools[i] for i in order]
+        offsets = np.searchsorted(assign[order], np.arange(nlist + 1)).astype(np.int64)
+        np.save(path / "centroids.npy", centroids)
+        np.save(path / "offsets.npy", offsets)
+
+    keys: dict[str, int] = {}
+    rows: list[np.ndarray] = []
+    for i, tool in enumerate(tools):
+        for key in [f"source:{tool.get('source')}", *(f"tag:{t}" for t in tool.get("tags") or [])]:
+            if key not in keys:
+                keys[key] = len(rows)
+                rows.append(np.zeros(len(ids), dtype=bool))
+            rows[keys[key]][i] = True
+    bitmaps = np.stack([np.packbits(r) for r in rows]) if rows else np.zeros((0, (len(ids) + 7) // 8), dtype=np.uint8)
+
+    np.save(path / "ids.npy", ids)
+    np.save(path / "vectors.npy", vectors)
+    np.save(path / "bitmaps.npy", bitmaps)
+    (path / "meta.json").write_text(json.dumps({"tools": tools, "bitmap_keys": keys}, ensure_ascii=False), encoding="utf-8")
+    return name
+
+
+def _load_segment(root: Path, name: str) -> _Segment:
+    path = root / name
+    meta = json.loads((path / "meta.json").read_text(encoding="utf-8"))
+    ids = np.load(path / "ids.npy")
+    has_ivf = (path / "centroids.npy").exists()
+    return _Segment(
+        name=name,
+        ids=ids,
+        vectors=np.load(path / "vectors.npy", mmap_mode="r"),
+        tools=meta["tools"],
+        bitmap_keys=meta["bitmap_keys"],
+        bitmaps=np.load(path / "bitmaps.npy"),
+        centroids=np.load(path / "centroids.npy") if has_ivf else None,
+        offsets=np.load(path / "offsets.npy") if has_ivf else None,
+        live=np.ones(len(ids), dtype=bool),
+    )
+
+
+def _live_masks(segments: list[_Segment]) -> list[np.ndarray]:
+    """Newest segment wins for a tool id."""
+    masks: list[np.ndarray] = []
+    seen = np.zeros(0, dtype=np.int64)
+    for seg in reversed(segments):
+        masks.append(~np.isin(seg.ids, seen))
+        seen = np.union1d(seen, seg.ids)
+    return masks[::-1]
+
+
+class ToolVectorIndex:
+    """In-process tool search over memory-mapped embedding segments.
+
+    The index is a manifest of immutable segments on disk. Ingest appends a
+    small segment and rewrites the manifest; every worker memory-maps the same
+    files and picks up new manifests within ``vector_index_refresh_s``. A tool
+    id present in a newer segment masks its older rows. Large segments are
+    searched through IVF lists, small ones by brute-force matrix product.
+
+    Every manifest change happens under a file lock against the manifest read
+    inside it. Segments that drop out of the manifest are deleted only after
+    ``vector_index_retire_grace_s``, so readers on an older manifest can still
+    map them.
+    """
+
+    def __init__(self, root: str | Path | None = None) -> None:
+        self.root = Path(root or settings.vector_index_dir)
+        self._segments: list[_Segment] = []
+        self._manifest_mtime: float | None = None
+        self._checked_at = 0.0
+
+    @property
+    def loaded(self) -> bool:
+        return self._manifest_mtime is not None
+
+    def __len__(self) -> int:
+        return int(sum(seg.live.sum() for seg in self._segments))
+
+    def _read_doc(self) -> dict:
+        path = self.root / MANIFEST
+        if not path.exists():
+            return {"segments": [], "retired": []}
+        return json.loads(path.read_text(encoding="utf-8"))
+
+    def _read_manifest(self) -> list[str]:
+        return self._read_doc()["segments"]
+
+    def _write_manifest(self, segments: list[str], retired: list[dict]) -> None:
+        tmp = self.root / f".{MANIFEST}.{os.getpid()}"
+        tmp.write_text(json.dumps({"segments": segments, "retired": retired, "updated_at": time.time()}), encoding="utf-8")
+        os.replace(tmp, self.root / MANIFEST)
+
+    @contextmanager
+    def _locked(self):
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.root / ".lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            yield
+
+    def _publish(self, segments: list[str], retire: Collection[str] = ()) -> None:
+        """Write the manifest and delete segments retired longer than the grace period.
+
+        Must be called under ``_locked``.
+        """
+        now = time.time()
+        grace = settings.vector_index_retire_grace_s
+        retired = [r for r in self._read_doc().get("retired", []) if r["name"] not in segments]
+        retired += [{"name": name, "at": now} for name in retire if name not in segments]
+        keep = [r for r in retired if now - r["at"] < grace]
+        self._write_manifest(segments, keep)
+        referenced = set(segments) | {r["name"] for r in keep}
+        for path in self.root.glob("seg-*"):
+            # Includes orphans from a writer that died before publishing.
+            if path.name not in referenced and now - path.stat().st_mtime >= grace:
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _segments_for(self, names: list[str]) -> list[_Segment]:
+        by_name = {seg.name: seg for seg in self._segments}
+        return [by_name.get(name) or _load_segment(self.root, name) for name in names]
+
+    def load(self) -> bool:
+        path = self.root / MANIFEST
+        for _ in range(3):
+            if not path.exists():
+                return False
+            mtime = path.stat().st_mtime
+            try:
+                segments = self._segments_for(self._read_manifest())
+            except FileNotFoundError:
+                # A segment retired after a long stall; the next manifest no longer lists it.
+                continue
+            for seg, live in zip(segments, _live_masks(segments)):
+                seg.live = live
+            self._segments = segments
+            self._manifest_mtime = mtime
+            self._checked_at = time.monotonic()
+            return True
+        return self.loaded
+
+    def maybe_reload(self) -> None:
+        if time.monotonic() - self._checked_at < settings.vector_index_refresh_s:
+            return
+        self._checked_at = time.monotonic()
+        path = self.root / MANIFEST
+        if path.exists() and path.stat().st_mtime != self._manifest_mtime:
+            self.load()
+
+    def add(self, ids: list[int], vectors: list[list[float]], tools: list[dict], replaces: Collection[str] | None = None) -> str:
+        """Append a segment, or publish it in place of the segments named in ``replaces``.
+
+        Segments other workers published meanwhile stay in the manifest, after
+        the new one (they are newer).
+        """
+        with self._locked():
+            name = write_segment(self.root, np.asarray(ids), np.asarray(vectors, dtype=np.float32), tools)
+            current = self._read_manifest()
+            if replaces is None:
+                self._publish([*current, name])
+            else:
+                self._publish([name, *(n for n in current if n not in replaces)], retire=[n for n in current if n in replaces])
+        self.load()
+        if replaces is None and len(self._segments) > settings.vector_index_max_segments:
+            self.compact(min_segments=settings.vector_index_max_segments + 1)
+        return name
+
+    def compact(self, min_segments: int = 2) -> None:
+        """Merge the segments of the current manifest into one.
+
+        The manifest is re-read under the lock, so a worker whose view is
+        stale neither drops segments appended since nor repeats a compaction
+        another worker already did.
+        """
+        with self._locked():
+            names = self._read_manifest()
+            if len(names) < min_segments:
+                return
+            segments = self._segments_for(names)
+            ids, vectors, tools = [], [], []
+            for seg, live in zip(segments, _live_masks(segments)):
+                rows = np.flatnonzero(live)
+                ids.append(seg.ids[rows])
+                vectors.append(np.asarray(seg.vectors[rows]))
+                tools.extend(seg.tools[i] for i in rows)
+            name = write_segment(self.root, np.concatenate(ids), np.concatenate(vectors), tools)
+            self._publish([name], retire=names)
+        self.load()
+
+    def search(self, embedding: list[float], top_k: int, filters: dict | None = None) -> list[dict]:
+        return self.search_many([embedding], top_k, filters)[0]
+
+    def search_many(self, embeddings: list[list[float]], top_k: int, filters: dict | None = None) -> list[list[dict]]:
+        """Top-k per query; flat segments score all queries in one matrix product.
+
+        CPU-bound: async callers run it through ``asyncio.to_thread``.
+        """
+        self.maybe_reload()
+        queries = _normalize_rows(np.atleast_2d(np.asarray(embeddings, dtype=np.float32)))
+        candidates: list[list[tuple[float, dict]]] = [[] for _ in range(len(queries))]
+        for seg in self._segments:
+            mask = seg.filter_mask(filters)
+            if seg.centroids is None:
+                _collect(seg, 0, len(seg.ids), mask, queries, top_k, candidates)
+                continue
+            probes = np.argsort(-(queries @ seg.centroids.T), axis=1)[:, : settings.vector_index_nprobe]
+            for qi, probe in enumerate(probes):
+                # IVF lists are contiguous row ranges.
+                for c in probe:
+                    _collect(seg, int(seg.offsets[c]), int(seg.offsets[c + 1]), mask, queries[qi : qi + 1], top_k, candidates[qi : qi + 1])
+
+        results = []
+        for found in candidates:
+            found.sort(key=lambda c: c[0], reverse=True)
+            results.append(
+                [
+                    {
+                        "tool_id": tool["tool_id"],
+                        "name": tool["name"],
+                        "description": tool["description"],
+                        "url": tool["url"],
+                        "tags": tool["tags"],
+                        "score": score,
+                    }
+                    for score, tool in found[:top_k]
+                ]
+            )
+        return results
+
+    async def build_from_db(self, db: AsyncSession, batch_size: int = 5000) -> int:
+        stmt = (
+            select(ToolEmbedding.tool_id, ToolEmbedding.embedding, ToolCatalog.name, ToolCatalog.description, ToolCatalog.url, ToolCatalog.tags, ToolCatalog.source)
+            .join(ToolCatalog, ToolCatalog.id == ToolEmbedding.tool_id)
+            .order_by(ToolEmbedding.tool_id)
+            .execution_options(yield_per=batch_size)
+        )
+        # Only what is published now is replaced; segments appended while the
+        # table streams are newer than the snapshot and are kept.
+        snapshot = self._read_manifest()
+        ids, vectors, tools = [], [], []
+        result = await db.stream(stmt)
+        async for row in result:
+            ids.append(row.tool_id)
+            vectors.append(np.asarray(row.embedding, dtype=np.float32))
+            tools.append(tool_record(row.tool_id, row.name, row.description, row.url, row.tags, row.source))
+        if not ids:
+            return 0
+        self.add(ids, np.stack(vectors), tools, replaces=snapshot)
+        return len(ids)
+
+
+def tool_record(tool_id: int, name: str, description: str, url: str, tags: list | None, source: str | None) -> dict:
+    return {"tool_id": tool_id, "name": name, "description": description, "url": url, "tags": list(tags or []), "source": source}
+
+
+tool_index = ToolVectorIndex()
@@ -0,0 +1,108 @@
+"""Start-up warm-up and readiness.
+
+The lifespan runs :func:`warm_up` in the background and ``/ready`` answers 503
+until it finishes, so a new pod only takes traffic once its pool connections,
+routers, anchor vectors and HTTP clients are in place. ``/health`` stays a
+plain liveness check. Only the database is required; the other steps are
+best effort and fall back to their lazy paths when they fail.
+"""
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+from app.core.config import settings
+from app.core.gsti_router import router_for
+from app.core.metrics import timed
+from app.core.semantic_features import warm_anchor_vectors
+from app.db.session import SessionLocal, warm_pool
+from app.services.embeddings import init_embedding_client
+from app.services.experiments import experiment_cache
+from app.services.lexical_index import lexical_index
+from app.services.onet import onet_client
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Readiness:
+    ready: bool = False
+    # step -> "ok" | "skipped" | "failed: <error>"
+    steps: dict[str, str] = field(default_factory=dict)
+    started_at: float = field(default_factory=time.monotonic)
+    ready_after_s: float | None = None
+
+    def reset(self) -> None:
+        self.ready = False
+        self.steps = {}
+        self.started_at = time.monotonic()
+        self.ready_after_s = None
+
+    def mark_ready(self) -> None:
+        self.ready = True
+        self.ready_after_s = round(time.monotonic() - self.started_at, 3)
+
+    def snapshot(self) -> dict:
+        return {"status": "ready" if self.ready else "warming", "ready_after_s": self.ready_after_s, "steps": dict(self.steps)}
+
+
+readiness = Readiness()
+
+
+async def _run_step(name: str, step: Callable[[], Awaitable[object]], timeout_s: float | None = None) -> bool:
+    try:
+        with timed(f"warmup_{name}"):
+            result = await asyncio.wait_for(step(), timeout_s)
+    except Exception as e:
+        readiness.steps[name] = f"failed: {type(e).__name__}"
+        logger.warning("Warm-up step %s failed: %s", name, e, extra={"request_id": "system"})
+        return False
+    readiness.steps[name] = "skipped" if result is False else "ok"
+    return True
+
+
+async def warm_db_pool() -> int:
+    return await warm_pool(settings.warmup_db_connections)
+
+
+async def warm_routers() -> int:
+    """Build the default router and one per active experiment."""
+    router_for(None)
+    async with SessionLocal() as db:
+        await experiment_cache.reload(db)
+    experiments = experiment_cache.active()
+    for exp in experiments:
+        router_for(exp.params)
+    return len(experiments)
+
+
+async def warm_http_clients() -> None:
+    init_embedding_client()
+    onet_client.client()
+
+
+async def warm_anchors() -> bool:
+    return await asyncio.to_thread(warm_anchor_vectors, None, settings.warmup_step_timeout_s)
+
+
+async def warm_lexical_index() -> None:
+    async with SessionLocal() as db:
+        await lexical_index.refresh(db)
+
+
+async def warm_up() -> None:
+    """Run every warm-up step, retrying the database until it answers, then flip readiness."""
+    readiness.reset()
+    while not await _run_step("db_pool", warm_db_pool):
+        await asyncio.sleep(settings.warmup_retry_interval_s)
+    # Best-effort steps are bounded so a hanging dependency cannot hold /ready at 503.
+    timeout_s = settings.warmup_step_timeout_s
+    await _run_step("http_clients", warm_http_clients, timeout_s)
+    await asyncio.gather(
+        _run_step("routers", warm_routers, timeout_s),
+        _run_step("anchor_vectors", warm_anchors, timeout_s),
+        _run_step("lexical_index", warm_lexical_index, timeout_s),
+    )
+    readiness.mark_ready()
+    logger.info("Warm-up finished in %.2fs: %s", readiness.ready_after_s, readiness.steps, extra={"request_id": "system"})
@@ -0,0 +1,33 @@
+from typing import Any
+
+import orjson
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+
+def _default(value: Any) -> Any:
+    if hasattr(value, "model_dump"):
+        return value.model_dump(mode="json")
+    return str(value)
+
+
+def dumps(data: Any) -> bytes:
+    """orjson-encode plain data (datetimes become ISO strings, unknown types ``str``)."""
+    return orjson.dumps(data, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def sse_pack(event: str, data: Any) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+def adapter_response(adapter: TypeAdapter, payload: Any, status_code: int = 200, exclude: set[str] | None = None) -> Response:
+    """Validate engine output against the response schema and encode it in one pass.
+
+    Unknown keys are dropped exactly as ``response_model`` would. The payload
+    is validated into the schema's model objects once and those are written
+    straight to JSON bytes by pydantic-core, skipping FastAPI's second
+    validation and ``jsonable_encoder`` dict round-trip. ``exclude`` omits
+    top-level fields entirely rather than emitting them as null.
+    """
+    content = adapter.dump_json(adapter.validate_python(payload), exclude=exclude)
+    return Response(content=content, status_code=status_code, media_type="application/json")
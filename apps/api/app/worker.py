@@ -0,0 +1,98 @@
+"""Background job worker.
+
+    python -m app.worker [--types embed_tools,onet_prefetch]
+
+Run as many processes as needed; jobs are claimed with ``FOR UPDATE SKIP
+LOCKED`` and per-type concurrency limits hold across all of them.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import socket
+
+from app.core.config import settings
+from app.core.logging import setup_logging
+from app.db.session import SessionLocal
+from app.services import ingest, onet  # noqa: F401  (registers job handlers)
+from app.services.embeddings import watch_serving_model
+from app.services.jobs import JOB_HANDLERS, ClaimedJob, JobLockLost, claim, concurrency_limit, mark_failed, mark_succeeded
+
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+async def run_job(job: ClaimedJob) -> None:
+    handler = JOB_HANDLERS[job.job_type]
+    try:
+        async with SessionLocal() as db:
+            result = await handler(db, job.payload)
+            await mark_succeeded(db, job, result)
+            await db.commit()
+    except JobLockLost:
+        # The session closes without committing, so the handler's writes are dropped too.
+        logger.warning("Job %s (%s) was reclaimed by another worker; discarding this run", job.id, job.job_type, extra={"request_id": "system"})
+    except Exception as e:
+        logger.exception("Job %s (%s) failed", job.id, job.job_type, extra={"request_id": "system"})
+        async with SessionLocal() as db:
+            status = await mark_failed(db, job, f"{type(e).__name__}: {e}")
+            await db.commit()
+        if status == "lost":
+            logger.warning("Job %s (%s) was reclaimed by another worker; not recording this failure", job.id, job.job_type, extra={"request_id": "system"})
+        elif status == "failed":
+            logger.error("Job %s (%s) gave up after %s attempts", job.id, job.job_type, job.attempts, extra={"request_id": "system"})
+
+
+async def poll_type(job_type: str, worker_id: str, stop: asyncio.Event) -> None:
+    """Keep up to the type's concurrency limit of jobs running in this process."""
+    running: set[asyncio.Task] = set()
+    while not stop.is_set():
+        free = concurrency_limit(job_type) - len(running)
+        claimed: list[ClaimedJob] = []
+        if free > 0:
+            try:
+                async with SessionLocal() as db:
+                    claimed = await claim(db, job_type, free, worker_id)
+            except Exception:
+                logger.exception("Claiming %s jobs failed", job_type, extra={"request_id": "system"})
+        for job in claimed:
+            task = asyncio.create_task(run_job(job))
+            running.add(task)
+            task.add_done_callback(running.discard)
+        if not claimed:
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=settings.job_poll_interval_s)
+            except asyncio.TimeoutError:
+                pass
+        elif len(running) >= concurrency_limit(job_type):
+            await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+    if running:
+        await asyncio.wait(running)
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--types", default=None, help="comma-separated job types (default: all registered)")
+    args = parser.parse_args()
+    job_types = [t.strip() for t in args.types.split(",")] if args.types else sorted(JOB_HANDLERS)
+    unknown = set(job_types) - set(JOB_HANDLERS)
+    if unknown:
+        parser.error(f"unknown job types: {', '.join(sorted(unknown))}")
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("Worker %s polling %s", worker_id, ", ".join(job_types), extra={"request_id": "system"})
+    model_watch = asyncio.create_task(watch_serving_model())
+    # In-flight jobs finish before exit; jobs killed mid-run are reclaimed after JOB_LOCK_TIMEOUT_S.
+    await asyncio.gather(*(poll_type(t, worker_id, stop) for t in job_types))
+    model_watch.cancel()
+    await asyncio.gather(model_watch, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
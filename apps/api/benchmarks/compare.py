@@ -0,0 +1,65 @@
+"""Compare a benchmark run against a stored baseline.
+
+    python -m benchmarks.compare baseline.json bench.json --threshold 0.10
+
+Exits 1 when any case got slower than ``threshold`` (a fraction of the
+baseline) on the chosen statistic, so it can gate CI.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.10, stat: str = "median") -> list[dict]:
+    """One row per case present in either run; ``status`` is regression/improvement/ok/new/missing."""
+    base_results = baseline.get("results", {})
+    current_results = current.get("results", {})
+    rows = []
+    for name in sorted(set(base_results) | set(current_results)):
+        before = base_results.get(name, {}).get(stat)
+        after = current_results.get(name, {}).get(stat)
+        if before is None or after is None:
+            rows.append({"name": name, "before": before, "after": after, "change": None, "status": "new" if before is None else "missing"})
+            continue
+        change = (after - before) / before if before else 0.0
+        if change > threshold:
+            status = "regression"
+        elif change < -threshold:
+            status = "improvement"
+        else:
+            status = "ok"
+        rows.append({"name": name, "before": before, "after": after, "change": change, "status": status})
+    return rows
+
+
+def _us(value: float | None) -> str:
+    return "-" if value is None else f"{value * 1e6:.1f}"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    parser.add_argument("--threshold", type=float, default=0.10, help="allowed slowdown as a fraction (0.10 = 10%%)")
+    parser.add_argument("--stat", choices=["min", "median", "mean"], default="median")
+    args = parser.parse_args()
+
+    rows = compare(
+        json.loads(args.baseline.read_text(encoding="utf-8")),
+        json.loads(args.current.read_text(encoding="utf-8")),
+        args.threshold,
+        args.stat,
+    )
+    print(f"{'case':<45} {'before us':>12} {'after us':>12} {'change':>8}  status")
+    for row in rows:
+        change = "-" if row["change"] is None else f"{row['change']:+.1%}"
+        print(f"{row['name']:<45} {_us(row['before']):>12} {_us(row['after']):>12} {change:>8}  {row['status']}")
+    if any(row["status"] == "regression" for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""Deterministic synthetic inputs for the GSTI benchmarks.
+
+Every generator takes a ``seed`` so two runs (and two machines) time exactly
+the same work.
+"""
+from __future__ import annotations
+
+import random
+
+from app.core.config_models import GSTIv0Config, GSTIv0FactorConfig
+from app.core.gsti_v0 import DEFAULT_FACTOR_CONFIG
+from app.core.onet_features import FEATURE_MAP
+
+ENDPOINTS = sorted({endpoint for config in FEATURE_MAP.values() for endpoint in config["endpoints"]})
+ALIASES = [alias for config in FEATURE_MAP.values() for alias in config["aliases"]]
+DEFAULT_KEYWORDS = [keyword for factor in DEFAULT_FACTOR_CONFIG.values() for keyword in factor["keywords"]]
+
+VERBS = ["prepare", "review", "coordinate", "record", "analyze", "inspect", "negotiate", "design", "monitor", "assist", "calculate", "train"]
+OBJECTS = ["reports", "client accounts", "equipment", "budgets", "patient records", "schedules", "contracts", "shipments", "staff", "data"]
+QUALIFIERS = ["daily", "according to regulations", "for management", "using software", "with customers", "on site", "in teams"]
+
+PAYLOAD_SHAPES = ("shallow", "deep", "huge")
+
+
+def _descriptor(rng: random.Random, matching: bool) -> dict:
+    name = rng.choice(ALIASES).title() if matching else f"Descriptor {rng.randrange(10_000)}"
+    return {"name": name, "value": round(rng.uniform(0, 100), 2), "scale": {"min": 0, "max": 100}}
+
+
+def onet_payload(shape: str, seed: int = 0) -> dict:
+    """An O*NET-like payload.
+
+    ``shallow``: one section per endpoint, a handful of descriptors each (a
+    typical detail response). ``deep``: the same descriptors nested several
+    levels down. ``huge``: thousands of descriptors, most of them irrelevant.
+    """
+    rng = random.Random(seed)
+    if shape == "shallow":
+        return {"detail": {endpoint: [_descriptor(rng, i % 2 == 0) for i in range(6)] for endpoint in ENDPOINTS}}
+    if shape == "deep":
+        detail = {}
+        for endpoint in ENDPOINTS:
+            node: dict = {"element": [_descriptor(rng, True) for _ in range(4)]}
+            for level in range(8):
+                node = {f"group_{level}": node, "meta": {"level": level, "note": "x" * 16}}
+            detail[endpoint] = node
+        return {"detail": detail, "summary": {"task_statements": [{"task": task} for task in task_list(20, seed)]}}
+    if shape == "huge":
+        return {"detail": {endpoint: [_descriptor(rng, i % 25 == 0) for i in range(600)] for endpoint in ENDPOINTS}}
+    raise ValueError(f"unknown payload shape: {shape}")
+
+
+def task_list(count: int, seed: int = 0) -> list[str]:
+    """``count`` task statements built from a small vocabulary, some of which hit v0 keywords."""
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        parts = [rng.choice(VERBS), rng.choice(OBJECTS), rng.choice(QUALIFIERS)]
+        if i % 3 == 0:
+            parts.append(rng.choice(DEFAULT_KEYWORDS))
+        tasks.append(" ".join(parts).capitalize())
+    return tasks
+
+
+def keyword_config(term_count: int, seed: int = 0) -> GSTIv0Config:
+    """The default v0 factors with ``term_count`` keywords spread across them."""
+    rng = random.Random(seed)
+    factors = list(DEFAULT_FACTOR_CONFIG)
+    keywords: dict[str, list[str]] = {factor: [] for factor in factors}
+    for i in range(term_count):
+        term = DEFAULT_KEYWORDS[i] if i < len(DEFAULT_KEYWORDS) else f"{rng.choice(VERBS)} term{i}"
+        keywords[factors[i % len(factors)]].append(term)
+    return GSTIv0Config(
+        factors={
+            factor: GSTIv0FactorConfig(weight=config["weight"], direction=config["direction"], keywords=keywords[factor])
+            for factor, config in DEFAULT_FACTOR_CONFIG.items()
+        }
+    )
+
+
+def router_params(term_count: int, seed: int = 0) -> dict:
+    """Experiment-style params overriding v0 keywords and a few v1 weights."""
+    return {
+        "v0": keyword_config(term_count, seed).model_dump(),
+        "v1": {"top_level_weights": {"automation_susceptibility": 0.4, "human_advantage": 0.3, "responsibility_constraints": 0.15, "trend_modifier": 0.15}},
+    }
@@ -0,0 +1,163 @@
+"""Time the GSTI engines and feature extractors on synthetic inputs.
+
+    python -m benchmarks.run --out bench.json
+    python -m benchmarks.run --filter v0. --repeat 9
+
+Each case is timed ``--repeat`` times; a repeat runs the call enough times to
+last at least ``--min-time`` seconds. Results are seconds per call.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from app.core.calibration import calibrate
+from app.core.detail import ALL_PARTS
+from app.core.feature_snapshot import FeatureSnapshot
+from app.core.gsti_router import GSTIRouter, router_for
+from app.core.gsti_v0 import GSTIv0Engine
+from app.core.gsti_v1 import GSTIv1Engine
+from app.core.onet_features import extract_onet_numeric_features
+from benchmarks.generators import PAYLOAD_SHAPES, keyword_config, onet_payload, router_params, task_list
+
+TASK_COUNTS = (1, 10, 100, 500)
+KEYWORD_COUNTS = (10, 100, 1_000, 10_000)
+
+
+def _v0_cases() -> dict[str, Callable[[], object]]:
+    cases = {}
+    engine = GSTIv0Engine()
+    for count in TASK_COUNTS:
+        tasks = task_list(count)
+        cases[f"v0.calculate_risk/tasks={count}"] = lambda tasks=tasks: engine.calculate_risk(tasks)
+    tasks = task_list(100)
+    for count in KEYWORD_COUNTS:
+        keyed = GSTIv0Engine(config=keyword_config(count))
+        cases[f"v0.calculate_risk/keywords={count}"] = lambda keyed=keyed: keyed.calculate_risk(tasks)
+    cases["v0.calculate_risk/tasks=100,minimal"] = lambda: engine.calculate_risk(tasks, parts=frozenset())
+    return cases
+
+
+def _onet_cases() -> dict[str, Callable[[], object]]:
+    return {
+        f"onet_features/{shape}": (lambda payload=onet_payload(shape): extract_onet_numeric_features(payload))
+        for shape in PAYLOAD_SHAPES
+    }
+
+
+def _v1_cases() -> dict[str, Callable[[], object]]:
+    # The semantic layer is left out so the timing never reaches the embedding
+    # provider: "precomputed" scores a captured snapshot, the payload cases
+    # also extract the O*NET features on every call, as evaluate() does.
+    engine = GSTIv1Engine()
+    context = {"industry": "finance", "region": "singapore", "selected_tools": ["chatgpt", "excel"]}
+    tasks = task_list(100)
+    features = FeatureSnapshot.capture(tasks, extract_onet_numeric_features(onet_payload("shallow")))
+    cases: dict[str, Callable[[], object]] = {
+        "v1.evaluate/precomputed": lambda: engine.evaluate(tasks, None, context=context, features=features, parts=ALL_PARTS)
+    }
+    for shape in PAYLOAD_SHAPES:
+        payload = onet_payload(shape)
+        cases[f"v1.evaluate/{shape}"] = lambda payload=payload: engine.evaluate(
+            tasks, None, context=context, features=FeatureSnapshot.capture(tasks, extract_onet_numeric_features(payload))
+        )
+    return cases
+
+
+def _router_cases() -> dict[str, Callable[[], object]]:
+    cases: dict[str, Callable[[], object]] = {"router.from_params/default": lambda: GSTIRouter.from_params(None)}
+    for count in (10, 10_000):
+        params = router_params(count)
+        cases[f"router.from_params/keywords={count}"] = lambda params=params: GSTIRouter.from_params(params)
+        cases[f"router.router_for/keywords={count}"] = lambda params=params: router_for(params)
+    return cases
+
+
+def _calibration_cases() -> dict[str, Callable[[], object]]:
+    raws = [i / 100 for i in range(101)]
+    return {"calibrate/x101": lambda: [calibrate(raw) for raw in raws]}
+
+
+def build_cases() -> dict[str, Callable[[], object]]:
+    return {**_v0_cases(), **_onet_cases(), **_v1_cases(), **_router_cases(), **_calibration_cases()}
+
+
+def time_case(fn: Callable[[], object], repeat: int, min_time: float) -> dict:
+    """Seconds per call over ``repeat`` rounds, each sized to last ``min_time``."""
+    number = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_time:
+            break
+        number *= 2 if elapsed == 0 else max(2, min(10, int(min_time / elapsed) + 1))
+    rounds = [elapsed / number]
+    for _ in range(repeat - 1):
+        started = time.perf_counter()
+        for _ in range(number):
+            fn()
+        rounds.append((time.perf_counter() - started) / number)
+    return {
+        "number": number,
+        "min": min(rounds),
+        "median": statistics.median(rounds),
+        "mean": statistics.fmean(rounds),
+        "stdev": statistics.stdev(rounds) if len(rounds) > 1 else 0.0,
+    }
+
+
+def _git_revision() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(name_filter: str | None = None, repeat: int = 5, min_time: float = 0.05) -> dict:
+    results = {}
+    for name, fn in build_cases().items():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = time_case(fn, repeat, min_time)
+        print(f"{name:<45} {results[name]['median'] * 1e6:>12.1f} us", file=sys.stderr)
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "git": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "min_time": min_time,
+        },
+        "results": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", type=Path, default=None, help="write results JSON here (default: stdout)")
+    parser.add_argument("--filter", dest="name_filter", default=None, help="only cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.05, help="minimum seconds per round")
+    args = parser.parse_args()
+
+    report = run(args.name_filter, max(args.repeat, 1), args.min_time)
+    text = json.dumps(report, indent=2)
+    if args.out:
+        args.out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
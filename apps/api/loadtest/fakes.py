@@ -0,0 +1,219 @@
+"""Local stand-ins for O*NET Web Services and the OpenAI embeddings API.
+
+    python -m loadtest.fakes onet --port 9001 --latency-ms 120 --error-rate 0.02
+    python -m loadtest.fakes embeddings --port 9002 --latency-ms 60 --latency-dist exponential
+
+Point the API at them with ``ONET_BASE_URL=http://localhost:9001`` and
+``OPENAI_BASE_URL=http://localhost:9002/v1`` (any non-empty
+``OPENAI_API_KEY``). Responses are deterministic per occupation code / input
+text. Latency and errors are drawn per request from the fault profile, which
+can be changed while running with ``PUT /_fault``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import math
+import random
+from dataclasses import asdict, dataclass, field
+from functools import lru_cache
+from typing import Literal
+
+import numpy as np
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from benchmarks.generators import onet_payload, task_list
+
+EMBEDDING_DIM = 1536
+LatencyDist = Literal["fixed", "uniform", "exponential", "lognormal"]
+
+
+@dataclass
+class FaultProfile:
+    """Per-request latency and error injection.
+
+    ``latency_ms`` is the median (mean for ``exponential``); ``spread`` is the
+    lognormal sigma, or the relative half-width for ``uniform``.
+    """
+
+    latency_ms: float = 50.0
+    latency_dist: LatencyDist = "lognormal"
+    spread: float = 0.5
+    error_rate: float = 0.0
+    error_statuses: list[int] = field(default_factory=lambda: [500, 503, 429])
+    seed: int | None = None
+
+    def __post_init__(self) -> None:
+        self._rng = random.Random(self.seed)
+
+    def sample_latency_s(self) -> float:
+        base = max(self.latency_ms, 0.0)
+        if self.latency_dist == "fixed":
+            ms = base
+        elif self.latency_dist == "uniform":
+            ms = self._rng.uniform(base * (1 - self.spread), base * (1 + self.spread))
+        elif self.latency_dist == "exponential":
+            ms = self._rng.expovariate(1 / base) if base else 0.0
+        else:
+            ms = base * math.exp(self._rng.gauss(0, self.spread))
+        return max(ms, 0.0) / 1000
+
+    def sample_error(self) -> int | None:
+        if self.error_statuses and self._rng.random() < self.error_rate:
+            return self._rng.choice(self.error_statuses)
+        return None
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+class FaultUpdate(BaseModel):
+    latency_ms: float | None = None
+    latency_dist: LatencyDist | None = None
+    spread: float | None = None
+    error_rate: float | None = None
+    error_statuses: list[int] | None = None
+
+
+def _stable_seed(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _fault_app(title: str, profile: FaultProfile, error_body) -> FastAPI:
+    app = FastAPI(title=title)
+    app.state.fault = profile
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        if request.url.path == "/_fault":
+            return await call_next(request)
+        fault: FaultProfile = request.app.state.fault
+        await asyncio.sleep(fault.sample_latency_s())
+        status = fault.sample_error()
+        if status is not None:
+            return JSONResponse(error_body(status), status_code=status)
+        return await call_next(request)
+
+    @app.get("/_fault")
+    async def get_fault():
+        return app.state.fault.to_dict()
+
+    @app.put("/_fault")
+    async def put_fault(body: FaultUpdate):
+        current = app.state.fault.to_dict()
+        current.update(body.model_dump(exclude_none=True))
+        app.state.fault = FaultProfile(**current)
+        return app.state.fault.to_dict()
+
+    return app
+
+
+def create_onet_app(profile: FaultProfile | None = None, shape: str = "shallow", task_count: int = 20) -> FastAPI:
+    """Serves ``online/search``, ``online/occupations/{code}`` and ``.../summary``."""
+    app = _fault_app("Fake O*NET", profile or FaultProfile(), lambda status: {"error": f"simulated {status}"})
+
+    @app.get("/online/search")
+    async def search(keyword: str = ""):
+        seed = _stable_seed(keyword)
+        codes = [f"{(seed + i) % 60 + 11}-{(seed // 7 + i) % 9000 + 1000}.00" for i in range(5)]
+        return {"keyword": keyword, "occupation": [{"code": code, "title": f"{keyword.title() or 'Occupation'} {i + 1}"} for i, code in enumerate(codes)]}
+
+    @app.get("/online/occupations/{code}/summary")
+    async def summary(code: str):
+        tasks = task_list(task_count, seed=_stable_seed(code))
+        return {"code": code, "title": f"Occupation {code}", "task_statements": [{"id": i + 1, "task": task} for i, task in enumerate(tasks)]}
+
+    @app.get("/online/occupations/{code}")
+    async def detail(code: str):
+        return {"code": code, "title": f"Occupation {code}", **onet_payload(shape, seed=_stable_seed(code))["detail"]}
+
+    return app
+
+
+@lru_cache(maxsize=4096)
+def _embedding_array(text: str, dim: int) -> np.ndarray:
+    # Vectorized and memoized so the stand-in's own CPU time stays far below
+    # the injected latency it is meant to simulate.
+    vector = np.random.default_rng(_stable_seed(text)).standard_normal(dim)
+    vector /= np.linalg.norm(vector) or 1.0
+    vector.setflags(write=False)
+    return vector
+
+
+def fake_embedding(text: str, dim: int = EMBEDDING_DIM) -> list[float]:
+    """Unit vector seeded by the text, so identical inputs embed identically."""
+    return _embedding_array(text, dim).tolist()
+
+
+class EmbeddingRequest(BaseModel):
+    model: str
+    input: str | list[str]
+    encoding_format: Literal["float", "base64"] = "float"
+    dimensions: int | None = None
+
+
+def create_embeddings_app(profile: FaultProfile | None = None) -> FastAPI:
+    """Serves ``POST /v1/embeddings`` in the OpenAI response format (float or base64)."""
+
+    def error_body(status: int) -> dict:
+        kind = "rate_limit_exceeded" if status == 429 else "server_error"
+        return {"error": {"message": f"simulated {status}", "type": kind, "param": None, "code": kind}}
+
+    app = _fault_app("Fake OpenAI embeddings", profile or FaultProfile(), error_body)
+
+    @app.post("/v1/embeddings")
+    async def embeddings(body: EmbeddingRequest):
+        texts = [body.input] if isinstance(body.input, str) else body.input
+        dim = body.dimensions or EMBEDDING_DIM
+        data = []
+        for index, text in enumerate(texts):
+            vector = _embedding_array(text, dim)
+            if body.encoding_format == "base64":
+                embedding = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii")
+            else:
+                embedding = vector.tolist()
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = sum(len(text.split()) for text in texts)
+        return {"object": "list", "data": data, "model": body.model, "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    return app
+
+
+def main() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("service", choices=["onet", "embeddings"])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="default 9001 (onet) / 9002 (embeddings)")
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--latency-dist", choices=["fixed", "uniform", "exponential", "lognormal"], default="lognormal")
+    parser.add_argument("--spread", type=float, default=0.5)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, action="append", dest="error_statuses", default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--payload-shape", choices=["shallow", "deep", "huge"], default="shallow", help="O*NET detail size")
+    parser.add_argument("--task-count", type=int, default=20, help="task statements per O*NET summary")
+    args = parser.parse_args()
+
+    profile = FaultProfile(
+        latency_ms=args.latency_ms,
+        latency_dist=args.latency_dist,
+        spread=args.spread,
+        error_rate=args.error_rate,
+        error_statuses=args.error_statuses or [500, 503, 429],
+        seed=args.seed,
+    )
+    if args.service == "onet":
+        app = create_onet_app(profile, args.payload_shape, args.task_count)
+    else:
+        app = create_embeddings_app(profile)
+    uvicorn.run(app, host=args.host, port=args.port or (9001 if args.service == "onet" else 9002), log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
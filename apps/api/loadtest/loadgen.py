@@ -0,0 +1,171 @@
+"""Closed-loop async load generator for the API.
+
+    python -m loadtest.loadgen --base-url http://localhost:8000 --duration 60 --concurrency 32 \\
+        --mix risk=6,search=3,ingest=1 --ingest-key change-me --out load.json
+
+Each of ``--concurrency`` workers sends one request at a time, picking the
+endpoint by ``--mix`` weight. Requests that start during the ``--warmup``
+seconds are sent but not counted. Reports throughput, error counts and
+p50/p95/p99 latency per endpoint.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import httpx
+
+from benchmarks.generators import task_list
+
+OCCUPATION_CODES = [f"{major}-{minor}.00" for major in (11, 13, 15, 29, 41, 43, 47, 53) for minor in (1011, 2011, 1252, 1141, 2031, 4051)]
+QUERIES = ["AI coding assistant", "spreadsheet automation", "customer support chatbot", "meeting notes", "resume builder", "data cleaning", "image generation", "workflow automation"]
+
+_ingest_counter = itertools.count()
+
+
+def risk_request(rng: random.Random) -> tuple[str, str, dict]:
+    code = rng.choice(OCCUPATION_CODES)
+    body = {
+        "occupation_code": code,
+        "occupation_title": f"Occupation {code}",
+        "session_id": f"load-{rng.randrange(10_000)}",
+        "user_inputs": {"skills": ["python"], "tasks_preference": task_list(3, seed=rng.randrange(1000)), "industry": "finance"},
+    }
+    return "POST", "/risk/evaluate", body
+
+
+def search_request(rng: random.Random) -> tuple[str, str, dict]:
+    return "POST", "/rag/tools/search", {"query": rng.choice(QUERIES), "top_k": 8}
+
+
+def ingest_request(rng: random.Random) -> tuple[str, str, dict]:
+    batch = next(_ingest_counter)
+    items = [
+        {"name": f"Load tool {batch}-{i}", "description": " ".join(task_list(2, seed=batch * 10 + i)), "url": f"https://load.example/{batch}/{i}", "tags": ["loadtest"], "source": "loadtest"}
+        for i in range(5)
+    ]
+    return "POST", "/ingest/apify/webhook", {"items": items}
+
+
+ENDPOINTS = {"risk": risk_request, "search": search_request, "ingest": ingest_request}
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"unknown endpoint {name!r}; choose from {', '.join(ENDPOINTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    """Nearest-rank percentile of ``values`` (``q`` in 0-100)."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, min(len(ordered), int(-(-q * len(ordered) // 100))))
+    return ordered[rank - 1]
+
+
+def summarize(samples: dict[str, list[tuple[float, int]]], elapsed_s: float) -> dict:
+    endpoints = {}
+    for name, rows in sorted(samples.items()):
+        latencies = [latency for latency, _ in rows]
+        statuses = Counter(str(status) for _, status in rows)
+        errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+        endpoints[name] = {
+            "requests": len(rows),
+            "errors": errors,
+            "throughput_rps": len(rows) / elapsed_s if elapsed_s else 0.0,
+            "p50_ms": _ms(percentile(latencies, 50)),
+            "p95_ms": _ms(percentile(latencies, 95)),
+            "p99_ms": _ms(percentile(latencies, 99)),
+            "max_ms": _ms(max(latencies) if latencies else None),
+            "statuses": dict(statuses),
+        }
+    total = sum(item["requests"] for item in endpoints.values())
+    return {"duration_s": elapsed_s, "requests": total, "throughput_rps": total / elapsed_s if elapsed_s else 0.0, "endpoints": endpoints}
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+async def run_load(
+    base_url: str,
+    mix: dict[str, float],
+    duration_s: float,
+    concurrency: int,
+    warmup_s: float = 0.0,
+    ingest_key: str | None = None,
+    timeout_s: float = 30.0,
+    seed: int = 0,
+) -> dict:
+    samples: dict[str, list[tuple[float, int]]] = defaultdict(list)
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    headers = {"x-api-key": ingest_key} if ingest_key else {}
+    started = time.perf_counter()
+    measure_from = started + warmup_s
+    deadline = measure_from + duration_s
+
+    async def worker(client: httpx.AsyncClient, rng: random.Random) -> None:
+        while (sent_at := time.perf_counter()) < deadline:
+            name = rng.choices(names, weights)[0]
+            method, path, body = ENDPOINTS[name](rng)
+            try:
+                response = await client.request(method, path, json=body, headers=headers if name == "ingest" else None)
+                status = response.status_code
+            except httpx.HTTPError as e:
+                status = type(e).__name__
+            if sent_at >= measure_from:
+                samples[name].append((time.perf_counter() - sent_at, status))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout_s, limits=limits) as client:
+        await asyncio.gather(*(worker(client, random.Random(seed + i)) for i in range(concurrency)))
+    return summarize(samples, max(time.perf_counter() - measure_from, 1e-9))
+
+
+def print_report(report: dict) -> None:
+    print(f"{report['requests']} requests in {report['duration_s']:.1f}s ({report['throughput_rps']:.1f} req/s)", file=sys.stderr)
+    print(f"{'endpoint':<10} {'reqs':>7} {'errors':>7} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}", file=sys.stderr)
+    for name, item in report["endpoints"].items():
+        print(
+            f"{name:<10} {item['requests']:>7} {item['errors']:>7} {item['throughput_rps']:>8.1f} "
+            f"{item['p50_ms'] or 0:>9.1f} {item['p95_ms'] or 0:>9.1f} {item['p99_ms'] or 0:>9.1f}",
+            file=sys.stderr,
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("risk=6,search=3,ingest=1"), help="endpoint weights, e.g. risk=6,search=3,ingest=1")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="unmeasured seconds before the run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--ingest-key", default=None, help="X-Api-Key for /ingest/apify/webhook")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", type=Path, default=None, help="write the report as JSON")
+    args = parser.parse_args()
+
+    report = asyncio.run(run_load(args.base_url, args.mix, args.duration, args.concurrency, args.warmup, args.ingest_key, args.timeout, args.seed))
+    print_report(report)
+    if args.out:
+        args.out.write_text(json.dumps(report, indent=2) + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
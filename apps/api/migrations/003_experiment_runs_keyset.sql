@@ -0,0 +1 @@
+CREATE INDEX IF NOT EXISTS idx_experiment_runs_experiment_created ON experiment_runs(experiment_id, created_at DESC, id DESC);
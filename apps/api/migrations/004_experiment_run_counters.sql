@@ -0,0 +1,36 @@
+CREATE TABLE IF NOT EXISTS experiment_run_counters (
+  experiment_id INT NOT NULL REFERENCES experiments(id) ON DELETE CASCADE,
+  variant TEXT NOT NULL,
+  run_count BIGINT NOT NULL DEFAULT 0,
+  last_run_at TIMESTAMPTZ,
+  PRIMARY KEY (experiment_id, variant)
+);
+
+CREATE OR REPLACE FUNCTION bump_experiment_run_counter() RETURNS trigger AS $$
+BEGIN
+  IF TG_OP = 'INSERT' THEN
+    INSERT INTO experiment_run_counters (experiment_id, variant, run_count, last_run_at)
+    VALUES (NEW.experiment_id, NEW.variant, 1, NEW.created_at)
+    ON CONFLICT (experiment_id, variant) DO UPDATE
+      SET run_count = experiment_run_counters.run_count + 1,
+          last_run_at = GREATEST(experiment_run_counters.last_run_at, EXCLUDED.last_run_at);
+    RETURN NEW;
+  END IF;
+  UPDATE experiment_run_counters
+    SET run_count = GREATEST(run_count - 1, 0)
+    WHERE experiment_id = OLD.experiment_id AND variant = OLD.variant;
+  RETURN OLD;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_experiment_run_counters ON experiment_runs;
+CREATE TRIGGER trg_experiment_run_counters
+  AFTER INSERT OR DELETE ON experiment_runs
+  FOR EACH ROW EXECUTE FUNCTION bump_experiment_run_counter();
+
+INSERT INTO experiment_run_counters (experiment_id, variant, run_count, last_run_at)
+SELECT experiment_id, variant, count(*), max(created_at)
+FROM experiment_runs
+GROUP BY experiment_id, variant
+ON CONFLICT (experiment_id, variant) DO UPDATE
+  SET run_count = EXCLUDED.run_count, last_run_at = EXCLUDED.last_run_at;
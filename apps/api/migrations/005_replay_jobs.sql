@@ -0,0 +1,29 @@
+CREATE TABLE IF NOT EXISTS replay_jobs (
+  id SERIAL PRIMARY KEY,
+  experiment_id INT REFERENCES experiments(id) ON DELETE SET NULL,
+  model_version TEXT NOT NULL,
+  params JSONB NOT NULL DEFAULT '{}'::jsonb,
+  filters JSONB NOT NULL DEFAULT '{}'::jsonb,
+  status TEXT NOT NULL DEFAULT 'pending',
+  processed INT NOT NULL DEFAULT 0,
+  summary JSONB,
+  error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  started_at TIMESTAMPTZ,
+  finished_at TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS replay_results (
+  id BIGSERIAL PRIMARY KEY,
+  job_id INT NOT NULL REFERENCES replay_jobs(id) ON DELETE CASCADE,
+  assessment_id INT NOT NULL REFERENCES assessments(id) ON DELETE CASCADE,
+  baseline_score DOUBLE PRECISION NOT NULL,
+  replay_score DOUBLE PRECISION NOT NULL,
+  delta DOUBLE PRECISION NOT NULL,
+  baseline_bucket TEXT NOT NULL,
+  replay_bucket TEXT NOT NULL,
+  model_version TEXT,
+  UNIQUE (job_id, assessment_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_assessments_created_at ON assessments(created_at);
@@ -0,0 +1,10 @@
+-- Inputs each evaluation actually scored on; onet_feature_values follows FEATURE_DIMS order.
+-- Stored as float8, the precision scoring uses, so replays reproduce the scores exactly.
+ALTER TABLE assessments
+  ADD COLUMN IF NOT EXISTS task_hash VARCHAR(64),
+  ADD COLUMN IF NOT EXISTS task_count INT,
+  ADD COLUMN IF NOT EXISTS onet_feature_values DOUBLE PRECISION[],
+  ADD COLUMN IF NOT EXISTS semantic_automation_density DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS semantic_human_density DOUBLE PRECISION,
+  ADD COLUMN IF NOT EXISTS semantic_model VARCHAR(128),
+  ADD COLUMN IF NOT EXISTS trend_triggers JSONB;
@@ -0,0 +1,6 @@
+CREATE TABLE IF NOT EXISTS query_embedding_cache (
+  cache_key CHAR(64) PRIMARY KEY,
+  model VARCHAR(128) NOT NULL,
+  embedding vector(1536) NOT NULL,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
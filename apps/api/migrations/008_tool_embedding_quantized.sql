@@ -0,0 +1,25 @@
+-- Quantized copies of tool embeddings for candidate search (pgvector >= 0.7).
+-- Columns start NULL; fill existing rows with
+--   python -m app.commands.backfill_quantized_embeddings
+-- and keep new writes in sync with the trigger below.
+ALTER TABLE tool_embeddings ADD COLUMN IF NOT EXISTS embedding_half halfvec(1536);
+ALTER TABLE tool_embeddings ADD COLUMN IF NOT EXISTS embedding_bits bit(1536);
+
+CREATE OR REPLACE FUNCTION quantize_tool_embedding() RETURNS trigger AS $$
+BEGIN
+  NEW.embedding_half := NEW.embedding::halfvec(1536);
+  NEW.embedding_bits := binary_quantize(NEW.embedding)::bit(1536);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_quantize_tool_embedding ON tool_embeddings;
+CREATE TRIGGER trg_quantize_tool_embedding
+  BEFORE INSERT OR UPDATE OF embedding ON tool_embeddings
+  FOR EACH ROW EXECUTE FUNCTION quantize_tool_embedding();
+
+-- No quantized index is created here: building both next to the float32 one
+-- would grow index memory instead of shrinking it. After the backfill, build
+-- only the index of the configured RAG_VECTOR_STORAGE mode and drop the others
+-- (including the full-precision idx_tool_embeddings_hnsw) with
+--   python -m app.commands.setup_vector_indexes --drop-unused
@@ -0,0 +1,42 @@
+-- Filter-aware tool search: GIN on tags and per-source partial HNSW indexes.
+CREATE INDEX IF NOT EXISTS idx_tools_catalog_tags_gin ON tools_catalog USING gin (tags);
+
+-- Partial indexes need the filter column on the indexed table, so the tool's
+-- source is copied onto tool_embeddings and kept in sync by triggers.
+ALTER TABLE tool_embeddings ADD COLUMN IF NOT EXISTS source VARCHAR(64);
+
+UPDATE tool_embeddings te
+SET source = tc.source
+FROM tools_catalog tc
+WHERE tc.id = te.tool_id AND te.source IS DISTINCT FROM tc.source;
+
+CREATE OR REPLACE FUNCTION copy_tool_source() RETURNS trigger AS $$
+BEGIN
+  NEW.source := (SELECT source FROM tools_catalog WHERE id = NEW.tool_id);
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_copy_tool_source ON tool_embeddings;
+CREATE TRIGGER trg_copy_tool_source
+  BEFORE INSERT OR UPDATE OF tool_id ON tool_embeddings
+  FOR EACH ROW EXECUTE FUNCTION copy_tool_source();
+
+CREATE OR REPLACE FUNCTION sync_tool_embedding_source() RETURNS trigger AS $$
+BEGIN
+  UPDATE tool_embeddings SET source = NEW.source WHERE tool_id = NEW.id;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS trg_sync_tool_embedding_source ON tools_catalog;
+CREATE TRIGGER trg_sync_tool_embedding_source
+  AFTER UPDATE OF source ON tools_catalog
+  FOR EACH ROW WHEN (OLD.source IS DISTINCT FROM NEW.source)
+  EXECUTE FUNCTION sync_tool_embedding_source();
+
+-- One partial index per high-volume source (RAG_PARTIAL_INDEX_SOURCES), for the
+-- default full storage mode; app.commands.setup_vector_indexes builds them for
+-- the quantized modes.
+CREATE INDEX IF NOT EXISTS idx_tool_embeddings_hnsw_apify ON tool_embeddings
+  USING hnsw (embedding vector_cosine_ops) WHERE source = 'apify';
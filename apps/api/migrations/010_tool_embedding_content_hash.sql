@@ -0,0 +1,2 @@
+-- sha256 of the embedded text and model; ingest skips items whose hash is unchanged.
+ALTER TABLE tool_embeddings ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
@@ -0,0 +1,37 @@
+-- The model whose vectors search currently serves; query embeddings must use it.
+CREATE TABLE IF NOT EXISTS embedding_state (
+  id BOOLEAN PRIMARY KEY DEFAULT true CHECK (id),
+  serving_model VARCHAR(128) NOT NULL,
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+
+INSERT INTO embedding_state (serving_model)
+SELECT coalesce(
+  (SELECT model FROM tool_embeddings GROUP BY model ORDER BY count(*) DESC LIMIT 1),
+  'text-embedding-3-small'
+)
+ON CONFLICT (id) DO NOTHING;
+
+-- Re-embedding runs checkpoint the last tool id they finished.
+CREATE TABLE IF NOT EXISTS reembed_runs (
+  id SERIAL PRIMARY KEY,
+  model VARCHAR(128) NOT NULL,
+  status TEXT NOT NULL DEFAULT 'running',
+  last_tool_id INT NOT NULL DEFAULT 0,
+  processed INT NOT NULL DEFAULT 0,
+  error TEXT,
+  created_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  updated_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+  finished_at TIMESTAMPTZ
+);
+
+-- New-model vectors are staged here. At swap time they are loaded into an
+-- indexed copy of tool_embeddings that is renamed into place in one short
+-- transaction; search reads tool_embeddings until then.
+CREATE TABLE IF NOT EXISTS tool_embeddings_shadow (
+  tool_id INT PRIMARY KEY REFERENCES tools_catalog(id) ON DELETE CASCADE,
+  embedding vector(1536) NOT NULL,
+  model VARCHAR(128) NOT NULL,
+  content_hash CHAR(64) NOT NULL,
+  catalog_updated_at TIMESTAMPTZ NOT NULL
+);
@@ -0,0 +1,2 @@
+-- Callers requesting detail=minimal (or fields without summary) skip building the summary text.
+ALTER TABLE assessments ALTER COLUMN output_summary DROP NOT NULL;
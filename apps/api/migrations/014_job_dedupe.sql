@@ -0,0 +1,5 @@
+-- At most one queued/running job per (job_type, dedupe_key); enqueue_unique
+-- inserts with ON CONFLICT DO NOTHING against this index.
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS dedupe_key TEXT;
+CREATE UNIQUE INDEX IF NOT EXISTS idx_jobs_dedupe ON jobs(job_type, dedupe_key)
+  WHERE status IN ('queued', 'running') AND dedupe_key IS NOT NULL;
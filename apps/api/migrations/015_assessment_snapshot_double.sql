@@ -0,0 +1,6 @@
+-- Databases migrated with the original 006 store the snapshot as float4 (REAL);
+-- widen it to the float8 scoring uses. Rows written earlier keep their rounded values.
+ALTER TABLE assessments
+  ALTER COLUMN onet_feature_values TYPE DOUBLE PRECISION[],
+  ALTER COLUMN semantic_automation_density TYPE DOUBLE PRECISION,
+  ALTER COLUMN semantic_human_density TYPE DOUBLE PRECISION;
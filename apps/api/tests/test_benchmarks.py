@@ -0,0 +1,30 @@
+from benchmarks.compare import compare
+from benchmarks.generators import keyword_config, onet_payload, task_list
+from benchmarks.run import time_case
+from app.core.onet_features import extract_onet_numeric_features
+
+
+def test_generators_are_deterministic():
+    assert task_list(50, seed=3) == task_list(50, seed=3)
+    assert len(task_list(500)) == 500
+    assert sum(len(f.keywords) for f in keyword_config(10_000).factors.values()) == 10_000
+    assert onet_payload("huge", seed=1) == onet_payload("huge", seed=1)
+
+
+def test_payload_shapes_yield_features():
+    for shape in ("shallow", "deep", "huge"):
+        features = extract_onet_numeric_features(onet_payload(shape))
+        assert any(item["value"] is not None for item in features.values())
+
+
+def test_time_case_reports_per_call_seconds():
+    result = time_case(lambda: None, repeat=3, min_time=0.001)
+    assert result["number"] >= 1
+    assert 0 <= result["min"] <= result["median"]
+
+
+def test_compare_flags_regressions():
+    baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}, "c": {"median": 1.0}, "gone": {"median": 1.0}}}
+    current = {"results": {"a": {"median": 1.05}, "b": {"median": 1.5}, "c": {"median": 0.5}, "new": {"median": 1.0}}}
+    status = {row["name"]: row["status"] for row in compare(baseline, current, threshold=0.10)}
+    assert status == {"a": "ok", "b": "regression", "c": "improvement", "gone": "missing", "new": "new"}
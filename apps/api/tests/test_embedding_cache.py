@@ -0,0 +1,41 @@
+import asyncio
+
+from app.core.cache import TTLCache
+from app.services import embeddings
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl_s=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries():
+    cache = TTLCache(maxsize=10, ttl_s=-1)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_embed_query_hits_cache_for_normalized_duplicates(monkeypatch):
+    calls = []
+
+    async def fake_embed_texts(texts, model=None):
+        calls.append(texts)
+        return [[0.1, 0.2] for _ in texts]
+
+    monkeypatch.setattr(embeddings, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(embeddings, "query_cache", TTLCache(maxsize=10, ttl_s=60))
+
+    async def run():
+        first = await embeddings.embed_query("  Workflow   Automation ")
+        second = await embeddings.embed_query("workflow automation")
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first == second
+    assert calls == [["workflow automation"]]
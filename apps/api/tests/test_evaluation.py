@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+from app.core.budget import LatencyBudget
+
+from app.schemas.risk import RiskEvaluateRequest
+from app.services import evaluation
+
+
+class FakeSession:
+    def __init__(self):
+        self.added = []
+        self.statements = []
+        self.committed = False
+
+    def add(self, obj):
+        self.added.append(obj)
+
+    async def flush(self):
+        for obj in self.added:
+            obj.id = 42
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+
+    async def commit(self):
+        self.committed = True
+
+
+def _collect(db, body):
+    async def run():
+        return [event async for event in evaluation.evaluation_events(db, body)]
+
+    return asyncio.run(run())
+
+
+def test_stream_emits_estimate_before_onet_and_ends_with_persisted_result(monkeypatch):
+    calls = []
+
+    async def fake_get(path, params=None):
+        calls.append(path)
+        if path.endswith("/summary"):
+            return {"task_statements": [{"task": "Enter data into standardized forms"}, {"task": "Compile routine reports"}]}
+        raise RuntimeError("detail unavailable")
+
+    async def no_cache(db, code):
+        return None
+
+    monkeypatch.setattr(evaluation.onet_client, "get", fake_get)
+    monkeypatch.setattr(evaluation, "cached_detail", no_cache)
+    body = RiskEvaluateRequest(occupation_code="43-3031.00", user_inputs={"tasks_preference": ["data entry"]}, model_version="v0")
+    db = FakeSession()
+    events = _collect(db, body)
+
+    names = [name for name, _ in events]
+    assert names == ["estimate", "onet", "estimate", "features", "result"]
+    assert events[0][1]["source"] == "user_inputs"
+    assert events[1][1] == {"task_count": 2, "summary": True, "detail": False, "detail_cached": False}
+    assert events[-1][1]["assessment_id"] == 42
+    assert db.committed
+    # A failed detail fetch enqueues an O*NET prefetch job, deduplicated by occupation code.
+    prefetch = [str(stmt) for stmt in db.statements if "INSERT INTO jobs" in str(stmt)]
+    assert len(prefetch) == 1 and "ON CONFLICT (job_type, dedupe_key)" in prefetch[0]
+
+
+def test_evaluate_yields_only_the_result():
+    body = RiskEvaluateRequest(user_inputs={"tasks_preference": ["data entry"]}, model_version="v0", detail="minimal")
+    output = asyncio.run(evaluation.evaluate(FakeSession(), body))
+    assert set(output) == {"score", "confidence", "model_version", "assessment_id", "experiment", "skipped_stages"}
+
+
+def test_slow_upstream_is_cut_off_at_the_budget_and_reported(monkeypatch):
+    async def slow_get(path, params=None):
+        await asyncio.sleep(5)
+
+    async def no_cache(db, code):
+        return None
+
+    monkeypatch.setattr(evaluation.onet_client, "get", slow_get)
+    monkeypatch.setattr(evaluation, "cached_detail", no_cache)
+    body = RiskEvaluateRequest(occupation_code="43-3031.00", user_inputs={"tasks_preference": ["data entry"]})
+    budget = LatencyBudget(200, reserves={"onet_summary": 10, "onet_detail": 10, "persist": 50})
+
+    db = FakeSession()
+    started = time.monotonic()
+    output = asyncio.run(evaluation.evaluate(db, body, budget=budget))
+    assert time.monotonic() - started < 1
+    assert set(output["skipped_stages"]) == {"onet_summary", "onet_detail"}
+    assert output["model_version"] == "v0"
+    # Skipped for budget reasons only: no prefetch job.
+    assert not any("INSERT INTO jobs" in str(stmt) for stmt in db.statements)
+
+
+def test_exhausted_budget_skips_optional_stages_without_calling_upstream(monkeypatch):
+    async def fail_get(path, params=None):
+        raise AssertionError("O*NET should not be called")
+
+    async def no_cache(db, code):
+        return None
+
+    monkeypatch.setattr(evaluation.onet_client, "get", fail_get)
+    monkeypatch.setattr(evaluation, "cached_detail", no_cache)
+    body = RiskEvaluateRequest(occupation_code="43-3031.00", user_inputs={"tasks_preference": ["data entry"]}, model_version="v1")
+    budget = LatencyBudget(50, reserves={"onet_summary": 100, "onet_detail": 100, "semantic": 100, "persist": 0})
+
+    output = asyncio.run(evaluation.evaluate(FakeSession(), body, budget=budget))
+    assert set(output["skipped_stages"]) == {"onet_summary", "onet_detail", "semantic"}
+    assert output["model_version"] == "v1"
+
+
+def test_budget_header_is_clamped(monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "risk_latency_budget_ms", 800)
+    monkeypatch.setattr(settings, "risk_latency_budget_max_ms", 2000)
+    monkeypatch.setattr(settings, "risk_latency_budget_min_ms", 100)
+    assert LatencyBudget.from_header(None).total_ms == 800
+    assert LatencyBudget.from_header("50000").total_ms == 2000
+    assert LatencyBudget.from_header("5").total_ms == 100
+    assert LatencyBudget.from_header("0").total_ms == 100
+    assert LatencyBudget.from_header("0", admin=True).bounded is False
+    assert LatencyBudget.from_header("abc").total_ms == 800
+
+
+def test_semantic_calls_share_one_deadline(monkeypatch):
+    from types import SimpleNamespace
+
+    from app.core import semantic_features
+    from app.core.config import settings
+
+    clock = [100.0]
+    calls = []
+
+    def client(timeout=None):
+        def create(model, input):
+            calls.append(timeout)
+            clock[0] += 0.06  # the cold anchor call eats the whole budget
+            return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0, 0.0]) for _ in input])
+
+        return SimpleNamespace(embeddings=SimpleNamespace(create=create), with_options=lambda timeout, max_retries: client(timeout))
+
+    monkeypatch.setattr(semantic_features.time, "monotonic", lambda: clock[0])
+    monkeypatch.setattr(settings, "openai_api_key", "test")
+    monkeypatch.setattr(semantic_features, "_sync_client", client)
+    monkeypatch.setattr(semantic_features, "_anchors", {})
+    semantic_features.embeddings_upstream.breaker.reset()
+
+    assert semantic_features.extract_semantic_features(["a", "b"], timeout=0.05) is None
+    assert len(calls) == 1 and abs(calls[0] - 0.05) < 1e-9
+    assert semantic_features.embeddings_upstream.breaker.failures == 0
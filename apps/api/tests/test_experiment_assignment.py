@@ -0,0 +1,25 @@
+import hashlib
+import random
+
+from app.services.experiments import AssignmentWriter, assign_variant
+
+
+def _legacy_variant(user_key: str, experiment_id: int) -> str:
+    seed_hex = hashlib.sha256(f"{user_key}:{experiment_id}".encode()).hexdigest()[:8]
+    return "A" if random.Random(int(seed_hex, 16)).random() < 0.5 else "B"
+
+
+def test_assign_variant_is_sticky_and_matches_legacy_split():
+    keys = [f"user-{i}" for i in range(200)]
+    variants = [assign_variant(k, 7) for k in keys]
+    assert variants == [_legacy_variant(k, 7) for k in keys]
+    assert variants == [assign_variant(k, 7) for k in keys]
+    assert 60 < variants.count("A") < 140
+
+
+def test_writer_dedupes_pending_assignments():
+    writer = AssignmentWriter(batch_size=10, flush_interval_s=1.0)
+    writer.enqueue("u1", 1, "A")
+    writer.enqueue("u1", 1, "A")
+    writer.enqueue("u2", 1, "B")
+    assert len(writer._pending) == 2
@@ -0,0 +1,43 @@
+from datetime import datetime, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from app.services.experiments import (
+    build_experiment_list_query,
+    build_run_projection,
+    decode_cursor,
+    encode_cursor,
+    parse_run_fields,
+)
+
+
+def test_cursor_roundtrip():
+    created_at = datetime(2025, 3, 1, 12, 30, tzinfo=timezone.utc)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
+
+
+def test_invalid_cursor_rejected():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
+
+
+def test_projection_uses_jsonb_text_access():
+    fields = parse_run_fields("score,variant,model_version")
+    sql = str(select(*build_run_projection(fields)).compile(dialect=postgresql.dialect()))
+    assert "->>" in sql
+    assert "experiment_runs.output AS output" not in sql
+    assert "experiment_runs.created_at AS _created_at" in sql
+
+
+def test_experiment_list_is_single_grouped_query():
+    sql = str(build_experiment_list_query({"variants", "latest_run", "coverage"}).compile(dialect=postgresql.dialect()))
+    assert sql.count("GROUP BY") == 2
+    assert "json_object_agg" in sql
+    assert "LEFT OUTER JOIN" in sql
+
+
+def test_cached_counters_reject_coverage():
+    with pytest.raises(ValueError):
+        build_experiment_list_query({"coverage"}, cached=True)
@@ -0,0 +1,36 @@
+from app.core.feature_snapshot import FEATURE_DIMS, FeatureSnapshot
+from app.core.gsti_router import GSTIRouter
+
+
+def _payload():
+    return {
+        "detail": {
+            "work_context": [{"name": "Structured versus Unstructured Work", "value": 90, "scale": {"min": 0, "max": 100}}],
+            "work_activities": [
+                {"name": "Processing Information", "value": 88, "scale": {"min": 0, "max": 100}},
+                {"name": "Thinking Creatively", "value": 25, "scale": {"min": 0, "max": 100}},
+                {"name": "Making Decisions and Solving Problems", "value": 40, "scale": {"min": 0, "max": 100}},
+            ],
+        }
+    }
+
+
+def test_snapshot_roundtrip_through_columns():
+    router = GSTIRouter()
+    tasks = ["Enter standardized records", "Compile routine transaction reports"]
+    snapshot = router.extract_features(tasks, _payload(), model_version="v1", context={"industry": "data entry"})
+    restored = FeatureSnapshot.from_dict(snapshot.to_dict())
+    assert restored == snapshot
+    assert len(restored.onet_feature_values) == len(FEATURE_DIMS)
+    assert restored.trend_triggers[0]["rule"] == "industry_automation_pressure"
+
+
+def test_scoring_from_snapshot_matches_live_payload():
+    router = GSTIRouter()
+    tasks = ["Enter standardized records", "Compile routine transaction reports"]
+    context = {"industry": "data entry"}
+    live = router.evaluate(tasks, _payload(), model_version="v1", context=context)
+    snapshot = FeatureSnapshot.from_dict(router.extract_features(tasks, _payload(), model_version="v1", context=context).to_dict())
+    replayed = router.evaluate([], None, model_version="v1", context=context, features=snapshot)
+    assert replayed["score"] == live["score"]
+    assert replayed["confidence"] == live["confidence"]
@@ -1,4 +1,5 @@
 from app.core.calibration import calibrate
+from app.core.detail import DETAIL_PARTS, resolve_parts
 from app.core.gsti_router import GSTIRouter
 from app.core.gsti_v1 import GSTIv1Engine
 from app.core.trend_adjustment import compute_trend_modifier
@@ -73,3 +74,25 @@ def test_calibration_monotonic():
 def test_trend_modifier_bounds():
     result = compute_trend_modifier(industry="data entry", region="eu", selected_tools=[str(i) for i in range(20)])
     assert -0.15 <= result["value"] <= 0.15
+
+
+def test_gsti_v1_detail_levels_skip_unrequested_parts():
+    engine = GSTIv1Engine()
+    tasks = ["Enter standardized records", "Compile routine transaction reports"]
+    full = engine.evaluate(tasks=tasks, onet_payload=_payload_high_routine())
+    minimal = engine.evaluate(tasks=tasks, onet_payload=_payload_high_routine(), parts=DETAIL_PARTS["minimal"])
+    standard = engine.evaluate(tasks=tasks, onet_payload=_payload_high_routine(), parts=DETAIL_PARTS["standard"])
+
+    assert minimal["score"] == standard["score"] == full["score"]
+    assert minimal["confidence"] == full["confidence"]
+    assert not {"breakdown", "summary", "suggested_focus"} & set(minimal)
+    assert standard["summary"] == full["summary"]
+    assert all("subfactors" not in f and "explanation" not in f for f in standard["breakdown"])
+    assert [f["value"] for f in standard["breakdown"]] == [f["value"] for f in full["breakdown"]]
+
+
+def test_resolve_parts_fields_select_top_level_keys():
+    assert resolve_parts("full", ["score", "confidence"]) == frozenset()
+    assert resolve_parts("full", ["breakdown"]) == {"breakdown", "subfactors", "explanations"}
+    assert resolve_parts("standard", ["breakdown"]) == {"breakdown"}
+    assert resolve_parts("minimal") == frozenset()
@@ -0,0 +1,125 @@
+import asyncio
+import contextlib
+
+from app.core.config import settings
+from app.schemas.agent import ApifyWebhookItem
+from app.services import ingest
+
+
+def test_embed_batched_splits_provider_calls_and_keeps_order(monkeypatch):
+    calls = []
+
+    async def fake_embed_texts(texts, model=None):
+        calls.append(list(texts))
+        return [[float(t)] for t in texts]
+
+    monkeypatch.setattr(ingest, "embed_texts", fake_embed_texts)
+    monkeypatch.setattr(settings, "embedding_batch_size", 4)
+    result = asyncio.run(ingest.embed_batched([str(i) for i in range(10)], "m"))
+    assert [len(c) for c in calls] == [4, 4, 2]
+    assert result == [[float(i)] for i in range(10)]
+
+
+def test_embedding_text_joins_name_description_and_tags():
+    item = ApifyWebhookItem(name="Zapier", description="automate", url="https://z", tags=["a", "b"])
+    assert ingest.embedding_text(item) == "Zapier\nautomate\na b"
+
+
+def test_ingest_skips_unchanged_items_and_counts_changes(monkeypatch):
+    model = settings.embedding_model
+    same = ApifyWebhookItem(name="Same", description="d", url="https://same")
+    edited = ApifyWebhookItem(name="Edited", description="new text", url="https://edited")
+    fresh = ApifyWebhookItem(name="Fresh", description="d", url="https://fresh")
+    stale = ApifyWebhookItem(name="Edited", description="old text", url="https://edited")
+    embedded, written = [], []
+
+    async def fake_load_existing(db, urls):
+        return {"https://same": (1, ingest.content_hash(same, model)), "https://edited": (2, ingest.content_hash(stale, model))}
+
+    async def fake_upsert_catalog(db, items):
+        return {"https://fresh": 3}
+
+    async def fake_embed_batched(texts, model):
+        embedded.extend(texts)
+        return [[0.0] for _ in texts]
+
+    async def fake_upsert_embeddings(db, rows):
+        written.extend(rows)
+
+    class FakeSession:
+        def begin_nested(self):
+            return contextlib.nullcontext()
+
+        async def commit(self):
+            pass
+
+    async def fake_serving_model(db):
+        return model
+
+    monkeypatch.setattr(ingest, "serving_model", fake_serving_model)
+    monkeypatch.setattr(ingest, "load_existing", fake_load_existing)
+    monkeypatch.setattr(ingest, "upsert_catalog", fake_upsert_catalog)
+    monkeypatch.setattr(ingest, "embed_batched", fake_embed_batched)
+    monkeypatch.setattr(ingest, "upsert_embeddings", fake_upsert_embeddings)
+
+    result = asyncio.run(ingest.ingest_tools(FakeSession(), [same, edited, fresh]))
+    assert result["counts"] == {"new": 1, "changed": 1, "unchanged": 1}
+    assert embedded == [ingest.embedding_text(edited), ingest.embedding_text(fresh)]
+    assert [(r["tool_id"], r["content_hash"]) for r in written] == [(2, ingest.content_hash(edited, model)), (3, ingest.content_hash(fresh, model))]
+
+
+def test_upsert_embeddings_rejects_vectors_of_a_swapped_out_model(monkeypatch):
+    from app.services import embeddings
+
+    class FakeResult:
+        def scalar_one_or_none(self):
+            return "new-model"
+
+    class FakeSession:
+        statements = []
+
+        async def execute(self, stmt):
+            FakeSession.statements.append(stmt)
+            return FakeResult()
+
+    embeddings._serving_model.set("model", "old-model")
+    rows = [{"tool_id": 1, "embedding": [0.0], "model": "old-model", "content_hash": "h"}]
+    try:
+        asyncio.run(ingest.upsert_embeddings(FakeSession(), rows))
+    except ingest.ServingModelChanged as e:
+        assert str(e) == "new-model"
+    else:
+        raise AssertionError("expected ServingModelChanged")
+    assert embeddings._serving_model.get("model") is None
+
+    asyncio.run(ingest.upsert_embeddings(FakeSession(), [{**rows[0], "model": "new-model"}]))
+    assert len(FakeSession.statements) == 4
+
+
+def test_embed_tools_job_appends_to_the_memory_index(monkeypatch):
+    from types import SimpleNamespace
+
+    tool = SimpleNamespace(id=7, name="Zapier", description="automate", url="https://z", tags=["a"], source="apify")
+    added = []
+
+    class FakeResult:
+        def all(self):
+            return [(tool, None)]
+
+    class FakeSession:
+        async def execute(self, stmt):
+            return FakeResult()
+
+    async def fake_serving_model(db):
+        return "m"
+
+    async def fake_embed_and_store(db, pending, model):
+        return [[0.5] for _ in pending]
+
+    monkeypatch.setattr(ingest, "serving_model", fake_serving_model)
+    monkeypatch.setattr(ingest, "embed_and_store", fake_embed_and_store)
+    monkeypatch.setattr(ingest.tool_index, "add", lambda ids, vectors, tools: added.append((ids, vectors, tools)))
+    monkeypatch.setattr(settings, "rag_backend", "memory")
+
+    assert asyncio.run(ingest.embed_tools_job(FakeSession(), {"tool_ids": [7]})) == {"embedded": 1, "skipped": 0}
+    assert added == [([7], [[0.5]], [ingest.tool_record(7, "Zapier", "automate", "https://z", ["a"], "apify")])]
@@ -0,0 +1,54 @@
+import asyncio
+from types import SimpleNamespace
+
+from app.core.config import settings
+from app.services import jobs
+
+
+class FakeSession:
+    def __init__(self, rowcount=1):
+        self.statements = []
+        self.rowcount = rowcount
+
+    async def execute(self, stmt, params=None):
+        self.statements.append((str(stmt), params))
+        return SimpleNamespace(rowcount=self.rowcount)
+
+
+def test_retry_delay_grows_exponentially_and_is_capped(monkeypatch):
+    monkeypatch.setattr(settings, "job_retry_base_s", 5.0)
+    monkeypatch.setattr(settings, "job_retry_max_s", 60.0)
+    monkeypatch.setattr(jobs.random, "uniform", lambda a, b: 1.0)
+    assert [jobs.retry_delay_s(n) for n in (1, 2, 3, 4, 5)] == [5.0, 10.0, 20.0, 40.0, 60.0]
+
+
+def test_failed_job_is_requeued_until_attempts_run_out():
+    db = FakeSession()
+    retry = jobs.ClaimedJob(id=1, job_type="embed_tools", payload={}, attempts=2, max_attempts=3, worker_id="w1")
+    assert asyncio.run(jobs.mark_failed(db, retry, "boom")) == "queued"
+    assert "status = 'queued'" in db.statements[-1][0]
+
+    final = jobs.ClaimedJob(id=1, job_type="embed_tools", payload={}, attempts=3, max_attempts=3, worker_id="w1")
+    assert asyncio.run(jobs.mark_failed(db, final, "boom")) == "failed"
+    assert "status = 'failed'" in db.statements[-1][0]
+
+
+def test_a_reclaimed_job_cannot_be_finished_by_its_previous_worker():
+    job = jobs.ClaimedJob(id=1, job_type="embed_tools", payload={}, attempts=1, max_attempts=3, worker_id="w1")
+    db = FakeSession(rowcount=0)
+    assert asyncio.run(jobs.mark_failed(db, job, "boom")) == "lost"
+    try:
+        asyncio.run(jobs.mark_succeeded(db, job, {"ok": True}))
+    except jobs.JobLockLost:
+        pass
+    else:
+        raise AssertionError("expected JobLockLost")
+    sql, params = db.statements[-1]
+    assert "status = 'running' AND locked_by = :worker_id" in sql and params["worker_id"] == "w1"
+
+
+def test_concurrency_limit_falls_back_to_default(monkeypatch):
+    monkeypatch.setattr(settings, "job_concurrency", {"embed_tools": 3})
+    monkeypatch.setattr(settings, "job_default_concurrency", 1)
+    assert jobs.concurrency_limit("embed_tools") == 3
+    assert jobs.concurrency_limit("other") == 1
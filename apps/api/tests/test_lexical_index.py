@@ -0,0 +1,67 @@
+import asyncio
+
+from app.services import rag
+from app.services.lexical_index import ToolLexicalIndex, reciprocal_rank_fusion, tokenize
+from app.services.vector_index import tool_record
+
+
+def _index() -> ToolLexicalIndex:
+    index = ToolLexicalIndex()
+    index.upsert(tool_record(1, "Notion AI", "写作助手 for docs and notes", "https://t/1", ["writing", "notes"], "apify"))
+    index.upsert(tool_record(2, "Zapier", "automate workflows between apps", "https://t/2", ["automation"], "apify"))
+    index.upsert(tool_record(3, "Make", "visual workflow automation builder", "https://t/3", ["automation", "no-code"], "manual"))
+    index.upsert(tool_record(4, "Grammarly", "writing feedback and grammar checks", "https://t/4", ["writing"], "manual"))
+    return index
+
+
+def test_tokenize_splits_latin_words_and_cjk_chars():
+    assert tokenize("Notion AI 写作助手 v2") == ["notion", "ai", "写", "作", "助", "手", "v2"]
+
+
+def test_bm25_prefers_name_and_tag_matches_and_applies_filters():
+    index = _index()
+    results = index.search("workflow automation", top_k=3)
+    assert [r["tool_id"] for r in results][:2] == [3, 2]
+
+    filtered = index.search("writing", top_k=5, filters={"source": "manual"})
+    assert [r["tool_id"] for r in filtered] == [4]
+    assert index.search("写作", top_k=1)[0]["tool_id"] == 1
+
+
+def test_exact_name_or_tag_match_ranks_first():
+    index = _index()
+    assert [r["tool_id"] for r in index.exact_matches("zapier")] == [2]
+    assert {r["tool_id"] for r in index.exact_matches("No-Code")} == {3}
+    assert index.search("make", top_k=1)[0]["tool_id"] == 3
+    assert index.exact_matches("workflow automation") == []
+
+
+def test_upsert_replaces_and_remove_drops_postings():
+    index = _index()
+    index.upsert(tool_record(2, "Zapier", "connect spreadsheets", "https://t/2", ["integration"], "apify"))
+    assert 2 not in {r["tool_id"] for r in index.search("automation", top_k=5)}
+    assert index.search("spreadsheets", top_k=1)[0]["tool_id"] == 2
+
+    index.remove(2)
+    assert index.search("spreadsheets", top_k=1) == []
+    assert len(index) == 3
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    a = [{"tool_id": 1}, {"tool_id": 2}, {"tool_id": 3}]
+    b = [{"tool_id": 3}, {"tool_id": 2}, {"tool_id": 9}]
+    fused = reciprocal_rank_fusion([a, b], top_k=2)
+    assert {r["tool_id"] for r in fused} == {2, 3}
+
+
+def test_hybrid_exact_match_skips_embedding(monkeypatch):
+    index = _index()
+    index._checked_at = float("inf")
+
+    async def fail_embed(*args, **kwargs):
+        raise AssertionError("embedding should not be called")
+
+    monkeypatch.setattr(rag, "lexical_index", index)
+    monkeypatch.setattr(rag, "embed_query", fail_embed)
+    results = asyncio.run(rag.search_tools(None, "Zapier", top_k=3, mode="hybrid"))
+    assert results[0]["tool_id"] == 2
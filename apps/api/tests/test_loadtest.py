@@ -0,0 +1,59 @@
+import asyncio
+
+import httpx
+from fastapi.testclient import TestClient
+from openai import AsyncOpenAI
+
+from app.core.onet_features import extract_onet_numeric_features
+from loadtest.fakes import FaultProfile, create_embeddings_app, create_onet_app, fake_embedding
+from loadtest.loadgen import percentile, summarize
+
+
+def test_fake_onet_serves_summary_and_detail():
+    client = TestClient(create_onet_app(FaultProfile(latency_ms=0)))
+    summary = client.get("/online/occupations/15-1252.00/summary").json()
+    assert len(summary["task_statements"]) == 20
+    assert client.get("/online/occupations/15-1252.00/summary").json() == summary
+
+    detail = client.get("/online/occupations/15-1252.00").json()
+    features = extract_onet_numeric_features({"detail": detail})
+    assert any(item["value"] is not None for item in features.values())
+
+
+def test_fault_profile_injects_errors_and_can_be_changed():
+    client = TestClient(create_onet_app(FaultProfile(latency_ms=0, error_rate=1.0, error_statuses=[503])))
+    assert client.get("/online/search", params={"keyword": "nurse"}).status_code == 503
+
+    assert client.put("/_fault", json={"error_rate": 0.0}).json()["error_rate"] == 0.0
+    assert client.get("/online/search", params={"keyword": "nurse"}).status_code == 200
+
+
+def test_fake_embeddings_speak_the_openai_sdk():
+    app = create_embeddings_app(FaultProfile(latency_ms=0))
+
+    async def run():
+        http_client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app))
+        client = AsyncOpenAI(api_key="test", base_url="http://fake/v1", http_client=http_client)
+        # The SDK requests base64 when numpy is installed; ask for floats explicitly too.
+        default = await client.embeddings.create(model="text-embedding-3-small", input=["a", "b"])
+        floats = await client.embeddings.create(model="text-embedding-3-small", input="a", encoding_format="float")
+        await client.close()
+        return default, floats
+
+    default, floats = asyncio.run(run())
+    assert len(default.data) == 2
+    assert len(default.data[0].embedding) == 1536
+    assert abs(default.data[0].embedding[0] - fake_embedding("a")[0]) < 1e-6
+    assert floats.data[0].embedding == fake_embedding("a")
+
+
+def test_summarize_reports_percentiles_and_errors():
+    assert percentile([0.1 * i for i in range(1, 101)], 50) == 5.0
+    assert percentile([], 99) is None
+
+    report = summarize({"risk": [(0.01, 200), (0.02, 200), (0.5, 503), (0.03, "ConnectTimeout")]}, elapsed_s=2.0)
+    risk = report["endpoints"]["risk"]
+    assert report["throughput_rps"] == 2.0
+    assert risk["errors"] == 2
+    assert risk["p50_ms"] == 20.0
+    assert risk["p99_ms"] == 500.0
@@ -0,0 +1,43 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app.core import metrics
+from app.core.metrics import Histogram, record_stage, server_timing, start_request_timings, timed
+from app.main import app
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_seconds", "Test.", ("stage",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value, "x")
+    lines = histogram.render()
+    assert 'test_seconds_bucket{stage="x",le="0.1"} 2' in lines
+    assert 'test_seconds_bucket{stage="x",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{stage="x",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{stage="x"} 4' in lines
+
+
+def test_stage_timings_are_shared_with_child_tasks_and_threads():
+    async def run():
+        timings = start_request_timings()
+        with timed("outer"):
+            await asyncio.gather(asyncio.to_thread(record_stage, "db", 0.002), asyncio.create_task(asyncio.sleep(0)))
+        record_stage("db", 0.003)
+        return timings
+
+    timings = asyncio.run(run())
+    assert set(timings) == {"outer", "db"}
+    assert abs(timings["db"] - 0.005) < 1e-9
+    assert server_timing({"db": 0.005}) == "db;dur=5.0"
+
+
+def test_responses_carry_server_timing_and_metrics_are_exposed():
+    client = TestClient(app)
+    response = client.get("/health")
+    assert response.headers["server-timing"].startswith("total;dur=")
+
+    metrics.record_cache("onet_detail", True)
+    body = client.get("/metrics").text
+    assert 'jobshield_http_request_duration_seconds_count{method="GET",route="/health",status="200"}' in body
+    assert 'jobshield_cache_requests_total{cache="onet_detail",result="hit"}' in body
@@ -0,0 +1,58 @@
+import sys
+import threading
+
+from fastapi.testclient import TestClient
+
+from app.core.config import settings
+from app.core.profiler import SamplingProfiler, collapse, to_speedscope
+from app.main import app
+
+
+def _leaf():
+    return collapse(sys._getframe())
+
+
+def test_collapse_orders_frames_root_first():
+    stack = _leaf()
+    assert stack.endswith("test_profiler:test_collapse_orders_frames_root_first;test_profiler:_leaf")
+
+
+def test_sampler_counts_stacks_of_the_target_thread():
+    done = threading.Event()
+
+    def spin():
+        while not done.is_set():
+            pass
+
+    worker = threading.Thread(target=spin)
+    worker.start()
+    profiler = SamplingProfiler(worker.ident, 0.001).start()
+    threading.Event().wait(0.05)
+    stacks = profiler.stop()
+    done.set()
+    worker.join()
+    assert stacks and all("test_profiler:spin" in stack for stack in stacks)
+
+
+def test_speedscope_shares_frames_between_samples():
+    profile = to_speedscope("a;b 3\na;c 1\n", "req")
+    assert [f["name"] for f in profile["shared"]["frames"]] == ["a", "b", "c"]
+    assert profile["profiles"][0]["samples"] == [[0, 1], [0, 2]]
+    assert profile["profiles"][0]["weights"] == [3, 1]
+
+
+def test_profile_header_requires_admin_key_and_is_retrievable(monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "profile_dir", str(tmp_path))
+    client = TestClient(app)
+    admin = {"x-admin-key": settings.admin_api_key}
+
+    plain = client.get("/health", headers={"x-profile": "1", "x-request-id": "no-key"})
+    assert "x-profile-id" not in plain.headers
+    assert not (tmp_path / "no-key.collapsed").exists()
+
+    profiled = client.get("/health", headers={"x-profile": "1", "x-request-id": "req-1", **admin})
+    assert profiled.headers["x-profile-id"] == "req-1"
+    assert client.get("/admin/profiles/req-1", headers=admin).status_code == 200
+    assert client.get("/admin/profiles/req-1?format=speedscope", headers=admin).json()["name"] == "req-1"
+    assert client.get("/admin/profiles/missing", headers=admin).status_code == 404
+    assert client.get("/admin/profiles/req-1").status_code == 401
@@ -1,4 +1,7 @@
-from app.services.rag import build_tools_filter_sql
+import asyncio
+
+from app.core.config import settings
+from app.services.rag import _pgvector_search, _pgvector_search_batch, build_batch_search_sql, build_tools_filter_sql, build_vector_search_sql, dedupe_results
 
 
 def test_build_tools_filter_sql_with_filters():
@@ -6,3 +9,169 @@ def test_build_tools_filter_sql_with_filters():
     assert "tc.source = :source" in sql
     assert "tc.tags ?| :tags" in sql
     assert params["source"] == "apify"
+
+
+def test_quantized_search_reranks_candidates_against_full_vectors():
+    sql = build_vector_search_sql("halfvec", " AND tc.source = :source")
+    assert "ORDER BY te.embedding_half <=> CAST(:embedding AS vector)::halfvec(1536)" in sql
+    assert "LIMIT :candidates" in sql
+    assert "ORDER BY c.embedding <=> CAST(:embedding AS vector)" in sql
+    assert "tc.source = :source" in sql
+
+    assert "embedding_bits <~> binary_quantize" in build_vector_search_sql("binary", "")
+    assert ":candidates" not in build_vector_search_sql("full", "")
+
+
+def test_source_filter_can_target_embedding_table_for_partial_indexes():
+    sql, params = build_tools_filter_sql({"source": "manual"}, source_column="te.source")
+    assert sql == " AND te.source = :source" and params == {"source": "manual"}
+
+    sql, params = build_tools_filter_sql({"source": "apify"}, source_column="te.source", literal_sources=frozenset({"apify"}))
+    assert sql == " AND te.source = 'apify'" and params == {}
+
+
+def test_filtered_search_widens_ef_search_until_top_k(monkeypatch):
+    class FakeResult:
+        def __init__(self, rows):
+            self._rows = rows
+
+        def mappings(self):
+            return self
+
+        def all(self):
+            return self._rows
+
+    class FakeSession:
+        def __init__(self):
+            self.ef_values = []
+
+        async def execute(self, stmt, params=None):
+            if "hnsw.ef_search" in str(stmt):
+                self.ef_values.append(int(params["ef"]))
+                return FakeResult([])
+            if "set_config" in str(stmt):
+                return FakeResult([])
+            hits = 2 if self.ef_values[-1] < 640 else 5
+            return FakeResult([{"tool_id": i} for i in range(hits)])
+
+    monkeypatch.setattr(settings, "rag_vector_storage", "full")
+    monkeypatch.setattr(settings, "rag_ef_search_max", 1000)
+    monkeypatch.setattr(settings, "rag_iterative_scan", False)
+    db = FakeSession()
+    rows = asyncio.run(_pgvector_search(db, [0.0] * 3, 5, {"tags": ["rare"]}, ef_search=40))
+    assert len(rows) == 5
+    assert db.ef_values == [40, 160, 640]
+
+    # With iterative scans the index already kept walking: one query, no widening.
+    monkeypatch.setattr(settings, "rag_iterative_scan", True)
+    db = FakeSession()
+    assert len(asyncio.run(_pgvector_search(db, [0.0] * 3, 5, {"tags": ["rare"]}, ef_search=40))) == 2
+    assert db.ef_values == [40]
+
+
+def test_batch_search_sql_has_one_lateral_scan_per_values_row():
+    sql = build_batch_search_sql("full", 3)
+    assert sql.count("CAST(:e") == 3 and ":e2" in sql
+    assert "CROSS JOIN LATERAL" in sql
+    assert "ORDER BY te.embedding <=> q.embedding" in sql
+    assert "(q.tags IS NULL OR tc.tags ?| q.tags)" in sql
+
+
+def test_batch_search_groups_by_source_and_retries_starved_queries(monkeypatch):
+    class FakeResult:
+        def __init__(self, rows):
+            self._rows = rows
+
+        def mappings(self):
+            return self
+
+        def all(self):
+            return self._rows
+
+    class FakeSession:
+        def __init__(self):
+            self.settings, self.statements = [], []
+            self.ef = 0
+
+        async def execute(self, stmt, params=None):
+            sql = str(stmt)
+            if "hnsw.ef_search" in sql:
+                self.ef = int(params["ef"])
+            if "set_config" in sql:
+                self.settings.append(params.get("ef") or params.get("mode"))
+                return FakeResult([])
+            self.statements.append((sql, params))
+            n = sum(1 for key in params if key.startswith("i"))
+            hits = 5 if self.ef >= 160 else 2
+            return FakeResult([{"idx": j, "tool_id": t} for j in range(n) for t in range(hits)])
+
+    monkeypatch.setattr(settings, "rag_vector_storage", "full")
+    monkeypatch.setattr(settings, "rag_partial_index_sources", ["apify"])
+    monkeypatch.setattr(settings, "rag_iterative_scan", False)
+    monkeypatch.setattr(settings, "rag_ef_search_max", 1000)
+    searches = [
+        {"top_k": 5, "filters": {"tags": None, "source": None}},
+        {"top_k": 5, "filters": {"tags": None, "source": "apify"}},
+        {"top_k": 5, "filters": {"tags": ["rare"], "source": None}},
+    ]
+    db = FakeSession()
+    results = asyncio.run(_pgvector_search_batch(db, [[0.0]] * 3, searches, ef_search=40))
+
+    assert [len(r) for r in results] == [2, 5, 5]
+    sqls = [sql for sql, _ in db.statements]
+    assert "te.source = 'apify'" in sqls[1] and "te.source = 'apify'" in sqls[2]
+    assert "q.source IS NULL" in sqls[0] and "q.source IS NULL" in sqls[3]
+    # The unfiltered query runs once; each filtered group is re-run once at ef 160.
+    assert db.settings == ["40", "40", "160", "40", "160"]
+
+
+def test_batch_search_treats_empty_filter_values_as_unfiltered(monkeypatch):
+    class FakeResult:
+        def mappings(self):
+            return self
+
+        def all(self):
+            return []
+
+    class FakeSession:
+        def __init__(self):
+            self.params, self.modes = [], []
+
+        async def execute(self, stmt, params=None):
+            if "hnsw.iterative_scan" in str(stmt):
+                self.modes.append(params["mode"])
+            elif "set_config" not in str(stmt):
+                self.params.append(params)
+            return FakeResult()
+
+    monkeypatch.setattr(settings, "rag_vector_storage", "full")
+    monkeypatch.setattr(settings, "rag_iterative_scan", True)
+    db = FakeSession()
+    asyncio.run(_pgvector_search_batch(db, [[0.0]], [{"top_k": 5, "filters": {"tags": [], "source": ""}}], ef_search=40))
+
+    assert (db.params[0]["s0"], db.params[0]["t0"]) == (None, None)
+    assert db.modes == ["off"]
+
+
+def test_dedupe_keeps_tool_under_best_scoring_query():
+    results = [
+        [{"tool_id": 1, "score": 0.9}, {"tool_id": 2, "score": 0.5}, {"tool_id": 3, "score": 0.4}],
+        [{"tool_id": 2, "score": 0.8}, {"tool_id": 4, "score": 0.3}],
+    ]
+    deduped = dedupe_results(results, top_k=[2, 2])
+    assert [[r["tool_id"] for r in items] for items in deduped] == [[1, 3], [2, 4]]
+
+
+def test_setup_vector_indexes_builds_only_the_configured_mode():
+    from app.commands.setup_vector_indexes import index_statements
+
+    statements = index_statements("halfvec", ["apify"], drop_unused=True)
+    created = [s for s in statements if s.startswith("CREATE")]
+    dropped = [s for s in statements if s.startswith("DROP")]
+    assert created == [
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tool_embeddings_half_hnsw ON tool_embeddings USING hnsw (embedding_half halfvec_cosine_ops)",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_tool_embeddings_half_hnsw_apify ON tool_embeddings USING hnsw (embedding_half halfvec_cosine_ops) WHERE source = 'apify'",
+    ]
+    assert "DROP INDEX CONCURRENTLY IF EXISTS idx_tool_embeddings_hnsw" in dropped
+    assert not any("half" in s for s in dropped)
+    assert all(s.startswith("CREATE") for s in index_statements("full", ["apify"]))
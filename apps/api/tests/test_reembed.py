@@ -0,0 +1,125 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+from app.services.reembed import RateLimiter
+
+
+def test_rate_limiter_spaces_calls():
+    limiter = RateLimiter(per_minute=1200)  # 50 ms apart
+
+    async def run():
+        start = time.monotonic()
+        for _ in range(4):
+            await limiter.acquire()
+        return time.monotonic() - start
+
+    assert asyncio.run(run()) >= 0.14
+
+
+def test_serving_model_is_cached_until_invalidated(monkeypatch):
+    from app.services import embeddings
+
+    class FakeResult:
+        def scalar_one_or_none(self):
+            return "old-model"
+
+    class FakeSession:
+        calls = 0
+
+        async def execute(self, stmt):
+            FakeSession.calls += 1
+            return FakeResult()
+
+    embeddings.invalidate_serving_model()
+    assert asyncio.run(embeddings.serving_model(FakeSession())) == "old-model"
+    assert asyncio.run(embeddings.serving_model(FakeSession())) == "old-model"
+    assert FakeSession.calls == 1
+    embeddings.invalidate_serving_model()
+
+
+def test_swap_notification_updates_the_cached_model():
+    from app.services import embeddings
+
+    embeddings._serving_model.set("model", "old-model")
+    embeddings._on_serving_model_notify(None, 1, embeddings.SERVING_MODEL_CHANNEL, "new-model")
+    assert asyncio.run(embeddings.serving_model()) == "new-model"
+    embeddings.invalidate_serving_model()
+
+
+def test_swap_releases_the_lock_and_catches_up_again_when_rows_went_stale(monkeypatch):
+    from app.services import reembed
+
+    rounds = []
+
+    async def fake_catch_up(db, run, limiter, batch_size):
+        rounds.append(batch_size)
+        return 0
+
+    class FakeResult:
+        def __init__(self, row):
+            self.row = row
+
+        def first(self):
+            return self.row
+
+    class FakeSession:
+        def __init__(self):
+            self.stale = [("tool",), None]
+            self.statements, self.rollbacks, self.commits = [], 0, 0
+
+        async def execute(self, stmt, params=None):
+            self.statements.append(str(stmt))
+            return FakeResult(self.stale.pop(0) if "tools_catalog.id" in str(stmt) else None)
+
+        async def rollback(self):
+            self.rollbacks += 1
+
+        async def refresh(self, obj):
+            pass
+
+        async def commit(self):
+            self.commits += 1
+
+    steps = []
+
+    async def fake_build(db):
+        steps.append("build")
+
+    async def fake_sync(db):
+        steps.append("sync")
+
+    async def fake_cut_over(db, model):
+        steps.append(f"cut_over:{model}")
+
+    monkeypatch.setattr(reembed, "catch_up", fake_catch_up)
+    monkeypatch.setattr(reembed, "build_next_table", fake_build)
+    monkeypatch.setattr(reembed, "sync_next_table", fake_sync)
+    monkeypatch.setattr(reembed, "cut_over", fake_cut_over)
+    db = FakeSession()
+    run = SimpleNamespace(model="new-model", status="running", finished_at=None)
+    asyncio.run(reembed.swap(db, run, reembed.RateLimiter(0), batch_size=10))
+
+    assert rounds == [10, 10, 10]
+    assert steps == ["build", "sync", "sync", "cut_over:new-model"]
+    assert (db.rollbacks, run.status) == (1, "completed")
+    assert db.statements[-1] == f"DROP TABLE IF EXISTS {reembed.OLD_TABLE}"
+
+
+def test_next_table_copies_indexes_and_triggers_under_new_names():
+    from app.services.reembed import next_index_sql, next_trigger_sql
+
+    assert next_index_sql(
+        "idx_tool_embeddings_hnsw_apify",
+        "CREATE INDEX idx_tool_embeddings_hnsw_apify ON public.tool_embeddings USING hnsw (embedding vector_cosine_ops) WHERE ((source)::text = 'apify'::text)",
+        None,
+    ) == [
+        "CREATE INDEX idx_tool_embeddings_hnsw_apify_next ON tool_embeddings_next USING hnsw (embedding vector_cosine_ops) WHERE ((source)::text = 'apify'::text)"
+    ]
+    assert next_index_sql("tool_embeddings_pkey", "CREATE UNIQUE INDEX tool_embeddings_pkey ON public.tool_embeddings USING btree (id)", "p") == [
+        "CREATE UNIQUE INDEX tool_embeddings_pkey_next ON tool_embeddings_next USING btree (id)",
+        "ALTER TABLE tool_embeddings_next ADD CONSTRAINT tool_embeddings_pkey_next PRIMARY KEY USING INDEX tool_embeddings_pkey_next",
+    ]
+    assert next_trigger_sql(
+        "CREATE TRIGGER trg_quantize_tool_embedding BEFORE INSERT OR UPDATE OF embedding ON public.tool_embeddings FOR EACH ROW EXECUTE FUNCTION quantize_tool_embedding()"
+    ) == "CREATE TRIGGER trg_quantize_tool_embedding BEFORE INSERT OR UPDATE OF embedding ON tool_embeddings_next FOR EACH ROW EXECUTE FUNCTION quantize_tool_embedding()"
@@ -0,0 +1,36 @@
+import json
+
+from app.services.replay import risk_bucket, score_chunk
+
+
+def _sample(assessment_id: int, baseline: float) -> dict:
+    return {
+        "assessment_id": assessment_id,
+        "occupation_code": "43-3031.00",
+        "baseline_score": baseline,
+        "features": None,
+        "tasks": ["Enter standardized records", "Compile routine transaction reports"],
+        "context": {"industry": "data entry", "region": None, "selected_tools": [], "occupation_code": "43-3031.00", "occupation_title": None},
+    }
+
+
+def test_risk_bucket_thresholds():
+    assert [risk_bucket(s) for s in (10, 40, 69.9, 70)] == ["low", "medium", "medium", "high"]
+
+
+def test_score_chunk_reports_delta_and_buckets():
+    payloads = {
+        "43-3031.00": {
+            "work_context": [{"name": "Structured versus Unstructured Work", "value": 90, "scale": {"min": 0, "max": 100}}],
+            "work_activities": [
+                {"name": "Processing Information", "value": 88, "scale": {"min": 0, "max": 100}},
+                {"name": "Thinking Creatively", "value": 25, "scale": {"min": 0, "max": 100}},
+            ],
+        }
+    }
+    rows = score_chunk(json.dumps({}), "v1", payloads, [_sample(1, 20.0), _sample(2, 95.0)])
+    assert [r["assessment_id"] for r in rows] == [1, 2]
+    for row, baseline in zip(rows, (20.0, 95.0)):
+        assert row["delta"] == round(row["replay_score"] - baseline, 4)
+        assert row["baseline_bucket"] == risk_bucket(baseline)
+        assert row["model_version"] == "v1"
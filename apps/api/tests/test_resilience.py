@@ -0,0 +1,152 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.core import resilience
+from app.core.resilience import Bulkhead, BulkheadFullError, CircuitBreaker, CircuitOpenError, Upstream
+
+
+def _upstream(threshold=2, reset_s=30.0, max_concurrent=4, queue_s=0.05, hedge_s=0.0) -> Upstream:
+    return Upstream("test", CircuitBreaker(threshold, reset_s), Bulkhead(max_concurrent, queue_s), hedge_delay_s=hedge_s)
+
+
+async def _boom():
+    raise httpx.ConnectError("down")
+
+
+def test_circuit_opens_after_threshold_and_fails_fast():
+    upstream = _upstream()
+    calls = []
+
+    async def run():
+        for _ in range(2):
+            with pytest.raises(httpx.ConnectError):
+                await upstream.call(_boom)
+
+        async def never():
+            calls.append(1)
+
+        with pytest.raises(CircuitOpenError):
+            await upstream.call(never)
+
+    asyncio.run(run())
+    assert upstream.breaker.state == "open"
+    assert calls == []
+
+
+def test_half_open_trial_success_closes_circuit(monkeypatch):
+    upstream = _upstream(threshold=1, reset_s=10.0)
+    clock = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+
+    async def ok():
+        return "ok"
+
+    async def run():
+        with pytest.raises(httpx.ConnectError):
+            await upstream.call(_boom)
+        clock[0] += 11
+        return await upstream.call(ok)
+
+    assert asyncio.run(run()) == "ok"
+    assert upstream.breaker.state == "closed"
+
+
+def test_client_errors_do_not_trip_the_breaker():
+    upstream = _upstream(threshold=1)
+    response = httpx.Response(404, request=httpx.Request("GET", "https://onet/x"))
+
+    async def not_found():
+        raise httpx.HTTPStatusError("404", request=response.request, response=response)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        asyncio.run(upstream.call(not_found))
+    assert upstream.breaker.state == "closed"
+
+
+def test_bulkhead_rejects_when_queue_wait_expires():
+    upstream = _upstream(max_concurrent=1, queue_s=0.01)
+
+    async def slow():
+        await asyncio.sleep(0.1)
+        return "slow"
+
+    async def run():
+        return await asyncio.gather(upstream.call(slow), upstream.call(slow), return_exceptions=True)
+
+    first, second = asyncio.run(run())
+    assert first == "slow"
+    assert isinstance(second, BulkheadFullError)
+    assert upstream.snapshot()["rejected"] == 1
+    assert upstream.breaker.state == "closed"
+
+
+def test_hedged_request_returns_the_faster_copy():
+    upstream = _upstream(hedge_s=0.01)
+    delays = [0.5, 0.0]
+
+    async def call():
+        await asyncio.sleep(delays.pop(0))
+        return "done"
+
+    async def run():
+        return await asyncio.wait_for(upstream.call(call), 0.3)
+
+    assert asyncio.run(run()) == "done"
+    assert upstream.hedged == 1
+
+
+def test_blocking_call_releases_half_open_trial_on_client_error(monkeypatch):
+    upstream = _upstream(threshold=1, reset_s=10.0)
+    clock = [100.0]
+    monkeypatch.setattr(resilience.time, "monotonic", lambda: clock[0])
+    response = httpx.Response(400, request=httpx.Request("POST", "https://api/embeddings"))
+
+    def bad_request():
+        raise httpx.HTTPStatusError("bad request", request=response.request, response=response)
+
+    upstream.record_failure()
+    clock[0] += 11
+    with pytest.raises(httpx.HTTPStatusError):
+        upstream.call_blocking(bad_request)
+    assert upstream.breaker.state == "closed"
+    assert upstream.call_blocking(lambda: "ok") == "ok"
+
+
+def test_blocking_call_neutral_errors_do_not_open_the_circuit():
+    upstream = _upstream(threshold=2)
+
+    def timed_out():
+        raise httpx.ReadTimeout("budget")
+
+    for _ in range(5):
+        with pytest.raises(httpx.ReadTimeout):
+            upstream.call_blocking(timed_out, neutral=lambda e: isinstance(e, httpx.TimeoutException))
+    assert upstream.breaker.state == "closed"
+    assert upstream.breaker.failures == 0
+
+
+def test_budget_timeouts_do_not_open_the_embeddings_circuit(monkeypatch):
+    from types import SimpleNamespace
+
+    from openai import APITimeoutError
+
+    from app.core import semantic_features
+    from app.core.config import settings
+
+    def create(model, input):
+        raise APITimeoutError(request=httpx.Request("POST", "https://api/embeddings"))
+
+    fake = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    fake.with_options = lambda **kwargs: fake
+    monkeypatch.setattr(settings, "openai_api_key", "test")
+    monkeypatch.setattr(semantic_features, "_sync_client", lambda: fake)
+    monkeypatch.setattr(semantic_features, "_anchors", {})
+    breaker = resilience.embeddings_upstream.breaker
+    breaker.reset()
+
+    for _ in range(settings.upstream_failure_threshold + 1):
+        assert semantic_features.extract_semantic_features(["a", "b"], timeout=0.01) is None
+    assert breaker.state == "closed"
+    assert breaker.failures == 0
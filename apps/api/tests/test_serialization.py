@@ -0,0 +1,43 @@
+import json
+from datetime import datetime
+
+from app.schemas.risk import RISK_EVALUATE_ADAPTER
+from app.utils.serialization import adapter_response, sse_pack
+
+
+def test_sse_pack_frames_utf8_json():
+    frame = sse_pack("delta", {"content": "正在生成", "at": datetime(2024, 1, 2, 3, 4, 5)})
+    head, data = frame.decode().rstrip("\n").split("\n")
+    assert frame.endswith(b"\n\n")
+    assert head == "event: delta"
+    assert json.loads(data.removeprefix("data: ")) == {"content": "正在生成", "at": "2024-01-02T03:04:05"}
+
+
+def test_adapter_response_projects_engine_output_to_schema():
+    result = {
+        "score": 61.5,
+        "confidence": 0.8,
+        "model_version": "v1",
+        "breakdown": [
+            {
+                "factor": "automation_susceptibility",
+                "weight": 0.4,
+                "value": 0.7,
+                "direction": "positive",
+                "risk_contribution": 28.0,
+                "explanation": "x",
+                "subfactors": [{"name": "routine_structured", "value": 0.8, "weight": 0.5, "source": "onet"}],
+            }
+        ],
+        "summary": "s",
+        "suggested_focus": ["a"],
+        "raw_risk": 0.6,
+        "assessment_id": 7,
+        "experiment": None,
+    }
+    response = adapter_response(RISK_EVALUATE_ADAPTER, result)
+    body = json.loads(response.body)
+    assert response.media_type == "application/json"
+    assert "raw_risk" not in body
+    assert body["assessment_id"] == 7
+    assert body["breakdown"][0]["subfactors"][0]["name"] == "routine_structured"
@@ -0,0 +1,104 @@
+import numpy as np
+
+from app.core.config import settings
+from app.services.vector_index import ToolVectorIndex, tool_record
+
+
+def _tools(n: int, dim: int = 32, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, dim)).astype(np.float32)
+    tools = [tool_record(i, f"tool-{i}", "desc", f"https://t/{i}", ["even" if i % 2 == 0 else "odd"], "apify" if i < n // 2 else "manual") for i in range(n)]
+    return list(range(n)), vectors, tools
+
+
+def test_brute_force_search_and_filters(tmp_path):
+    ids, vectors, tools = _tools(200)
+    index = ToolVectorIndex(tmp_path)
+    index.add(ids, vectors, tools)
+
+    results = index.search(vectors[17].tolist(), top_k=3)
+    assert results[0]["tool_id"] == 17
+    assert abs(results[0]["score"] - 1.0) < 1e-5
+
+    filtered = index.search(vectors[17].tolist(), top_k=5, filters={"tags": ["even"], "source": "apify"})
+    assert filtered and all(r["tool_id"] % 2 == 0 and r["tool_id"] < 100 for r in filtered)
+
+
+def test_sparse_filter_returns_only_matching_rows(tmp_path):
+    ids, vectors, tools = _tools(40)
+    tools[9] = tool_record(9, "tool-9", "desc", "https://t/9", ["rare"], "apify")
+    index = ToolVectorIndex(tmp_path)
+    index.add(ids, vectors, tools)
+    # Scored straight off the memory map; rows failing the filter never surface.
+    assert [r["tool_id"] for r in index.search(vectors[0].tolist(), top_k=5, filters={"tags": ["rare"]})] == [9]
+    assert index.search(vectors[0].tolist(), top_k=5, filters={"tags": ["missing"]}) == []
+
+
+def test_newer_segment_overrides_and_other_workers_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_index_refresh_s", 0.0)
+    ids, vectors, tools = _tools(50)
+    writer = ToolVectorIndex(tmp_path)
+    writer.add(ids, vectors, tools)
+    reader = ToolVectorIndex(tmp_path)
+    assert reader.load()
+
+    moved = vectors[3] * -1
+    writer.add([3], [moved.tolist()], [tool_record(3, "renamed", "desc", "https://t/3", [], "apify")])
+    results = reader.search(moved.tolist(), top_k=1)
+    assert results[0]["tool_id"] == 3 and results[0]["name"] == "renamed"
+    assert len(reader) == 50
+
+
+def test_ivf_segment_finds_exact_match(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_index_ivf_min_rows", 100)
+    monkeypatch.setattr(settings, "vector_index_nprobe", 4)
+    ids, vectors, tools = _tools(1000)
+    index = ToolVectorIndex(tmp_path)
+    index.add(ids, vectors, tools)
+    assert index._segments[0].centroids is not None
+    assert index.search(vectors[421].tolist(), top_k=1)[0]["tool_id"] == 421
+
+
+def test_search_many_matches_single_query_search(tmp_path):
+    ids, vectors, tools = _tools(120)
+    index = ToolVectorIndex(tmp_path)
+    index.add(ids, vectors, tools)
+
+    batch = index.search_many([vectors[5].tolist(), vectors[80].tolist()], top_k=4, filters={"tags": ["even"]})
+    single = index.search(vectors[5].tolist(), top_k=4, filters={"tags": ["even"]})
+    assert [r["tool_id"] for r in batch[0]] == [r["tool_id"] for r in single]
+    assert np.allclose([r["score"] for r in batch[0]], [r["score"] for r in single], atol=1e-5)
+    assert batch[1][0]["tool_id"] == 80
+
+
+def test_compaction_from_a_stale_worker_keeps_segments_appended_elsewhere(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "vector_index_retire_grace_s", 300.0)
+    ids, vectors, tools = _tools(20)
+    stale = ToolVectorIndex(tmp_path)
+    stale.add(ids[:10], vectors[:10], tools[:10])
+    stale.add(ids[10:15], vectors[10:15], tools[10:15])
+
+    other = ToolVectorIndex(tmp_path)
+    other.load()
+    other.add(ids[15:], vectors[15:], tools[15:])
+
+    stale.compact()
+    assert len(stale._read_manifest()) == 1
+    assert len(stale) == 20
+    assert stale.search(vectors[18].tolist(), top_k=1)[0]["tool_id"] == 18
+    # Replaced segments stay on disk for readers still on the old manifest.
+    assert len(list(tmp_path.glob("seg-*"))) == 4
+    assert other.load() and len(other) == 20
+
+
+def test_retired_segments_are_deleted_after_the_grace_period(tmp_path, monkeypatch):
+    ids, vectors, tools = _tools(20)
+    index = ToolVectorIndex(tmp_path)
+    first = index.add(ids[:10], vectors[:10], tools[:10])
+    monkeypatch.setattr(settings, "vector_index_retire_grace_s", 0.0)
+    rebuilt = index.add(ids, vectors, tools, replaces=[first])
+    index.add(ids[:1], vectors[:1], tools[:1])
+
+    names = {path.name for path in tmp_path.glob("seg-*")}
+    assert first not in names and rebuilt in names
+    assert len(index) == 20
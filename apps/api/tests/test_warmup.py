@@ -0,0 +1,115 @@
+import asyncio
+from types import SimpleNamespace
+
+from fastapi.testclient import TestClient
+
+from app.core import semantic_features
+from app.core.config import settings
+from app.core.gsti_router import router_for
+from app.main import app
+from app.services import warmup
+from app.services.experiments import CachedExperiment, experiment_cache
+
+
+def test_router_for_shares_routers_per_config():
+    assert router_for(None) is router_for({})
+    params = {"v1": {"calibration": {"k": 6.0, "x0": 0.4}}}
+    reordered = {"v1": {"calibration": {"x0": 0.4, "k": 6.0}}}
+    assert router_for(params) is router_for(reordered)
+    assert router_for(params) is not router_for(None)
+    assert router_for(params).config.v1.calibration.k == 6.0
+
+
+def test_warm_up_retries_db_then_flips_readiness(monkeypatch):
+    attempts = []
+
+    async def flaky_pool():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise ConnectionError("db not up yet")
+        return 4
+
+    async def reload(db):
+        experiment_cache._by_name = {"calib": CachedExperiment(id=1, name="calib", model_version="v1", params={"v1": {"calibration": {"k": 5.0}}})}
+
+    async def refresh():
+        return None
+
+    class FakeSession:
+        async def __aenter__(self):
+            return object()
+
+        async def __aexit__(self, *exc):
+            return False
+
+    monkeypatch.setattr(warmup, "warm_db_pool", flaky_pool)
+    monkeypatch.setattr(warmup, "warm_lexical_index", refresh)
+    monkeypatch.setattr(warmup, "SessionLocal", FakeSession)
+    monkeypatch.setattr(experiment_cache, "_by_name", {})
+    monkeypatch.setattr(experiment_cache, "reload", reload)
+    monkeypatch.setattr(settings, "warmup_retry_interval_s", 0)
+    monkeypatch.setattr(settings, "openai_api_key", None)
+
+    asyncio.run(warmup.warm_up())
+
+    assert len(attempts) == 2
+    assert warmup.readiness.ready
+    assert warmup.readiness.steps == {"db_pool": "ok", "http_clients": "ok", "routers": "ok", "anchor_vectors": "skipped", "lexical_index": "ok"}
+    assert router_for({"v1": {"calibration": {"k": 5.0}}}).config.v1.calibration.k == 5.0
+    asyncio.run(warmup.onet_client.aclose())
+
+
+def test_ready_endpoint_reports_warming_until_done():
+    client = TestClient(app)
+    warmup.readiness.reset()
+    response = client.get("/ready")
+    assert response.status_code == 503
+    assert response.json()["status"] == "warming"
+
+    warmup.readiness.mark_ready()
+    assert client.get("/ready").json()["status"] == "ready"
+    assert client.get("/health").status_code == 200
+
+
+def test_anchor_vectors_are_embedded_once(monkeypatch):
+    calls = []
+
+    def create(model, input):
+        calls.append(list(input))
+        return SimpleNamespace(data=[SimpleNamespace(embedding=[1.0, float(i)]) for i in range(len(input))])
+
+    fake = SimpleNamespace(embeddings=SimpleNamespace(create=create))
+    monkeypatch.setattr(settings, "openai_api_key", "test")
+    monkeypatch.setattr(semantic_features, "_sync_client", lambda: fake)
+    monkeypatch.setattr(semantic_features, "_anchors", {})
+
+    assert semantic_features.warm_anchor_vectors("m")
+    first = semantic_features.extract_semantic_features(["a", "b"], model="m")
+    second = semantic_features.extract_semantic_features(["c", "d"], model="m")
+
+    assert first["model"] == second["model"] == "m"
+    assert calls == [[semantic_features.AUTOMATION_ANCHOR, semantic_features.HUMAN_ANCHOR], ["a", "b"], ["c", "d"]]
+
+
+def test_hanging_best_effort_step_times_out_without_blocking_readiness(monkeypatch):
+    async def ok_pool():
+        return 1
+
+    async def hang():
+        await asyncio.sleep(30)
+
+    async def noop():
+        return None
+
+    monkeypatch.setattr(warmup, "warm_db_pool", ok_pool)
+    monkeypatch.setattr(warmup, "warm_http_clients", noop)
+    monkeypatch.setattr(warmup, "warm_routers", noop)
+    monkeypatch.setattr(warmup, "warm_lexical_index", noop)
+    monkeypatch.setattr(warmup, "warm_anchors", hang)
+    monkeypatch.setattr(settings, "warmup_step_timeout_s", 0.05)
+
+    asyncio.run(warmup.warm_up())
+
+    assert warmup.readiness.ready
+    assert warmup.readiness.steps["anchor_vectors"] == "failed: TimeoutError"
+    assert warmup.readiness.steps["routers"] == "ok"
@@ -10,11 +10,13 @@ export default function EvaluatePage() {
   const [skills, setSkills] = useState('python,sql,communication')
   const [prefs, setPrefs] = useState('creative,client communication')
   const [loading, setLoading] = useState(false)
+  const [estimate, setEstimate] = useState<number | null>(null)
 
   const run = async () => {
     setLoading(true)
+    setEstimate(null)
     const sessionId = crypto.randomUUID()
-    const res = await fetch('/api/py/risk/evaluate', {
+    const res = await fetch('/api/py/risk/evaluate/stream', {
       method: 'POST',
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({
@@ -27,10 +29,30 @@ export default function EvaluatePage() {
         }
       })
     })
-    const data = await res.json()
-    localStorage.setItem('assessment', JSON.stringify(data))
-    router.push('/dashboard')
+    const reader = res.body?.getReader()
+    if (!reader) { setLoading(false); return }
+    const decoder = new TextDecoder()
+    let buffer = ''
+    while (true) {
+      const { done, value } = await reader.read()
+      if (done) break
+      buffer += decoder.decode(value, { stream: true })
+      const chunks = buffer.split('\n\n')
+      buffer = chunks.pop() || ''
+      for (const chunk of chunks) {
+        const evt = chunk.match(/event: (.*)/)?.[1]
+        const dataLine = chunk.match(/data: (.*)/)?.[1]
+        if (!evt || !dataLine) continue
+        const data = JSON.parse(dataLine)
+        if (evt === 'estimate') setEstimate(data.score)
+        if (evt === 'result') {
+          localStorage.setItem('assessment', JSON.stringify(data))
+          router.push('/dashboard')
+        }
+      }
+    }
+    setLoading(false)
   }
 
-  return <div className="card"><h2>对话式引导（MVP）</h2><div className='row'><div><label>职业代码</label><input value={occupationCode} onChange={e=>setOccupationCode(e.target.value)} /></div><div><label>职业名称</label><input value={occupationTitle} onChange={e=>setOccupationTitle(e.target.value)} /></div></div><label>技能（逗号分隔）</label><input value={skills} onChange={e=>setSkills(e.target.value)} /><label>任务偏好</label><input value={prefs} onChange={e=>setPrefs(e.target.value)} /><button onClick={run} disabled={loading}>{loading?'评估中...':'生成风险评估'}</button></div>
+  return <div className="card"><h2>对话式引导（MVP）</h2><div className='row'><div><label>职业代码</label><input value={occupationCode} onChange={e=>setOccupationCode(e.target.value)} /></div><div><label>职业名称</label><input value={occupationTitle} onChange={e=>setOccupationTitle(e.target.value)} /></div></div><label>技能（逗号分隔）</label><input value={skills} onChange={e=>setSkills(e.target.value)} /><label>任务偏好</label><input value={prefs} onChange={e=>setPrefs(e.target.value)} /><button onClick={run} disabled={loading}>{loading?'评估中...':'生成风险评估'}</button>{loading && estimate !== null && <p>初步估计（v0）：{estimate.toFixed(1)}，正在结合 O*NET 数据精算…</p>}</div>
 }
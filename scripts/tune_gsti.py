@@ -19,6 +19,7 @@ from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 
+from app.core.feature_snapshot import SNAPSHOT_COLUMNS, FeatureSnapshot
 from app.core.gsti_router import GSTIRouter
 from app.models.tables import Assessment, Label, OnetCache
 
@@ -51,8 +52,9 @@ async def load_samples(db: AsyncSession):
         payload = assessment.input_payload or {}
         user_inputs = payload.get("user_inputs", {})
         tasks = user_inputs.get("tasks_preference") or []
+        features = FeatureSnapshot.from_dict({name: getattr(assessment, name) for name in SNAPSHOT_COLUMNS})
         onet_payload = {}
-        if assessment.occupation_code:
+        if assessment.occupation_code and features is None:
             cached = (await db.execute(select(OnetCache).where(OnetCache.occupation_code == assessment.occupation_code))).scalar_one_or_none()
             if cached:
                 onet_payload = cached.payload
@@ -61,6 +63,7 @@ async def load_samples(db: AsyncSession):
                 "assessment_id": assessment.id,
                 "tasks": tasks,
                 "onet_payload": onet_payload,
+                "features": features,
                 "context": {
                     "industry": user_inputs.get("industry"),
                     "region": user_inputs.get("region"),
@@ -108,6 +111,7 @@ async def main():
                 onet_payload=sample["onet_payload"],
                 model_version="v1",
                 context=sample["context"],
+                features=sample["features"],
             )
             abs_errors.append(abs(result["score"] - sample["label"]))
         mae = mean(abs_errors) if abs_errors else 0.0